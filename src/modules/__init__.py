@@ -1,11 +1,15 @@
-import requests
 import ssl
 import socket
 from urllib.parse import urlparse
 
+from utils.cancellation import ScanCancelled
+from utils.findings import Finding
+from utils.transport import Transport
+
 class HeaderScanner:
-    def __init__(self, target_url):
+    def __init__(self, target_url, transport=None):
         self.target_url = target_url
+        self.transport = transport or Transport()
         self.name = "HTTP Security Headers Scanner"
         self.description = "Проверка HTTP заголовков безопасности"
         
@@ -17,7 +21,9 @@ class HeaderScanner:
             port = parsed_url.port or 443
             
             context = ssl.create_default_context()
-            with socket.create_connection((hostname, port), timeout=5) as sock:
+            self.transport.cancel_token.check()
+            timeout = self.transport.cancel_token.timeout(5)
+            with socket.create_connection((hostname, port), timeout=timeout) as sock:
                 with context.wrap_socket(sock, server_hostname=hostname) as ssock:
                     cert = ssock.getpeercert()
                     
@@ -27,6 +33,8 @@ class HeaderScanner:
                 'issuer': dict(x[0] for x in cert.get('issuer', [])),
                 'expires': cert.get('notAfter', '')
             }
+        except ScanCancelled:
+            raise
         except Exception as e:
             return {'valid': False, 'error': str(e)}
     
@@ -43,7 +51,7 @@ class HeaderScanner:
         
         results = []
         try:
-            response = requests.get(self.target_url, timeout=5, verify=False)
+            response = self.transport.baseline(self.target_url, max_bytes=0)
             headers = response.headers
             
             for header, description in security_headers.items():
@@ -61,6 +69,8 @@ class HeaderScanner:
                         'description': f'Отсутствует: {description}'
                     })
                     
+        except ScanCancelled:
+            raise
         except Exception as e:
             results.append({'error': f'Ошибка при проверке заголовков: {str(e)}'})
         
@@ -79,7 +89,9 @@ class HeaderScanner:
         if ssl_info.get('valid'):
             results['info'].append(f"SSL сертификат валиден: {ssl_info.get('subject', {}).get('commonName', 'N/A')}")
         else:
-            results['warnings'].append(f"Проблема с SSL: {ssl_info.get('error', 'Неизвестная ошибка')}")
+            results['warnings'].append(Finding.warning(
+                f"Проблема с SSL: {ssl_info.get('error', 'Неизвестная ошибка')}", self.name, self.target_url
+            ))
         
         # Проверяем заголовки
         headers = self.check_security_headers()
@@ -87,13 +99,13 @@ class HeaderScanner:
         
         if missing_headers:
             results['vulnerabilities'].extend([
-                {
-                    'type': 'MISSING_SECURITY_HEADER',
-                    'severity': 'medium',
-                    'description': f"Отсутствует заголовок безопасности: {h['header']}",
-                    'details': h['description']
-                }
-                for h in missing_headers[:3]  # Первые 3 отсутствующих
+                Finding(
+                    'MISSING_SECURITY_HEADER', 'medium',
+                    'Отсутствует заголовок безопасности: {parameter}', '{evidence}',
+                    module=self.name, target=self.target_url,
+                    parameter=h['header'], evidence=h['description']
+                )
+                for h in missing_headers  # Проверка не требует доп. запросов - сообщаем обо всех
             ])
             results['info'].append(f"Найдено отсутствующих заголовков: {len(missing_headers)}")
         
@@ -1,82 +1,152 @@
-import requests
-import re
-from urllib.parse import urlparse, parse_qs, urlencode
+from utils.analysis import AnalysisPool, extract_page_structure, reflection_context
+from utils.cancellation import ScanCancelled
+from utils.findings import Finding
+from utils.injection import VECTORS, InjectionExecutor, reflected_near
+from utils.payload_corpus import load_corpus
+from utils.payload_stats import PayloadStats, technology_tags
+from utils.scheduler import Probe, ProbeScheduler, RequestBudget, parameter_risk
+from utils.transport import Transport
+
+XSS_DESCRIPTION = 'Reflected XSS в параметре {parameter}'
+XSS_DETAILS = 'Payload отражается в ответе: {payload:.50}...'
 
 class AdvancedXSSScanner:
-    def __init__(self, target_url):
+    def __init__(self, target_url, analysis_pool=None, budget=None, probes_per_parameter=3,
+                 payload_stats=None, corpus=None, transport=None, extra_parameters=None,
+                 vectors=VECTORS, json_body=None):
         self.target_url = target_url
         self.name = "Advanced XSS Scanner"
         self.description = "Расширенная проверка на XSS уязвимости"
         
-        # Payload для тестирования XSS
-        self.xss_payloads = [
-            # Basic payloads
-            "<script>alert('XSS')</script>",
-            "<img src=x onerror=alert('XSS')>",
-            "<svg onload=alert('XSS')>",
-            
-            # Bypass attempts
-            "<ScRiPt>alert('XSS')</ScRiPt>",
-            "<img src=x OneRrOr=alert('XSS')>",
-            
-            # Encoded payloads
-            "%3Cscript%3Ealert%28%27XSS%27%29%3C%2Fscript%3E",
-            "&lt;script&gt;alert('XSS')&lt;/script&gt;",
-        ]
+        # Payload для тестирования XSS (внешний корпус, см. payloads/xss.jsonl):
+        # базовые и обходные payload с закодированными вариантами
+        self.corpus = corpus or load_corpus('xss')
+        self.xss_payloads = self.corpus.payloads(context=None)
         
         # Context-specific payloads
         self.context_payloads = {
-            'html': ['"><script>alert(1)</script>', "'><script>alert(1)</script>"],
-            'attribute': ['" onmouseover="alert(1)', "' onmouseover='alert(1)"],
-            'javascript': ['\';alert(1);//', '";alert(1);//'],
+            context: self.corpus.payloads(context=context)
+            for context in self.corpus.values('context') if context
         }
+        
+        # Строки, подтверждающие отражение payload в ответе
+        self.payload_markers = {entry.payload: entry.markers for entry in self.corpus}
+        
+        # Пул анализа ответов (регулярные выражения выполняются вне сетевого цикла)
+        self.analysis_pool = analysis_pool or AnalysisPool()
+        
+        # Бюджет запросов на цель и лимит проб на один параметр
+        self.budget = budget or RequestBudget()
+        self.probes_per_parameter = probes_per_parameter
+        self.skipped_probes = 0
+        
+        # Статистика попаданий payload по технологиям цели и контексту отражения
+        self.payload_stats = payload_stats or PayloadStats()
+        
+        # Общий HTTP транспорт (сессия, авторизация, кэш эталонных ответов)
+        self.transport = transport or Transport()
+        
+        # Скрытые параметры, найденные перебором имен (имя -> безопасное значение)
+        self.extra_parameters = dict(extra_parameters or {})
+        
+        # Точки внедрения: параметры, сегменты пути, заголовки, cookies, поля JSON
+        self.executor = InjectionExecutor(
+            self.transport, target_url, vectors=vectors, json_body=json_body, budget=self.budget,
+            headers={'User-Agent': 'XSS-Scanner/1.0'}
+        )
+    
+    def detect_reflection_contexts(self, points):
+        """Контекст отражения исходных значений точек внедрения и заголовок Server"""
+        try:
+            response = self.executor.baseline()
+        except Exception:
+            return {}, None
+        
+        contexts = {}
+        for point in points:
+            # Скрытый параметр отражается только в ответе, где он передан
+            point_response = response
+            if point.kind == 'query' and point.name in self.extra_parameters:
+                try:
+                    point_response = self.executor.baseline(point)
+                except Exception:
+                    continue
+            contexts[point.key] = self.analysis_pool.submit(
+                reflection_context, point_response.content, point_response.encoding, point.value
+            )
+        return {key: future.result() for key, future in contexts.items()}, response.headers.get('Server')
     
     def test_reflected_xss(self):
         """Тестирование на Reflected XSS"""
         results = []
         
-        parsed_url = urlparse(self.target_url)
-        query_params = parse_qs(parsed_url.query)
-        
-        if not query_params:
+        try:
+            points = self.executor.points(self.extra_parameters)
+        except ScanCancelled:
+            return results
+        except Exception:
+            points = []
+        if not points:
             return results
         
-        print("   🔍 Тестирование параметров на Reflected XSS...")
+        print(f"   🔍 Тестирование {len(points)} точек внедрения на Reflected XSS...")
+        
+        contexts, server = self.detect_reflection_contexts(points)
+        tags = {
+            point.key: technology_tags(server=server, context=contexts.get(point.key))
+            for point in points
+        }
+        
+        # Планируем пробы: базовые payload дают больше попаданий, контекстные - реже,
+        # если только параметр не отражается именно в их контексте
+        scheduler = ProbeScheduler(self.budget, self.probes_per_parameter)
+        for point in points:
+            param = point.key
+            risk = parameter_risk(point.name)
+            for index, payload in enumerate(self.xss_payloads):
+                if not point.accepts(payload):
+                    continue
+                score = self.payload_stats.score('xss', tags[param], payload, prior=0.5 * 0.9 ** index)
+                scheduler.add(Probe(param, payload, 'reflected', score, 1.0, risk))
+            for context, payloads in self.context_payloads.items():
+                prior = 0.6 if context == contexts.get(param) else 0.3
+                for index, payload in enumerate(payloads):
+                    if not point.accepts(payload):
+                        continue
+                    score = self.payload_stats.score('xss', tags[param], payload, prior=prior * 0.9 ** index)
+                    scheduler.add(Probe(param, payload, context, score, 1.0, risk))
         
-        for param in query_params:
-            original_value = query_params[param][0]
+        # Пробы заголовков и cookies отправляются пакетами, каждая со своим canary
+        for probes in self.executor.batches(scheduler):
+            try:
+                response, canaries = self.executor.send(probes, timeout=5)
+            except Exception:
+                continue
             
-            for payload in self.xss_payloads[:3]:  # Тестируем только 3 payload
-                # Создаем тестовый URL
-                test_params = query_params.copy()
-                test_params[param] = [payload]
+            text = response.text
+            for probe in probes:
+                param, payload = probe.parameter, probe.payload
                 
-                test_url = f"{parsed_url.scheme}://{parsed_url.netloc}{parsed_url.path}"
-                if test_params:
-                    test_url += "?" + urlencode(test_params, doseq=True)
-                
-                try:
-                    response = requests.get(
-                        test_url, 
-                        timeout=5, 
-                        verify=False,
-                        headers={'User-Agent': 'XSS-Scanner/1.0'}
-                    )
-                    
-                    # Проверяем, отобразился ли payload в ответе
-                    if payload in response.text:
-                        results.append({
-                            'type': 'REFLECTED_XSS',
-                            'severity': 'high',
-                            'description': f'Reflected XSS в параметре {param}',
-                            'details': f'Payload отражается в ответе: {payload[:50]}...',
-                            'url': test_url[:100] + '...'
-                        })
-                        break  # Один payload достаточно
-                        
-                except Exception as e:
-                    continue
+                # Проверяем, отобразился ли payload в ответе
+                markers = self.payload_markers.get(payload, (payload,))
+                if param in canaries:
+                    reflected = reflected_near(text, canaries[param], markers, 2 * len(payload))
+                else:
+                    reflected = any(marker in text for marker in markers)
+                self.payload_stats.record('xss', tags[param], payload, reflected)
+                if reflected:
+                    results.append(Finding(
+                        'REFLECTED_XSS', 'high', XSS_DESCRIPTION, XSS_DETAILS,
+                        module=self.name,
+                        target=self.target_url,
+                        parameter=param,
+                        payload_type=probe.payload_type,
+                        payload=payload,
+                        url=self.executor.probe_url(probe)[:100] + '...'
+                    ))
+                    scheduler.settle(param)  # Один payload достаточно
         
+        self.skipped_probes = scheduler.skipped
         return results
     
     def analyze_input_vectors(self):
@@ -84,42 +154,30 @@ class AdvancedXSSScanner:
         vectors = []
         
         try:
-            response = requests.get(self.target_url, timeout=5, verify=False)
-            html = response.text
-            
-            # Ищем все формы
-            form_pattern = r'<form[^>]*>.*?</form>'
-            forms = re.findall(form_pattern, html, re.IGNORECASE | re.DOTALL)
+            response = self.transport.baseline(self.target_url)
+            page = self.analysis_pool.submit(
+                extract_page_structure, response.content, response.encoding
+            ).result()
+            forms = page['forms']
             
             if forms:
                 vectors.append(f"Найдено форм: {len(forms)}")
                 
                 # Анализируем каждую форму
                 for i, form in enumerate(forms, 1):
-                    # Ищем метод и action
-                    method_match = re.search(r'method=["\']?([^"\'\s>]+)', form, re.IGNORECASE)
-                    action_match = re.search(r'action=["\']?([^"\'\s>]+)', form, re.IGNORECASE)
-                    
-                    method = method_match.group(1) if method_match else 'GET'
-                    action = action_match.group(1) if action_match else ''
+                    method = form['method'] or 'GET'
                     
-                    # Ищем поля ввода
-                    inputs = re.findall(r'<input[^>]*>', form, re.IGNORECASE)
-                    textareas = re.findall(r'<textarea[^>]*>', form, re.IGNORECASE)
-                    
-                    input_types = []
-                    for inp in inputs:
-                        type_match = re.search(r'type=["\']?([^"\'\s>]+)', inp, re.IGNORECASE)
-                        name_match = re.search(r'name=["\']?([^"\'\s>]+)', inp, re.IGNORECASE)
-                        
-                        if type_match and name_match:
-                            input_types.append(f"{name_match.group(1)} ({type_match.group(1)})")
+                    input_types = [
+                        f"{name} ({input_type})"
+                        for name, input_type in form['inputs']
+                        if input_type and name
+                    ]
                     
                     if input_types:
                         vectors.append(f"  Форма {i}: method={method}, inputs={', '.join(input_types[:3])}")
             
             # Ищем другие потенциальные векторы
-            script_tags = len(re.findall(r'<script[^>]*>', html, re.IGNORECASE))
+            script_tags = page['script_tags']
             if script_tags > 0:
                 vectors.append(f"Найдено тегов <script>: {script_tags}")
             
@@ -148,6 +206,16 @@ class AdvancedXSSScanner:
             results['info'].append(f"Найдено Reflected XSS уязвимостей: {len(xss_results)}")
         else:
             results['info'].append("Reflected XSS не обнаружены")
+        if self.executor.batched_probes:
+            results['info'].append(f"XSS пробы заголовков и cookies, отправленные пакетами: {self.executor.batched_probes}")
+        
+        if self.skipped_probes:
+            results['info'].append(f"Бюджет запросов исчерпан: пропущено XSS проб: {self.skipped_probes}")
+        
+        # После отмены возвращаем уже найденное, не начиная следующих этапов
+        if self.transport.cancel_token.cancelled:
+            results['info'].append("Проверка XSS прервана: сканирование остановлено")
+            return results
         
         # Анализируем векторы
         vectors = self.analyze_input_vectors()
@@ -155,16 +223,18 @@ class AdvancedXSSScanner:
         
         # Проверяем наличие CSP (защита от XSS)
         try:
-            response = requests.get(self.target_url, timeout=3, verify=False)
+            response = self.transport.baseline(self.target_url, max_bytes=0)
             csp = response.headers.get('Content-Security-Policy', '')
             
             if csp:
                 results['info'].append(f"Найден Content-Security-Policy: {csp[:50]}...")
             else:
-                results['warnings'].append("Content-Security-Policy отсутствует (повышает риск XSS)")
+                results['warnings'].append(Finding.warning(
+                    "Content-Security-Policy отсутствует (повышает риск XSS)", self.name, self.target_url
+                ))
                 
         except:
-            results['warnings'].append("Не удалось проверить CSP")
+            results['warnings'].append(Finding.warning("Не удалось проверить CSP", self.name, self.target_url))
         
         # Рекомендации
         if any('форма' in str(v).lower() for v in vectors):
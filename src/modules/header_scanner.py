@@ -2,11 +2,14 @@
 Модуль для проверки HTTP заголовков безопасности
 """
 
-import requests
+from utils.cancellation import ScanCancelled
+from utils.findings import Finding
+from utils.transport import Transport
 
 class HeaderScanner:
-    def __init__(self, target_url):
+    def __init__(self, target_url, transport=None):
         self.target_url = target_url
+        self.transport = transport or Transport()
         self.name = "Header Security Scanner"
         self.description = "Проверка HTTP заголовков безопасности"
     
@@ -19,7 +22,8 @@ class HeaderScanner:
         }
         
         try:
-            response = requests.get(self.target_url, timeout=5, verify=False)
+            # Для проверки нужны только заголовки: HEAD вместо загрузки страницы
+            response = self.transport.baseline(self.target_url, max_bytes=0)
             headers = response.headers
             
             # Проверяем важные заголовки безопасности
@@ -37,7 +41,10 @@ class HeaderScanner:
                 if header in headers:
                     results['info'].append(f"✅ {header}: {headers[header]} ({description})")
                 else:
-                    results['warnings'].append(f"⚠️ {header} отсутствует: {description}")
+                    results['warnings'].append(Finding(
+                        'MISSING_SECURITY_HEADER', 'low', '⚠️ {parameter} отсутствует: {evidence}',
+                        module=self.name, target=self.target_url, parameter=header, evidence=description
+                    ))
             
             # Проверка Server заголовка
             if 'Server' in headers:
@@ -47,18 +54,33 @@ class HeaderScanner:
                 # Проверка на откровение информации
                 sensitive_servers = ['Apache', 'nginx', 'IIS', 'Tomcat']
                 if any(server in server_info for server in sensitive_servers):
-                    results['warnings'].append(f"ℹ️ Server заголовок раскрывает информацию: {server_info}")
+                    results['warnings'].append(Finding(
+                        'SERVER_DISCLOSURE', 'low', 'ℹ️ Server заголовок раскрывает информацию: {evidence}',
+                        module=self.name, target=self.target_url, parameter='Server', evidence=server_info
+                    ))
             
             # Проверка cookies
             if 'Set-Cookie' in headers:
-                cookies = headers.get_all('Set-Cookie')
+                # requests склеивает повторяющиеся Set-Cookie, поэтому берем исходные заголовки
+                cookies = response.raw.headers.getlist('Set-Cookie')
                 for cookie in cookies:
+                    # Одинаковые предупреждения для разных cookies схлопываются по отпечатку
                     if 'HttpOnly' not in cookie:
-                        results['warnings'].append("🍪 Cookie без флага HttpOnly")
+                        results['warnings'].append(Finding(
+                            'INSECURE_COOKIE', 'low', '🍪 Cookie без флага HttpOnly',
+                            module=self.name, target=self.target_url, parameter='HttpOnly'
+                        ))
                     if 'Secure' not in cookie and self.target_url.startswith('https'):
-                        results['warnings'].append("🍪 Cookie без флага Secure на HTTPS сайте")
+                        results['warnings'].append(Finding(
+                            'INSECURE_COOKIE', 'low', '🍪 Cookie без флага Secure на HTTPS сайте',
+                            module=self.name, target=self.target_url, parameter='Secure'
+                        ))
             
+        except ScanCancelled:
+            results['info'].append("Проверка заголовков прервана: сканирование остановлено")
         except Exception as e:
-            results['warnings'].append(f"Ошибка проверки заголовков: {str(e)}")
+            results['warnings'].append(Finding.warning(
+                f"Ошибка проверки заголовков: {str(e)}", self.name, self.target_url
+            ))
         
         return results
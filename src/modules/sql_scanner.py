@@ -1,204 +1,314 @@
 import requests
-import re
-from urllib.parse import urlparse, parse_qs, urlencode
+from concurrent.futures import Future
+from urllib.parse import urlparse
+
+from utils.analysis import (
+    AnalysisPool,
+    ERROR_PATTERNS,
+    analyze_sqli_response,
+    decode_body,
+    detect_db_from_errors,
+    extract_page_structure,
+)
+from utils.cancellation import ScanCancelled
+from utils.findings import Finding
+from utils.injection import VECTORS, InjectionExecutor
+from utils.payload_corpus import load_corpus
+from utils.payload_stats import PayloadStats, technology_tags
+from utils.scheduler import Probe, ProbeScheduler, RequestBudget, parameter_risk
+from utils.transport import Transport
+
+SQLI_DESCRIPTION = 'Потенциальная SQL инъекция ({payload_type}) в параметре {parameter}'
+SQLI_DETAILS = 'Payload: {payload}, Причина: {evidence}'
 
 class AdvancedSQLScanner:
-    def __init__(self, target_url):
+    def __init__(self, target_url, analysis_pool=None, budget=None, probes_per_parameter=4,
+                 payload_stats=None, corpus=None, transport=None, extra_parameters=None,
+                 vectors=VECTORS, json_body=None):
         self.target_url = target_url
         self.name = "Advanced SQL Injection Scanner"
         self.description = "Расширенная проверка на SQL инъекции"
         
-        # Payload для различных типов SQL инъекций
+        # Payload для различных типов SQL инъекций (внешний корпус, см. payloads/sqli.jsonl)
+        self.corpus = corpus or load_corpus('sqli')
         self.sql_payloads = {
-            'boolean_based': [
-                "' OR '1'='1",
-                "' OR '1'='1' --",
-                "' OR '1'='1' /*",
-                "admin' OR '1'='1",
-            ],
-            'error_based': [
-                "'",
-                "\"",
-                "' OR 1=CONVERT(int, @@version)--",
-                "' AND 1=CONVERT(int, @@version)--",
-            ],
-            'union_based': [
-                "' UNION SELECT NULL--",
-                "' UNION SELECT NULL, NULL--",
-                "' UNION SELECT @@version, NULL--",
-            ],
-            'time_based': [
-                "' OR SLEEP(5)--",
-                "' OR (SELECT * FROM (SELECT(SLEEP(5)))a)--",
-            ]
+            technique: self.corpus.payloads(technique=technique)
+            for technique in self.corpus.values('technique')
         }
+        self.payload_dbms = {entry.payload: entry.dbms for entry in self.corpus}
         
-        # Паттерны SQL ошибок для разных СУБД
-        self.error_patterns = {
-            'mysql': [
-                r"SQL syntax.*MySQL",
-                r"Warning.*mysql_.*",
-                r"MySQLSyntaxErrorException",
-                r"valid MySQL result",
-            ],
-            'postgresql': [
-                r"PostgreSQL.*ERROR",
-                r"Warning.*\Wpg_.*",
-                r"valid PostgreSQL result",
-            ],
-            'mssql': [
-                r"Microsoft OLE DB Provider for ODBC Drivers",
-                r"ODBC SQL Server Driver",
-                r"SQLServer JDBC Driver",
-            ],
-            'oracle': [
-                r"ORA-[0-9][0-9][0-9][0-9]",
-                r"Oracle error",
-                r"Oracle.*Driver",
-            ]
+        # Ожидаемая результативность и стоимость (в секундах) payload каждого типа
+        self.payload_yield = {
+            'boolean_based': 0.6,
+            'error_based': 0.55,
+            'union_based': 0.3,
+            'time_based': 0.25,
+        }
+        self.payload_cost = {
+            'time_based': 6.0,  # SLEEP(5) + обычное время ответа
         }
+        
+        # Бюджет запросов на цель и лимит проб на один параметр
+        self.budget = budget or RequestBudget()
+        self.probes_per_parameter = probes_per_parameter
+        self.skipped_probes = 0
+        
+        # Статистика попаданий payload по технологиям цели
+        self.payload_stats = payload_stats or PayloadStats()
+        
+        # Общий HTTP транспорт (сессия, авторизация, кэш эталонных ответов)
+        self.transport = transport or Transport()
+        self.stats_tags = technology_tags()
+        
+        # Скрытые параметры, найденные перебором имен (имя -> безопасное значение)
+        self.extra_parameters = dict(extra_parameters or {})
+        
+        # Точки внедрения: параметры, сегменты пути, заголовки, cookies, поля JSON
+        self.executor = InjectionExecutor(
+            self.transport, target_url, vectors=vectors, json_body=json_body, budget=self.budget,
+            headers={
+                'User-Agent': 'SQL-Scanner/1.0',
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
+            }
+        )
+        
+        # Паттерны SQL ошибок для разных СУБД
+        self.error_patterns = ERROR_PATTERNS
+        
+        # Пул анализа ответов (регулярные выражения выполняются вне сетевого цикла)
+        self.analysis_pool = analysis_pool or AnalysisPool()
     
     def detect_db_from_errors(self, response_text):
         """Определение СУБД по ошибкам в ответе"""
-        for db_type, patterns in self.error_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, response_text, re.IGNORECASE):
-                    return db_type
-        return None
+        return detect_db_from_errors(response_text, self.error_patterns)
+    
+    def fetch_probe(self, probes):
+        """Сетевая стадия: получение тела ответа на payload одной или нескольких проб"""
+        response, _ = self.executor.send(probes, timeout=8)
+        return response.content, response.encoding
     
-    def test_sql_injection(self, test_url, payload):
-        """Тестирование одного payload"""
+    def fetch_baseline(self):
+        """Длина эталонного ответа без payload и заголовок Server"""
         try:
-            response = requests.get(
-                test_url, 
-                timeout=8, 
-                verify=False,
-                headers={
-                    'User-Agent': 'SQL-Scanner/1.0',
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
-                }
-            )
-            
-            # Проверяем SQL ошибки
-            detected_db = self.detect_db_from_errors(response.text)
-            if detected_db:
-                return True, f"SQL ошибка ({detected_db.upper()})"
-            
-            # Проверяем изменение в ответе (базовый метод)
-            baseline_response = requests.get(self.target_url, timeout=5, verify=False)
-            
-            # Разные методы обнаружения
-            length_diff = abs(len(response.text) - len(baseline_response.text))
-            length_ratio = length_diff / len(baseline_response.text) if len(baseline_response.text) > 0 else 0
-            
-            # Ищем ключевые слова в ответе
-            sql_keywords = ['mysql', 'sql', 'database', 'query', 'syntax']
-            keyword_matches = sum(1 for keyword in sql_keywords if keyword in response.text.lower())
-            
-            # Эвристики для обнаружения SQLi
-            if length_ratio > 0.3:  # Сильное изменение длины
-                return True, f"Значительное изменение ответа ({length_ratio:.1%})"
-            elif keyword_matches > 2:  # Много SQL-ключевых слов
-                return True, f"Обнаружены SQL-ключевые слова ({keyword_matches})"
-            elif "error" in response.text.lower() and "sql" in response.text.lower():
-                return True, "Текст ошибки содержит SQL"
-                
+            baseline_response = self.executor.baseline()
+            # Длина считается той же функцией, что и в анализе ответов на пробы
+            text = decode_body(baseline_response.content, baseline_response.encoding)
+            return len(text), baseline_response.headers.get('Server')
+        except Exception:
+            return 0, None
+    
+    def fetch_point_baseline(self, point):
+        """Длина ответа со скрытым параметром: без него страница может быть другой"""
+        try:
+            response = self.executor.baseline(point)
+            return len(decode_body(response.content, response.encoding))
+        except Exception:
+            return 0
+    
+    def fetch_baseline_length(self):
+        """Длина эталонного ответа без payload"""
+        return self.fetch_baseline()[0]
+    
+    def submit_probe(self, probes, baseline_length):
+        """
+        Отправка payload и передача ответа в пул анализа.
+        
+        Возвращает Future с результатом анализа либо готовый кортеж
+        (is_vulnerable, reason), если анализировать нечего; None - проба
+        отменена вместе со сканированием.
+        """
+        try:
+            body, encoding = self.fetch_probe(probes)
+        except ScanCancelled:
+            return None
         except requests.exceptions.Timeout:
             # Timeout может указывать на time-based SQLi
             return True, "Таймаут запроса (возможна time-based SQLi)"
         except Exception as e:
             return False, f"Ошибка: {str(e)}"
         
+        return self.analysis_pool.submit(analyze_sqli_response, body, encoding, baseline_length)
+    
+    def interpret_analysis(self, analysis):
+        """Эвристики для обнаружения SQLi по результату анализа ответа"""
+        if analysis['db']:
+            return True, f"SQL ошибка ({analysis['db'].upper()})"
+        if analysis['length_ratio'] > 0.3:  # Сильное изменение длины
+            return True, f"Значительное изменение ответа ({analysis['length_ratio']:.1%})"
+        elif analysis['keyword_matches'] > 2:  # Много SQL-ключевых слов
+            return True, f"Обнаружены SQL-ключевые слова ({analysis['keyword_matches']})"
+        elif analysis['sql_error_text']:
+            return True, "Текст ошибки содержит SQL"
         return False, None
     
-    def analyze_url_for_sqli(self):
-        """Анализ URL на SQL инъекции"""
+    def collect_probe(self, outcome):
+        """Ожидание результата, полученного из submit_probe"""
+        if outcome is None:
+            return False, "Проба отменена"
+        if isinstance(outcome, Future):
+            try:
+                return self.interpret_analysis(outcome.result())
+            except Exception as e:
+                return False, f"Ошибка: {str(e)}"
+        return outcome
+    
+    def probe_db(self, outcome):
+        """СУБД, распознанная анализом ответа на пробу"""
+        if isinstance(outcome, Future) and outcome.done() and not outcome.exception():
+            return outcome.result().get('db')
+        return None
+    
+    def analyze_injection_points(self):
+        """Анализ точек внедрения запроса на SQL инъекции"""
         results = []
         
-        parsed_url = urlparse(self.target_url)
-        query_params = parse_qs(parsed_url.query)
-        
-        if not query_params:
+        try:
+            points = self.executor.points(self.extra_parameters)
+        except ScanCancelled:
+            return results
+        except Exception:
+            points = []
+        if not points:
             return results
         
-        print(f"   🔍 Тестирование {len(query_params)} параметров на SQLi...")
+        kinds = {}
+        for point in points:
+            kinds[point.kind] = kinds.get(point.kind, 0) + 1
+        print(f"   🔍 Тестирование {len(points)} точек внедрения на SQLi "
+              f"({', '.join(f'{kind}: {count}' for kind, count in kinds.items())})...")
         
-        for param in query_params:
-            original_value = query_params[param][0]
-            
-            # Тестируем разные типы payload
+        parsed_url = urlparse(self.target_url)
+        baseline_length, server = self.fetch_baseline()
+        baseline_lengths = {}
+        for point in points:
+            hidden = point.kind == 'query' and point.name in self.extra_parameters
+            baseline_lengths[point.key] = self.fetch_point_baseline(point) if hidden else baseline_length
+        
+        # Технологии цели: СУБД запоминается между сканированиями хоста
+        known_db = self.payload_stats.host_fact(parsed_url.netloc, 'db')
+        self.stats_tags = technology_tags(server=server, db=known_db)
+        
+        # Планируем пробы: рискованные параметры и результативные payload идут первыми
+        scheduler = ProbeScheduler(self.budget, self.probes_per_parameter)
+        for point in points:
+            param = point.key
+            risk = parameter_risk(point.name)
             for payload_type, payloads in self.sql_payloads.items():
-                if payload_type in ['boolean_based', 'error_based']:  # Начинаем с простых
-                    for payload in payloads[:2]:  # Первые 2 payload каждого типа
-                        
-                        # Создаем тестовый URL
-                        test_params = query_params.copy()
-                        test_params[param] = [payload]
-                        
-                        test_url = f"{parsed_url.scheme}://{parsed_url.netloc}{parsed_url.path}"
-                        if test_params:
-                            test_url += "?" + urlencode(test_params, doseq=True)
-                        
-                        is_vulnerable, reason = self.test_sql_injection(test_url, payload)
-                        
-                        if is_vulnerable:
-                            results.append({
-                                'type': 'SQL_INJECTION',
-                                'severity': 'critical',
-                                'description': f'Потенциальная SQL инъекция ({payload_type}) в параметре {param}',
-                                'details': f'Payload: {payload}, Причина: {reason}',
-                                'payload_type': payload_type,
-                                'parameter': param
-                            })
-                            break  # Переходим к следующему параметру
-                    if any(r['parameter'] == param for r in results):
-                        break  # Уязвимость уже найдена для этого параметра
+                for index, payload in enumerate(payloads):
+                    if not point.accepts(payload):
+                        continue
+                    prior = self.payload_yield.get(payload_type, 0.3) * 0.9 ** index
+                    payload_dbms = self.payload_dbms.get(payload, ())
+                    if known_db and payload_dbms and known_db not in payload_dbms:
+                        prior *= 0.5  # Payload рассчитан на другую СУБД
+                    scheduler.add(Probe(
+                        parameter=param,
+                        payload=payload,
+                        payload_type=payload_type,
+                        expected_yield=self.payload_stats.score(
+                            'sqli', self.stats_tags, payload,
+                            prior=prior
+                        ),
+                        cost=self.payload_cost.get(payload_type, 1.0),
+                        risk=risk
+                    ))
         
+        # Сетевая стадия не ждет анализа: готовые результаты забираются между запросами.
+        # Пробы заголовков и cookies отправляются пакетами
+        pending = []
+        for probes in self.executor.batches(scheduler):
+            baseline = baseline_lengths[probes[0].parameter]
+            pending.append((probes, self.submit_probe(probes, baseline)))
+            pending = self.drain_probes(pending, scheduler, results, wait=False, baseline_lengths=baseline_lengths)
+        self.drain_probes(pending, scheduler, results, wait=True, baseline_lengths=baseline_lengths)
+        
+        self.skipped_probes = scheduler.skipped
         return results
     
+    def drain_probes(self, pending, scheduler, results, wait, baseline_lengths=None):
+        """Сбор результатов анализа; возвращает пробы, которые еще не готовы"""
+        still_pending = []
+        for probes, outcome in pending:
+            if not wait and isinstance(outcome, Future) and not outcome.done():
+                still_pending.append((probes, outcome))
+                continue
+            if outcome is None:
+                continue  # Отмененная проба не учитывается в статистике payload
+            
+            if len(probes) == 1:
+                self.record_probe(probes[0], outcome, scheduler, results)
+                continue
+            
+            is_vulnerable, _ = self.collect_probe(outcome)
+            if not is_vulnerable:
+                for probe in probes:
+                    self.payload_stats.record('sqli', self.stats_tags, probe.payload, False)
+                continue
+            # Реакция на пакет: каждая проба перепроверяется отдельным запросом,
+            # который расходует бюджет цели
+            budget = scheduler.budget
+            for probe in probes:
+                if scheduler.is_settled(probe.parameter):
+                    continue
+                if budget.exhausted() or not budget.fits(probe.cost):
+                    scheduler.skipped += 1
+                    continue
+                single = self.submit_probe([probe], (baseline_lengths or {}).get(probe.parameter, 0))
+                if single is not None:
+                    self.record_probe(probe, single, scheduler, results)
+        return still_pending
+    
+    def record_probe(self, probe, outcome, scheduler, results):
+        """Учет результата одной пробы: статистика payload и находка"""
+        is_vulnerable, reason = self.collect_probe(outcome)
+        
+        tags = self.stats_tags
+        detected_db = self.probe_db(outcome)
+        if detected_db:
+            self.payload_stats.remember(urlparse(self.target_url).netloc, 'db', detected_db)
+            if f"db:{detected_db}" not in tags:
+                tags = tags + [f"db:{detected_db}"]
+        self.payload_stats.record('sqli', tags, probe.payload, is_vulnerable)
+        
+        if is_vulnerable and not scheduler.is_settled(probe.parameter):
+            results.append(Finding(
+                'SQL_INJECTION', 'critical', SQLI_DESCRIPTION, SQLI_DETAILS,
+                module=self.name,
+                target=self.target_url,
+                parameter=probe.parameter,
+                payload_type=probe.payload_type,
+                payload=probe.payload,
+                evidence=reason
+            ))
+            scheduler.settle(probe.parameter)  # Уязвимость уже найдена для этого параметра
+    
     def scan_forms_for_sqli(self):
         """Поиск форм для потенциальных SQL инъекций"""
         forms_info = []
         
         try:
-            response = requests.get(self.target_url, timeout=10, verify=False)
-            html = response.text
-            
-            # Ищем формы
-            form_pattern = r'<form[^>]*>.*?</form>'
-            forms = re.findall(form_pattern, html, re.IGNORECASE | re.DOTALL)
+            response = self.transport.baseline(self.target_url)
+            page = self.analysis_pool.submit(
+                extract_page_structure, response.content, response.encoding
+            ).result()
+            forms = page['forms']
             
             if not forms:
                 return ["Формы не найдены в HTML"]
             
             for i, form in enumerate(forms, 1):
                 # Извлекаем атрибуты формы
-                action_match = re.search(r'action=["\']?([^"\'\s>]+)', form, re.IGNORECASE)
-                method_match = re.search(r'method=["\']?([^"\'\s>]+)', form, re.IGNORECASE)
-                
-                action = action_match.group(1) if action_match else ''
-                method = method_match.group(1).upper() if method_match else 'GET'
-                
-                # Ищем поля ввода
-                inputs = re.findall(r'<input[^>]*>', form, re.IGNORECASE)
-                textareas = re.findall(r'<textarea[^>]*>', form, re.IGNORECASE)
+                action = form['action'] or ''
+                method = form['method'].upper() if form['method'] else 'GET'
                 
                 # Анализируем поля
                 field_analysis = []
-                for inp in inputs:
-                    name_match = re.search(r'name=["\']?([^"\'\s>]+)', inp, re.IGNORECASE)
-                    type_match = re.search(r'type=["\']?([^"\'\s>]+)', inp, re.IGNORECASE)
-                    
-                    if name_match:
-                        field_name = name_match.group(1)
-                        field_type = type_match.group(1) if type_match else 'text'
+                for field_name, field_type in form['inputs']:
+                    if field_name:
+                        field_type = field_type or 'text'
                         
                         # Определяем потенциально опасные поля
-                        risk = 'low'
-                        if field_type in ['text', 'search', 'email', 'password']:
-                            risk = 'medium'
-                        if any(keyword in field_name.lower() for keyword in ['user', 'name', 'id', 'query', 'search']):
-                            risk = 'high'
+                        risk = parameter_risk(field_name, field_type)
                         
                         field_analysis.append(f"{field_name} ({field_type}, риск: {risk})")
                 
@@ -219,13 +329,23 @@ class AdvancedSQLScanner:
             'info': []
         }
         
-        # Анализ URL параметров
-        sqli_results = self.analyze_url_for_sqli()
+        # Анализ точек внедрения: параметры, путь, заголовки, cookies, JSON
+        sqli_results = self.analyze_injection_points()
         if sqli_results:
             results['vulnerabilities'].extend(sqli_results)
             results['info'].append(f"Потенциальные SQL инъекции: {len(sqli_results)}")
         else:
-            results['info'].append("SQL инъекции в URL параметрах не обнаружены")
+            results['info'].append("SQL инъекции в точках внедрения не обнаружены")
+        if self.executor.batched_probes:
+            results['info'].append(f"SQLi пробы заголовков и cookies, отправленные пакетами: {self.executor.batched_probes}")
+        
+        if self.skipped_probes:
+            results['info'].append(f"Бюджет запросов исчерпан: пропущено SQLi проб: {self.skipped_probes}")
+        
+        # После отмены возвращаем уже найденное, не начиная следующих этапов
+        if self.transport.cancel_token.cancelled:
+            results['info'].append("Проверка SQLi прервана: сканирование остановлено")
+            return results
         
         # Анализ форм
         forms_info = self.scan_forms_for_sqli()
@@ -240,8 +360,12 @@ class AdvancedSQLScanner:
         
         # Общая оценка риска
         if sqli_results:
-            results['warnings'].append("Обнаружены признаки SQL инъекций. Необходима ручная проверка.")
+            results['warnings'].append(Finding.warning(
+                "Обнаружены признаки SQL инъекций. Необходима ручная проверка.", self.name, self.target_url
+            ))
         elif any('риск: high' in info for info in forms_info):
-            results['warnings'].append("Высокорисковые поля найдены. Рекомендуется тестирование.")
+            results['warnings'].append(Finding.warning(
+                "Высокорисковые поля найдены. Рекомендуется тестирование.", self.name, self.target_url
+            ))
         
         return results
@@ -5,9 +5,17 @@
 """
 
 import argparse
+import contextlib
+import copy
 import json
+import os
+import random
+import signal
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from urllib.parse import parse_qs, urlparse
 
 # Импорты модулей
 from modules.header_scanner import HeaderScanner
@@ -15,102 +23,942 @@ from modules.advanced_xss_scanner import AdvancedXSSScanner
 from modules.sql_scanner import AdvancedSQLScanner
 from utils.reporter import Reporter
 from utils.html_reporter import HTMLReporter
+from utils.sarif_reporter import SARIFReporter
+from utils.analysis import AnalysisPool
+from utils.auth import AuthenticationError, build_authenticator
+from utils.cancellation import CancelToken, ScanCancelled
+from utils.clustering import FINGERPRINT_BYTES, PageClusterer, structure_simhash
+from utils.daemon import ScanDaemon
+from utils.diff import diff_files, diff_findings, iter_findings
+from utils.findings import Finding, FindingSet, as_finding
+from utils.injection import VECTORS
+from utils.loadtest import (
+    LATENCY_DISTRIBUTIONS, LatencyModel, LoadMonitor, SyntheticTargets, TargetProfile, build_baseline,
+    compare_baselines, load_baseline, save_baseline
+)
+from utils.netcache import DEFAULT_DNS_TTL
+from utils.param_discovery import ParameterDiscovery, load_wordlist
+from utils.payload_corpus import load_corpus
+from utils.payload_stats import PayloadStats
+from utils.sast import (
+    DEFAULT_CACHE_PATH, DEFAULT_SEMGREP_CONFIGS, BanditTool, SASTCache, SASTError, SASTRunner,
+    SemgrepTool, git_changed_files, python_files
+)
+from utils.scheduler import RequestBudget
+from utils.transport import Transport
+
+# Имена файлов отчетов по умолчанию
+REPORT_FILENAMES = {
+    'json': 'scan_report.json',
+    'jsonl': 'scan_report.jsonl',
+    'markdown': 'scan_report.md',
+    'html': 'scan_report.html',
+    'sarif': 'scan_report.sarif',
+}
+
+class ScanContext:
+    """Ресурсы, общие для сканирований нескольких целей (сессия, пулы, корпуса payload)"""
+    
+    def __init__(self, analysis_workers=0, max_requests=None, time_budget=None,
+                 probes_per_parameter=None, payload_stats_path=None, payload_dir=None, auth=None,
+                 param_discovery=True, param_wordlist=None, max_duration=None, dns_ttl=DEFAULT_DNS_TTL,
+                 vectors=VECTORS, json_body=None):
+        # Общий дедлайн и отмена (Ctrl+C) для всех целей и модулей
+        self.cancel_token = CancelToken(max_duration)
+        
+        # Общая HTTP сессия всех модулей (с авторизацией, если задана)
+        self.transport = Transport(auth=auth, cancel_token=self.cancel_token, dns_ttl=dns_ttl)
+        
+        # Пул процессов для анализа ответов (0 - анализ в основном процессе)
+        self.analysis_pool = AnalysisPool(analysis_workers)
+        
+        # Статистика попаданий payload из прошлых сканирований
+        self.payload_stats = PayloadStats.load(payload_stats_path)
+        
+        self.corpora = {
+            'sqli': load_corpus('sqli', payload_dir),
+            'xss': load_corpus('xss', payload_dir)
+        }
+        
+        # Имена для поиска скрытых параметров (None - поиск отключен)
+        self.param_wordlist = load_wordlist(param_wordlist) if param_discovery else None
+        
+        # Точки внедрения, в которые подставляются payload (и тело JSON запроса цели)
+        self.vectors = tuple(vectors)
+        self.json_body = json_body
+        
+        # Бюджет проб задается на каждую цель отдельно
+        self.max_requests = max_requests
+        self.time_budget = time_budget
+        self.probes_per_parameter = probes_per_parameter
+        
+        self._parent = None
+    
+    def fork(self, max_duration=None, auth=None, max_requests=None, time_budget=None,
+             probes_per_parameter=None, vectors=None, json_body=None):
+        """
+        Контекст одного задания поверх прогретых ресурсов: пулы соединений,
+        кэши DNS/TLS, пул анализа и корпуса общие, а cookies, авторизация,
+        дедлайн и лимиты проб - свои
+        """
+        child = copy.copy(self)
+        child._parent = self
+        child.cancel_token = CancelToken(max_duration)
+        child.transport = Transport(auth=auth, cancel_token=child.cancel_token, adapter=self.transport.adapter)
+        # Незаданные лимиты наследуются от исходного контекста
+        if max_requests is not None:
+            child.max_requests = max_requests
+        if time_budget is not None:
+            child.time_budget = time_budget
+        if probes_per_parameter is not None:
+            child.probes_per_parameter = probes_per_parameter
+        if vectors is not None:
+            child.vectors = tuple(vectors)
+        if json_body is not None:
+            child.json_body = json_body
+        return child
+    
+    def close(self):
+        self.transport.close()
+        # Общие ресурсы освобождает только исходный контекст
+        if self._parent is None:
+            self.analysis_pool.shutdown()
+            self.payload_stats.save()
 
 class Scanner:
-    def __init__(self, target_url):
+    def __init__(self, target_url, context=None, injection=True, quiet=False, on_finding=None, **options):
         self.target_url = target_url
         self.scan_results = {
             'target': target_url,
             'timestamp': datetime.now().isoformat(),
-            'vulnerabilities': [],
-            'warnings': [],
+            'vulnerabilities': FindingSet(),
+            'warnings': FindingSet(),
             'info': []
         }
+        self.quiet = quiet
+        # Вызывается для каждой новой находки: on_finding(category, finding)
+        self.on_finding = on_finding
+        
+        # Без переданного контекста сканер создает и закрывает собственный
+        self._owns_context = context is None
+        self.context = context or ScanContext(**options)
+        self.transport = self.context.transport
+        self.analysis_pool = self.context.analysis_pool
+        self.payload_stats = self.context.payload_stats
+        
+        # Общий бюджет HTTP запросов на цель: поиск параметров, пробы и перепроверки
+        self.budget = RequestBudget(
+            self.context.max_requests, self.context.time_budget, cancel_token=self.context.cancel_token
+        )
+        
+        probe_options = {
+            'transport': self.transport,
+            'analysis_pool': self.analysis_pool,
+            'budget': self.budget,
+            'payload_stats': self.payload_stats,
+            'vectors': self.context.vectors,
+            'json_body': self.context.json_body
+        }
+        if self.context.probes_per_parameter is not None:
+            probe_options['probes_per_parameter'] = self.context.probes_per_parameter
+        
+        self.injection = injection
         
         # Инициализация модулей
-        self.modules = [
-            HeaderScanner(target_url),
-            AdvancedSQLScanner(target_url),
-            AdvancedXSSScanner(target_url)
-        ]
+        self.modules = [HeaderScanner(target_url, transport=self.transport)]
+        # Инъекционные модули можно отключить (цели-дубликаты при кластеризации)
+        if injection:
+            self.modules += [
+                AdvancedSQLScanner(target_url, corpus=self.context.corpora['sqli'], **probe_options),
+                AdvancedXSSScanner(target_url, corpus=self.context.corpora['xss'], **probe_options)
+            ]
         
         # Сканируем доступность модулей
         self.scan_results['info'].append(f"Инициализировано модулей: {len(self.modules)}")
     
+    def log(self, message=""):
+        if not self.quiet:
+            print(message)
+    
+    def discover_parameters(self):
+        """Поиск скрытых параметров цели и передача их инъекционным модулям"""
+        discovery = ParameterDiscovery(
+            self.transport, self.context.param_wordlist, analysis_pool=self.analysis_pool,
+            budget=self.budget
+        )
+        try:
+            found = discovery.discover(self.target_url)
+        except Exception as e:
+            self.scan_results['info'].append(f"Поиск скрытых параметров не выполнен: {str(e)}")
+            return {}
+        
+        self.log(f"🔎 Скрытые параметры: {', '.join(found) or 'не найдены'} "
+                 f"({discovery.requests_sent} запросов на {len(self.context.param_wordlist)} имен)")
+        if found:
+            self.scan_results['info'].append(f"Найдены скрытые параметры: {', '.join(found)}")
+        for module in self.modules:
+            if hasattr(module, 'extra_parameters'):
+                module.extra_parameters.update(found)
+        return found
+    
     def run_scan(self):
         """Запуск всех модулей сканирования"""
-        print(f"\n🔍 Начинаем сканирование: {self.target_url}")
-        print("=" * 60)
+        self.log(f"\n🔍 Начинаем сканирование: {self.target_url}")
+        self.log("=" * 60)
+        
+        # Вход выполняется один раз до запуска модулей; ошибка входа прерывает сканирование
+        if self.transport.auth is not None:
+            self.transport.auth.ensure_logged_in(self.transport)
+            self.log("🔑 Авторизация выполнена")
         
+        discovered = not (self.injection and self.context.param_wordlist)
+        cancel_token = self.context.cancel_token
         for module in self.modules:
+            if cancel_token.cancelled:
+                break
+            # Скрытые параметры ищутся перед первым инъекционным модулем
+            if not discovered and hasattr(module, 'extra_parameters'):
+                self.discover_parameters()
+                discovered = True
             try:
-                print(f"\n📊 Модуль: {module.name}")
-                print(f"   Описание: {module.description}")
+                self.log(f"\n📊 Модуль: {module.name}")
+                self.log(f"   Описание: {module.description}")
                 
                 # Запускаем сканирование модуля
                 module_results = module.scan()
                 
                 # Объединяем результаты
-                if 'vulnerabilities' in module_results:
-                    self.scan_results['vulnerabilities'].extend(module_results['vulnerabilities'])
-                
-                if 'warnings' in module_results:
-                    self.scan_results['warnings'].extend(module_results['warnings'])
+                # Находки приводятся к Finding и дедуплицируются по отпечатку
+                for category in ('vulnerabilities', 'warnings'):
+                    for item in module_results.get(category, []):
+                        finding = as_finding(item, self.target_url, module.name)
+                        if self.scan_results[category].add(finding) and self.on_finding:
+                            self.on_finding(category, finding)
                 
                 if 'info' in module_results:
                     self.scan_results['info'].extend(module_results['info'])
                 
-                print(f"   ✅ Завершено")
+                self.log(f"   ✅ Завершено")
                 
+            except ScanCancelled:
+                break
             except Exception as e:
                 error_msg = f"Ошибка в модуле {module.name}: {str(e)}"
-                self.scan_results['warnings'].append(error_msg)
-                print(f"   ❌ Ошибка: {str(e)[:50]}...")
+                self.scan_results['warnings'].add(Finding.warning(error_msg, module.name, self.target_url))
+                self.log(f"   ❌ Ошибка: {str(e)[:50]}...")
         
-        print("\n" + "=" * 60)
-        print(f"📊 Сканирование завершено!")
-        print(f"   Найдено уязвимостей: {len(self.scan_results['vulnerabilities'])}")
-        print(f"   Предупреждений: {len(self.scan_results['warnings'])}")
-        print("=" * 60)
+        # Стабильный порядок находок (severity, отпечаток) для сравнения запусков
+        self.scan_results['vulnerabilities'].sort()
+        self.scan_results['warnings'].sort()
+        
+        if cancel_token.cancelled or self.budget.deadline_reached:
+            self.scan_results['incomplete'] = cancel_token.reason or "достигнут лимит времени сканирования"
+        
+        self.log("\n" + "=" * 60)
+        if 'incomplete' in self.scan_results:
+            self.log(f"⏹️  Сканирование остановлено: {self.scan_results['incomplete']}")
+        else:
+            self.log(f"📊 Сканирование завершено!")
+        self.log(f"   Найдено уязвимостей: {len(self.scan_results['vulnerabilities'])}")
+        self.log(f"   Предупреждений: {len(self.scan_results['warnings'])}")
+        self.log(f"   Запросов из бюджета цели: {self.budget.used_requests} за {self.budget.elapsed():.1f} с")
+        self.log(f"   HTTP запросов: {self.transport.requests_sent}")
+        self.log(f"   {network_summary(self.transport)}")
+        if self.transport.auth is not None:
+            self.log(f"   Входов в приложение: {self.transport.auth.logins}")
+        self.log("=" * 60)
         
         return self.scan_results
     
+    def close(self):
+        """Освобождение ресурсов сканера и сохранение статистики payload"""
+        if self._owns_context:
+            self.context.close()
+    
     def generate_report(self, format='console', output_file=None):
         """Генерация отчета в указанном формате"""
-        if format == 'json':
-            reporter = Reporter(self.scan_results)
-            filename = output_file or 'scan_report.json'
-            reporter.generate_json_report(filename)
-            return f"JSON отчет сохранен в: {filename}"
+        return generate_report(self.scan_results, format, output_file)
+
+class BatchScanner:
+    """
+    Сканирование списка целей. Страницы, построенные по одному шаблону
+    (например /item?id=1..10000), группируются по отпечатку структуры
+    базового ответа; инъекционные модули запускаются только для
+    представителя кластера и небольшой выборки его членов.
+    """
+    
+    def __init__(self, targets, context, workers=4, clustering=True, cluster_sample=2,
+                 max_distance=3, seed=0, quiet=False, monitor=None):
+        self.targets = list(dict.fromkeys(targets))
+        self.context = context
+        self.workers = max(1, workers)
+        self.clustering = clustering
+        self.cluster_sample = cluster_sample
+        self.max_distance = max_distance
+        self.seed = seed
+        self.quiet = quiet
+        # Наблюдатель нагрузочного теста: monitor.track(target, phase) вокруг обработки каждой цели
+        self.monitor = monitor
+        self.scan_results = {
+            'target': self.targets[0] if len(self.targets) == 1 else f"{len(self.targets)} целей",
+            'timestamp': datetime.now().isoformat(),
+            'vulnerabilities': FindingSet(),
+            'warnings': FindingSet(),
+            'info': []
+        }
+        self.clusters = {}
+    
+    def log(self, message=""):
+        if not self.quiet:
+            print(message)
+    
+    def _track(self, target, phase):
+        return self.monitor.track(target, phase) if self.monitor else contextlib.nullcontext()
+    
+    def _fingerprint(self, target):
+        """Отпечаток структуры базового ответа цели; None, если страница недоступна"""
+        try:
+            with self._track(target, 'fingerprint'):
+                response = self.context.transport.baseline(target, max_bytes=FINGERPRINT_BYTES)
+        except Exception:
+            return None
+        # Сравниваются только страницы одного хоста с одинаковым кодом ответа
+        # и одинаковым набором параметров запроса
+        parsed = urlparse(target)
+        group = (parsed.netloc, response.status_code, tuple(sorted(parse_qs(parsed.query))))
+        future = self.context.analysis_pool.submit(structure_simhash, response.content, response.encoding)
+        return group, future
+    
+    def plan(self):
+        """Список (цель, запускать ли инъекционные модули)"""
+        if not self.clustering:
+            self.clusters = {target: [target] for target in self.targets}
+            return [(target, True) for target in self.targets]
+        
+        # Базовые ответы загружаются параллельно и кэшируются транспортом.
+        # Для отпечатка читаются первые FINGERPRINT_BYTES тела: страница,
+        # целиком поместившаяся в префикс, не запрашивается модулями повторно.
+        # Большие страницы инъекционные модули скачивают заново полностью,
+        # проверкам заголовков (члены кластера без инъекций) хватает префикса
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            fingerprints = list(executor.map(self._fingerprint, self.targets))
+        
+        clusterer = PageClusterer(self.max_distance)
+        for target, fingerprint in zip(self.targets, fingerprints):
+            if fingerprint is None:
+                clusterer.clusters[target] = [target]
+                continue
+            group, future = fingerprint
+            clusterer.add(target, group, future.result())
+        self.clusters = clusterer.clusters
+        
+        # Детерминированная выборка членов кластера для проверки однородности
+        rng = random.Random(self.seed)
+        full_scan = set()
+        for representative, members in self.clusters.items():
+            others = members[1:]
+            full_scan.add(representative)
+            full_scan.update(rng.sample(others, min(self.cluster_sample, len(others))))
+        
+        return [(target, target in full_scan) for target in self.targets]
+    
+    def _scan_target(self, target, injection):
+        # Цели, до которых не дошла очередь к моменту отмены, не сканируются
+        self.context.cancel_token.check()
+        with self._track(target, 'scan' if injection else 'headers'):
+            scanner = Scanner(target, context=self.context, injection=injection, quiet=True)
+            results = scanner.run_scan()
+        return scanner, results
+    
+    def run_scan(self):
+        """Запуск сканирования всех целей"""
+        self.log(f"\n🔍 Пакетное сканирование: {len(self.targets)} целей")
+        self.log("=" * 60)
+        
+        plan = self.plan()
+        full_scans = sum(1 for _, injection in plan if injection)
+        self.log(f"🧩 Кластеров: {len(self.clusters)}, полное сканирование: {full_scans}, "
+              f"только заголовки: {len(plan) - full_scans}")
+        
+        for representative, members in self.clusters.items():
+            if len(members) > 1:
+                self.scan_results['info'].append(
+                    f"Кластер {representative}: {len(members)} похожих страниц"
+                )
+        
+        budget_requests = 0
+        not_scanned = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(self._scan_target, target, injection): target
+                for target, injection in plan
+            }
+            for future in as_completed(futures):
+                target = futures[future]
+                try:
+                    scanner, results = future.result()
+                except ScanCancelled:
+                    not_scanned += 1
+                    continue
+                except Exception as e:
+                    self.scan_results['warnings'].add(
+                        Finding.warning(f"Ошибка сканирования цели: {str(e)}", 'BatchScanner', target)
+                    )
+                    self.log(f"   ❌ {target}: {str(e)[:50]}...")
+                    continue
+                budget_requests += scanner.budget.used_requests
+                if 'incomplete' in results:
+                    self.scan_results['incomplete'] = results['incomplete']
+                self.scan_results['vulnerabilities'].extend(results['vulnerabilities'])
+                self.scan_results['warnings'].extend(results['warnings'])
+                self.log(f"   ✅ {target}: уязвимостей {len(results['vulnerabilities'])}")
+        
+        self.scan_results['vulnerabilities'].sort()
+        self.scan_results['warnings'].sort()
+        
+        cancel_token = self.context.cancel_token
+        if cancel_token.cancelled:
+            self.scan_results['incomplete'] = cancel_token.reason
+        if not_scanned:
+            self.scan_results['info'].append(f"Не просканировано целей: {not_scanned}")
         
+        self.log("\n" + "=" * 60)
+        if 'incomplete' in self.scan_results:
+            self.log(f"⏹️  Пакетное сканирование остановлено: {self.scan_results['incomplete']}")
+            self.log(f"   Не просканировано целей: {not_scanned}")
+        else:
+            self.log(f"📊 Пакетное сканирование завершено!")
+        self.log(f"   Найдено уязвимостей: {len(self.scan_results['vulnerabilities'])}")
+        self.log(f"   Предупреждений: {len(self.scan_results['warnings'])}")
+        self.log(f"   Запросов из бюджетов целей: {budget_requests}")
+        self.log(f"   HTTP запросов: {self.context.transport.requests_sent}")
+        self.log(f"   {network_summary(self.context.transport)}")
+        self.log("=" * 60)
+        
+        return self.scan_results
+    
+    def generate_report(self, format='console', output_file=None):
+        return generate_report(self.scan_results, format, output_file)
+
+def network_summary(transport):
+    """Строка с эффективностью кэшей DNS и TLS сессий и объемом полученных данных"""
+    stats = transport.network_cache.stats()
+    line = (f"Соединений: {stats['connections']}, DNS кэш: {stats['dns_hit_rate']:.0%} "
+            f"попаданий ({stats['dns_hits']}/{stats['dns_hits'] + stats['dns_misses']})")
+    handshakes = stats['tls_resumed'] + stats['tls_full_handshakes']
+    if handshakes:
+        line += f", TLS сессии возобновлены: {stats['tls_resumed']}/{handshakes}"
+    line += f", получено: {transport.bytes_received / 1024:.1f} КБ"
+    return line
+
+def generate_report(scan_results, format='console', output_file=None):
+    """Генерация отчета в указанном формате"""
+    if format == 'console':
+        return Reporter(scan_results).generate_console_report()
+    
+    filename = output_file or REPORT_FILENAMES[format]
+    try:
+        if format == 'json':
+            Reporter(scan_results).generate_json_report(filename)
+        elif format == 'jsonl':
+            Reporter(scan_results).generate_jsonl_report(filename)
+        elif format == 'markdown':
+            Reporter(scan_results).generate_markdown_report(filename)
         elif format == 'html':
+            HTMLReporter(scan_results).generate_report(filename)
+        elif format == 'sarif':
+            SARIFReporter(scan_results).generate_report(filename)
+    except Exception as e:
+        return f"Ошибка генерации {format.upper()} отчета: {str(e)}"
+    
+    return f"{format.upper()} отчет сохранен в: {filename}"
+
+def parse_vectors(value):
+    """Список точек внедрения из аргумента --vectors"""
+    vectors = tuple(vector.strip() for vector in value.split(',') if vector.strip())
+    unknown = [vector for vector in vectors if vector not in VECTORS]
+    if unknown or not vectors:
+        raise argparse.ArgumentTypeError(f"допустимые значения: {', '.join(VECTORS)}")
+    return vectors
+
+def diff_main(argv):
+    """Команда diff: сравнение двух наборов результатов сканирования"""
+    parser = argparse.ArgumentParser(
+        prog='scanner.py diff',
+        description='Сравнение результатов двух сканирований: новые, исправленные и неизменные находки'
+    )
+    parser.add_argument('old', help='Предыдущие результаты (JSON отчет или .jsonl)')
+    parser.add_argument('new', help='Текущие результаты (JSON отчет или .jsonl)')
+    parser.add_argument('--output', '-o', help='Сохранить полный результат сравнения в JSON файл')
+    parser.add_argument('--limit', type=int, default=20, help='Сколько находок каждой группы выводить (по умолчанию: 20)')
+    args = parser.parse_args(argv)
+    
+    result = diff_files(args.old, args.new)
+    
+    print("\n" + "=" * 60)
+    print(f"📊 Сравнение: {args.old} -> {args.new}")
+    print("=" * 60)
+    for side, path in (('old', args.old), ('new', args.new)):
+        if result['incomplete'][side]:
+            print(f"⚠️  Сканирование {path} неполное: {result['incomplete'][side]}")
+    if result['incomplete']['new']:
+        print("   Отсутствующие в нем находки не считаются исправленными")
+    labels = [('new', '🆕 Новые'), ('resolved', '✅ Исправленные'), ('unchanged', '⏸️  Неизменные'),
+              ('unverified', '❔ Не проверены')]
+    for key, label in labels:
+        print(f"\n{label}: {len(result[key])}")
+        if key in ('unchanged', 'unverified'):
+            continue
+        for finding in result[key][:args.limit]:
+            print(f"  [{finding.get('severity', '-')}] {finding.get('type', 'UNKNOWN')}: "
+                  f"{finding.get('description', '')} ({finding['fingerprint']})")
+        if len(result[key]) > args.limit:
+            print(f"  ... и еще {len(result[key]) - args.limit}")
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                'summary': {key: len(result[key]) for key, _ in labels},
+                **result
+            }, f, ensure_ascii=False)
+        print(f"\nРезультат сравнения сохранен в: {args.output}")
+    
+    # Ненулевой код возврата, если появились новые находки (удобно для CI)
+    return 1 if result['new'] else 0
+
+def validate_job(request):
+    """Проверка задания, присланного в API демона"""
+    target = request.get('target')
+    if not isinstance(target, str) or urlparse(target).scheme not in ('http', 'https'):
+        raise ValueError("target должен быть http(s) URL")
+
+    job = {'target': target, 'priority': request.get('priority', 0)}
+    for key, kind in (('max_duration', (int, float)), ('max_requests', int), ('time_budget', (int, float)),
+                      ('probes_per_parameter', int), ('injection', bool), ('bearer_token', str),
+                      ('json_body', (dict, list)), ('vectors', list)):
+        value = request.get(key)
+        if value is None:
+            continue
+        if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+            raise ValueError(f"Неверное значение {key}")
+        job[key] = value
+    if any(vector not in VECTORS for vector in job.get('vectors', [])):
+        raise ValueError(f"vectors: допустимые значения {', '.join(VECTORS)}")
+    return job
+
+def daemon_main(argv):
+    """Команда daemon: долгоживущий сканер с локальным HTTP/JSON API заданий"""
+    parser = argparse.ArgumentParser(
+        prog='scanner.py daemon',
+        description='Сканер в режиме демона: задания принимаются через локальный HTTP/JSON API, '
+                    'пулы соединений, кэши и корпуса payload остаются прогретыми между заданиями'
+    )
+    parser.add_argument(
+        '--listen',
+        default='127.0.0.1:8765',
+        metavar='HOST:PORT',
+        help='Адрес HTTP API, только loopback: API без аутентификации '
+             '(по умолчанию: 127.0.0.1:8765, "none" - только Unix сокет)'
+    )
+    parser.add_argument('--socket', metavar='PATH', help='Дополнительно слушать Unix сокет')
+    parser.add_argument('--workers', type=int, default=2, help='Число одновременных заданий (по умолчанию: 2)')
+    parser.add_argument(
+        '--analysis-workers',
+        type=int,
+        default=0,
+        help='Число процессов для анализа ответов (по умолчанию: 0 - анализ в основном процессе)'
+    )
+    parser.add_argument('--max-duration', type=float, help='Лимит времени задания по умолчанию, в секундах')
+    parser.add_argument('--max-requests', type=int, help='Максимальное число HTTP запросов проб на цель по умолчанию')
+    parser.add_argument('--time-budget', type=float, help='Бюджет времени на пробы для цели по умолчанию, в секундах')
+    parser.add_argument('--payload-stats', help='JSON файл статистики попаданий payload (сохраняется после каждого задания)')
+    parser.add_argument('--payload-dir', help='Каталог с корпусами payload sqli.jsonl и xss.jsonl')
+    parser.add_argument('--dns-ttl', type=float, default=DEFAULT_DNS_TTL, help='Время жизни записей кэша DNS в секундах')
+    parser.add_argument('--param-wordlist', metavar='FILE', help='Список имен для поиска скрытых параметров')
+    parser.add_argument('--no-param-discovery', action='store_true', help='Не искать скрытые параметры перебором имен')
+    args = parser.parse_args(argv)
+
+    if args.listen == 'none' and not args.socket:
+        parser.error("Нужен --listen или --socket")
+
+    # Прогретые ресурсы, общие для всех заданий
+    context = ScanContext(
+        analysis_workers=args.analysis_workers,
+        max_requests=args.max_requests,
+        time_budget=args.time_budget,
+        payload_stats_path=args.payload_stats,
+        payload_dir=args.payload_dir,
+        param_discovery=not args.no_param_discovery,
+        param_wordlist=args.param_wordlist,
+        dns_ttl=args.dns_ttl
+    )
+
+    def run_job(job):
+        request = job.request
+        job_context = context.fork(
+            max_duration=request.get('max_duration', args.max_duration),
+            auth=build_authenticator(request['target'], bearer_token=request.get('bearer_token')),
+            max_requests=request.get('max_requests'),
+            time_budget=request.get('time_budget'),
+            probes_per_parameter=request.get('probes_per_parameter'),
+            vectors=request.get('vectors'),
+            json_body=request.get('json_body')
+        )
+        job.on_cancel(lambda: job_context.cancel_token.cancel("задание отменено"))
+
+        def emit(category, finding):
+            job.emit({'event': 'finding', 'category': category, 'finding': finding.to_dict()})
+
+        scanner = Scanner(request['target'], context=job_context, injection=request.get('injection', True),
+                          quiet=True, on_finding=emit)
+        try:
+            results = scanner.run_scan()
+        finally:
+            job_context.close()
+            # Статистика payload переживает аварийную остановку демона;
+            # ошибка записи не делает успешное задание неудачным
             try:
-                reporter = HTMLReporter(self.scan_results)
-                filename = output_file or 'scan_report.html'
-                reporter.generate_report(filename)
-                return f"HTML отчет сохранен в: {filename}"
+                context.payload_stats.save()
             except Exception as e:
-                return f"Ошибка генерации HTML отчета: {str(e)}"
-        
-        else:  # console
-            reporter = Reporter(self.scan_results)
-            return reporter.generate_console_report()
+                job.emit({'event': 'warning', 'message': f"Статистика payload не сохранена: {str(e)}"})
+
+        return {
+            'vulnerabilities': len(results['vulnerabilities']),
+            'warnings': len(results['warnings']),
+            'incomplete': results.get('incomplete'),
+            'info': results['info'],
+            'requests': job_context.transport.requests_sent,
+            'budget_requests': scanner.budget.used_requests,
+        }
+
+    def runner_stats():
+        return {'network': context.transport.network_cache.stats()}
+
+    daemon = ScanDaemon(run_job, workers=args.workers, validate=validate_job, stats=runner_stats)
+    daemon.start()
+    try:
+        if args.listen != 'none':
+            host, _, port = args.listen.rpartition(':')
+            daemon.serve_tcp(host.strip('[]') or '127.0.0.1', int(port))
+            print(f"🛰️  API сканера: http://{host or '127.0.0.1'}:{port}/jobs")
+        if args.socket:
+            daemon.serve_unix(args.socket)
+            print(f"🛰️  API сканера: unix:{args.socket}")
+    except (OSError, ValueError) as e:
+        daemon.stop()
+        context.close()
+        print(f"❌ Не удалось запустить API: {str(e)}")
+        return 1
+
+    stopped = threading.Event()
+
+    def handle_stop(signum, frame):
+        stopped.set()
+
+    signal.signal(signal.SIGINT, handle_stop)
+    signal.signal(signal.SIGTERM, handle_stop)
+
+    # wait с таймаутом, чтобы сигнал обрабатывался сразу
+    while not stopped.wait(1):
+        pass
+
+    print("\n⏹️  Останавливаем демон: текущие задания отменяются")
+    daemon.stop(timeout=30)
+    context.close()
+    return 0
+
+def sast_main(argv):
+    """Команда sast: статический анализ Bandit и Semgrep с кэшем результатов по файлам"""
+    parser = argparse.ArgumentParser(
+        prog='scanner.py sast',
+        description='Статический анализ кода: Bandit и Semgrep параллельно, '
+                    'неизмененные файлы берутся из кэша'
+    )
+    parser.add_argument('paths', nargs='*', default=['src'], help='Файлы и каталоги для анализа (по умолчанию: src)')
+    parser.add_argument('--root', default='.', help='Корень проекта, относительно которого заданы пути')
+    parser.add_argument(
+        '--changed-since',
+        metavar='REF',
+        help='Анализировать только файлы, измененные с коммита REF (включая незакоммиченные)'
+    )
+    parser.add_argument(
+        '--tool',
+        action='append',
+        choices=['bandit', 'semgrep'],
+        help='Инструмент анализа (можно указать несколько раз; по умолчанию: оба)'
+    )
+    parser.add_argument(
+        '--semgrep-config',
+        action='append',
+        metavar='CONFIG',
+        help=f'Правила Semgrep (файл или p/...; по умолчанию: {", ".join(DEFAULT_SEMGREP_CONFIGS)})'
+    )
+    parser.add_argument('--bandit-config', metavar='FILE', help='Файл конфигурации Bandit')
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help=f'Файл кэша результатов (по умолчанию: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--no-cache', action='store_true', help='Проанализировать все файлы заново')
+    parser.add_argument('--jobs', '-j', type=int, help='Число параллельных процессов анализа (по умолчанию: число CPU)')
+    parser.add_argument(
+        '--baseline',
+        metavar='REPORT',
+        help='Предыдущий отчет (JSON или .jsonl): находки из него не считаются новыми'
+    )
+    parser.add_argument(
+        '--format', '-f',
+        choices=['console', 'json', 'jsonl', 'markdown', 'html', 'sarif'],
+        default='console',
+        help='Формат вывода отчета (по умолчанию: console)'
+    )
+    parser.add_argument('--output', '-o', help='Имя файла для сохранения отчета')
+    args = parser.parse_args(argv)
+
+    root = os.path.abspath(args.root)
+    files = python_files(root, args.paths)
+    if args.changed_since:
+        try:
+            changed = set(git_changed_files(root, args.changed_since))
+        except SASTError as e:
+            parser.error(str(e))
+        files = [path for path in files if path in changed]
+    baseline = None
+    if args.baseline:
+        try:
+            baseline = list(iter_findings(args.baseline))
+        except (OSError, ValueError) as e:
+            parser.error(f"не удалось прочитать {args.baseline}: {e}")
+
+    tools = []
+    for name in args.tool or ['bandit', 'semgrep']:
+        if name == 'bandit':
+            tools.append(BanditTool(args.bandit_config))
+        else:
+            tools.append(SemgrepTool(args.semgrep_config))
+
+    # Кэш перестраивается с нуля, но сохраняется для следующих запусков
+    cache = SASTCache(args.cache) if args.no_cache else SASTCache.load(args.cache)
+    runner = SASTRunner(root, tools, cache, jobs=args.jobs)
+
+    print(f"🔍 Статический анализ: {len(files)} файлов, инструменты: {', '.join(t.name for t in tools)}")
+    started = datetime.now()
+    findings = runner.run(files) if files else []
+
+    scan_results = {
+        'target': root,
+        'timestamp': started.isoformat(),
+        'vulnerabilities': FindingSet(findings),
+        'warnings': FindingSet(Finding.warning(error, 'SAST', root) for error in runner.errors),
+        'info': [f"Проанализировано файлов: {len(files)}"] + runner.info
+    }
+    scan_results['vulnerabilities'].sort()
+
+    for line in runner.info:
+        print(f"   {line}")
+    for error in runner.errors:
+        print(f"   ⚠️  {error}")
+    print(f"   Кэш: {cache.hits} попаданий, {cache.misses} промахов, "
+          f"{(datetime.now() - started).total_seconds():.1f} с")
+    print(generate_report(scan_results, args.format, args.output))
+
+    # Ненулевой код возврата при новых находках или сбое инструмента (удобно для CI)
+    new = scan_results['vulnerabilities']
+    if baseline is not None:
+        new = diff_findings(baseline, ((finding.fingerprint, finding.to_dict()) for finding in new))['new']
+    return 1 if new or runner.errors else 0
+
+def loadtest_main(argv):
+    """Команда loadtest: пакетное сканирование синтетических медленных целей с метриками"""
+    parser = argparse.ArgumentParser(
+        prog='scanner.py loadtest',
+        description='Нагрузочный тест сканера: локальные серверы-заглушки с заданным распределением '
+                    'задержек, ошибками, зависаниями и недоступными хостами; пропускная способность, '
+                    'хвосты задержек, память, файловые дескрипторы и зависшие потоки'
+    )
+    parser.add_argument('--targets', type=int, default=10000, help='Число целей (по умолчанию: 10000)')
+    parser.add_argument('--hosts', type=int, default=100, help='Число серверов-заглушек (по умолчанию: 100)')
+    parser.add_argument(
+        '--latency',
+        choices=LATENCY_DISTRIBUTIONS,
+        default='lognormal',
+        help='Распределение задержки ответа (по умолчанию: lognormal)'
+    )
+    parser.add_argument('--latency-median', type=float, default=0.02, help='Медиана задержки в секундах (по умолчанию: 0.02)')
+    parser.add_argument(
+        '--latency-shape',
+        type=float,
+        default=1.0,
+        help='Хвост распределения: sigma для lognormal, alpha для pareto (по умолчанию: 1.0)'
+    )
+    parser.add_argument('--error-rate', type=float, default=0.01, help='Доля ответов 503 (по умолчанию: 0.01)')
+    parser.add_argument(
+        '--stall-rate',
+        type=float,
+        default=0.001,
+        help='Доля запросов, на которые сервер не отвечает до --stall-seconds (по умолчанию: 0.001)'
+    )
+    parser.add_argument('--stall-seconds', type=float, default=60.0, help='Длительность зависания (по умолчанию: 60)')
+    parser.add_argument(
+        '--blackhole-rate',
+        type=float,
+        default=0.01,
+        help='Доля хостов, не принимающих соединения (по умолчанию: 0.01)'
+    )
+    parser.add_argument('--seed', type=int, default=0, help='Зерно генератора задержек и ошибок')
+    parser.add_argument('--workers', type=int, default=4, help='Число целей, сканируемых одновременно (по умолчанию: 4)')
+    parser.add_argument('--no-clustering', action='store_true', help='Полностью сканировать каждую цель')
+    parser.add_argument('--no-param-discovery', action='store_true', help='Не искать скрытые параметры')
+    parser.add_argument('--analysis-workers', type=int, default=0, help='Число процессов для анализа ответов')
+    parser.add_argument('--max-requests', type=int, help='Максимальное число HTTP запросов проб на цель')
+    parser.add_argument(
+        '--max-duration',
+        type=float,
+        default=1800,
+        help='Лимит времени теста в секундах (по умолчанию: 1800)'
+    )
+    parser.add_argument('--sample-interval', type=float, default=1.0, help='Период замеров памяти и дескрипторов, с')
+    parser.add_argument(
+        '--stuck-after',
+        type=float,
+        default=30.0,
+        help='Поток считается зависшим, если столько секунд не завершил ни одного запроса (по умолчанию: 30)'
+    )
+    parser.add_argument('--output', '-o', default='loadtest_baseline.json', help='Файл результатов (по умолчанию: loadtest_baseline.json)')
+    parser.add_argument('--compare', metavar='FILE', help='Сравнить с сохраненной базовой линией; при регрессии код возврата 1')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Допустимое ухудшение метрики, доля (по умолчанию: 0.25)')
+    args = parser.parse_args(argv)
+
+    try:
+        profile = TargetProfile(
+            LatencyModel(args.latency, args.latency_median, args.latency_shape),
+            error_rate=args.error_rate,
+            stall_rate=args.stall_rate,
+            stall_seconds=args.stall_seconds,
+            blackhole_rate=args.blackhole_rate
+        )
+        previous = load_baseline(args.compare) if args.compare else None
+    except (ValueError, OSError) as e:
+        parser.error(str(e))
+
+    config = {
+        'targets': args.targets,
+        'hosts': args.hosts,
+        'profile': profile.to_dict(),
+        'seed': args.seed,
+        'workers': args.workers,
+        'clustering': not args.no_clustering,
+        'param_discovery': not args.no_param_discovery,
+        'analysis_workers': args.analysis_workers,
+        'max_requests': args.max_requests,
+        'max_duration': args.max_duration,
+    }
+
+    print(f"🧪 Нагрузочный тест: {args.targets} целей на {args.hosts} хостах, задержка {args.latency} "
+          f"(медиана {args.latency_median * 1000:.0f} мс), ошибки {args.error_rate:.1%}, "
+          f"зависания {args.stall_rate:.1%}, недоступные хосты {args.blackhole_rate:.1%}")
+
+    with SyntheticTargets(args.hosts, profile, args.seed) as servers:
+        context = ScanContext(
+            analysis_workers=args.analysis_workers,
+            max_requests=args.max_requests,
+            param_discovery=not args.no_param_discovery,
+            max_duration=args.max_duration
+        )
+        monitor = LoadMonitor(args.sample_interval, args.stuck_after)
+        monitor.attach(context.transport)
+        scanner = BatchScanner(
+            servers.targets(args.targets),
+            context,
+            workers=args.workers,
+            clustering=not args.no_clustering,
+            seed=args.seed,
+            quiet=True,
+            monitor=monitor
+        )
+
+        signal.signal(signal.SIGINT, lambda signum, frame: context.cancel_token.cancel("прервано пользователем"))
+        monitor.start()
+        try:
+            scanner.run_scan()
+        finally:
+            monitor.stop()
+            context.close()
+    config['server'] = servers.server_stats
+
+    baseline = build_baseline(config, monitor.report(args.targets))
+    if 'incomplete' in scanner.scan_results:
+        baseline['incomplete'] = scanner.scan_results['incomplete']
+    save_baseline(args.output, baseline)
+
+    targets = baseline['targets']
+    latency = baseline['request_latency']
+    scan_latency = baseline['target_latency'].get('scan', {})
+    memory = baseline['memory']
+    print("\n" + "=" * 60)
+    if 'incomplete' in baseline:
+        print(f"⏹️  Тест остановлен: {baseline['incomplete']}")
+    print(f"📊 Целей: {targets['done']}/{targets['total']} за {baseline['duration']:.1f} с "
+          f"({baseline['throughput']['targets_per_second']} целей/с, "
+          f"{baseline['throughput']['requests_per_second']} запросов/с), ошибок: {targets['failed']}")
+    if latency['count']:
+        errors = ', '.join(f"{name}: {count}" for name, count in latency['errors'].items()) or 'нет'
+        print(f"   Задержка запросов: p50 {latency['p50']} с, p99 {latency['p99']} с, "
+              f"p99.9 {latency['p999']} с, max {latency['max']} с; ошибки: {errors}")
+    if scan_latency.get('count'):
+        print(f"   Полное сканирование цели: p50 {scan_latency['p50']} с, p99 {scan_latency['p99']} с, "
+              f"max {scan_latency['max']} с")
+    print(f"   Память: {memory['rss_start_kb'] / 1024:.1f} -> {memory['rss_end_kb'] / 1024:.1f} МБ "
+          f"(пик {memory['rss_peak_kb'] / 1024:.1f} МБ)")
+    if baseline['fds']:
+        print(f"   Файловые дескрипторы: {baseline['fds']['start']} -> {baseline['fds']['end']} "
+              f"(пик {baseline['fds']['peak']}), потоков: {baseline['threads']['peak']}")
+    for stuck in baseline['stuck']['details']:
+        print(f"   ⚠️  Зависший поток: {stuck['target']} ({stuck['phase']}), "
+              f"без ответа {stuck['idle']} с: {stuck['stack'][-1] if stuck['stack'] else '?'}")
+    print(f"💾 Результаты сохранены в: {args.output}")
+
+    if previous is None:
+        return 0
+    rows = compare_baselines(previous, baseline, args.tolerance)
+    print(f"\n📈 Сравнение с {args.compare}:")
+    for row in rows:
+        change = f"{row['change']:+.1%}" if row['change'] is not None else "-"
+        mark = "❌" if row['regression'] else "✅"
+        print(f"   {mark} {row['metric']}: {row['baseline']} -> {row['current']} ({change})")
+    return 1 if any(row['regression'] for row in rows) else 0
+
+# Дополнительные команды: scanner.py <команда> [аргументы]
+COMMANDS = {
+    'diff': diff_main,
+    'daemon': daemon_main,
+    'sast': sast_main,
+    'loadtest': loadtest_main,
+}
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        sys.exit(COMMANDS[sys.argv[1]](sys.argv[2:]))
+    
     parser = argparse.ArgumentParser(
         description='Автоматизированный сканер уязвимостей веб-приложений',
-        epilog='Дипломный проект 2024 - Информационная безопасность'
+        epilog='Команды: scanner.py diff OLD NEW - сравнение результатов, '
+               'scanner.py daemon - сканер с HTTP API заданий, '
+               'scanner.py sast - статический анализ кода, '
+               'scanner.py loadtest - нагрузочный тест на синтетических целях. '
+               'Дипломный проект 2024 - Информационная безопасность'
     )
     
-    parser.add_argument(
+    targets_group = parser.add_mutually_exclusive_group(required=True)
+    targets_group.add_argument(
         '--target', '-t',
-        required=True,
         help='URL целевого веб-приложения (пример: http://example.com)'
     )
+    targets_group.add_argument(
+        '--targets-file',
+        metavar='FILE',
+        help='Файл со списком URL (по одному в строке) для пакетного сканирования'
+    )
     
     parser.add_argument(
         '--format', '-f',
-        choices=['console', 'json', 'html'],
+        choices=['console', 'json', 'jsonl', 'markdown', 'html', 'sarif'],
         default='console',
         help='Формат вывода отчета (по умолчанию: console)'
     )
@@ -126,10 +974,193 @@ def main():
         help='Подробный вывод'
     )
     
+    parser.add_argument(
+        '--analysis-workers',
+        type=int,
+        default=0,
+        help='Число процессов для анализа ответов (по умолчанию: 0 - анализ в основном процессе)'
+    )
+    
+    parser.add_argument(
+        '--max-requests',
+        type=int,
+        help='Максимальное число HTTP запросов на цель: поиск параметров, пробы (пакет - один запрос) и перепроверки'
+    )
+    
+    parser.add_argument(
+        '--time-budget',
+        type=float,
+        help='Бюджет времени на пробы для цели, в секундах'
+    )
+    
+    parser.add_argument(
+        '--max-duration',
+        type=float,
+        help='Общий лимит времени сканирования в секундах; по истечении сохраняются найденные результаты'
+    )
+    
+    parser.add_argument(
+        '--probes-per-param',
+        type=int,
+        help='Максимальное число проб на один параметр (по умолчанию: SQLi - 4, XSS - 3)'
+    )
+    
+    parser.add_argument(
+        '--payload-stats',
+        help='JSON файл статистики попаданий payload (порядок payload адаптируется между сканированиями)'
+    )
+    
+    parser.add_argument(
+        '--payload-dir',
+        help='Каталог с корпусами payload sqli.jsonl и xss.jsonl (по умолчанию: src/payloads)'
+    )
+    
+    parser.add_argument(
+        '--dns-ttl',
+        type=float,
+        default=DEFAULT_DNS_TTL,
+        help=f'Время жизни записей кэша DNS в секундах (по умолчанию: {DEFAULT_DNS_TTL:.0f}, 0 - без кэша)'
+    )
+    
+    parser.add_argument(
+        '--param-wordlist',
+        metavar='FILE',
+        help='Список имен для поиска скрытых параметров (по умолчанию: src/payloads/params.txt)'
+    )
+    
+    parser.add_argument(
+        '--no-param-discovery',
+        action='store_true',
+        help='Не искать скрытые параметры перебором имен'
+    )
+    
+    parser.add_argument(
+        '--vectors',
+        type=parse_vectors,
+        default=VECTORS,
+        help=f'Точки внедрения payload через запятую (по умолчанию: {",".join(VECTORS)})'
+    )
+    
+    parser.add_argument(
+        '--json-body',
+        metavar='JSON',
+        help='Тело JSON запроса к цели (строка или @файл): цель проверяется POST запросом, '
+             'payload подставляются в значения полей'
+    )
+    
+    batch_group = parser.add_argument_group('пакетное сканирование')
+    batch_group.add_argument(
+        '--workers',
+        type=int,
+        default=4,
+        help='Число целей, сканируемых одновременно (по умолчанию: 4)'
+    )
+    batch_group.add_argument(
+        '--cluster-sample',
+        type=int,
+        default=2,
+        help='Сколько членов каждого кластера похожих страниц сканировать полностью '
+             'помимо представителя (по умолчанию: 2)'
+    )
+    batch_group.add_argument(
+        '--no-clustering',
+        action='store_true',
+        help='Полностью сканировать каждую цель, не группируя похожие страницы'
+    )
+    
+    auth_group = parser.add_argument_group('авторизация')
+    auth_group.add_argument('--auth-form', metavar='URL', help='URL формы входа (абсолютный или относительно цели)')
+    auth_group.add_argument('--auth-user', help='Имя пользователя для формы входа')
+    auth_group.add_argument('--auth-password', help='Пароль для формы входа')
+    auth_group.add_argument(
+        '--auth-field',
+        action='append',
+        metavar='NAME=VALUE',
+        help='Дополнительное поле формы входа (можно указать несколько раз, например Login=Login)'
+    )
+    auth_group.add_argument('--bearer-token', help='Bearer токен для заголовка Authorization')
+    auth_group.add_argument('--cookie-jar', metavar='FILE', help='Файл cookies в формате Netscape/Mozilla')
+    auth_group.add_argument(
+        '--logout-marker',
+        help='Текст на странице, означающий потерю сессии (например "Login :: Damn Vulnerable")'
+    )
+    
     args = parser.parse_args()
     
-    # Создаем и запускаем сканер
-    scanner = Scanner(args.target)
+    if args.targets_file:
+        with open(args.targets_file, encoding='utf-8') as f:
+            targets = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+        if not targets:
+            parser.error(f"В файле {args.targets_file} нет целей")
+    else:
+        targets = [args.target]
+    
+    json_body = None
+    if args.json_body:
+        try:
+            if args.json_body.startswith('@'):
+                with open(args.json_body[1:], encoding='utf-8') as f:
+                    json_body = json.load(f)
+            else:
+                json_body = json.loads(args.json_body)
+        except (OSError, ValueError) as e:
+            parser.error(f"--json-body: {str(e)}")
+    
+    try:
+        auth = build_authenticator(
+            targets[0],
+            login_url=args.auth_form,
+            username=args.auth_user,
+            password=args.auth_password,
+            fields=args.auth_field,
+            bearer_token=args.bearer_token,
+            cookie_jar=args.cookie_jar,
+            logout_marker=args.logout_marker
+        )
+    except AuthenticationError as e:
+        parser.error(str(e))
+    
+    context = ScanContext(
+        analysis_workers=args.analysis_workers,
+        max_requests=args.max_requests,
+        time_budget=args.time_budget,
+        probes_per_parameter=args.probes_per_param,
+        payload_stats_path=args.payload_stats,
+        payload_dir=args.payload_dir,
+        auth=auth,
+        param_discovery=not args.no_param_discovery,
+        param_wordlist=args.param_wordlist,
+        max_duration=args.max_duration,
+        dns_ttl=args.dns_ttl,
+        vectors=args.vectors,
+        json_body=json_body
+    )
+    
+    # Создаем сканер: одна цель или пакет целей с кластеризацией
+    if args.targets_file:
+        scanner = BatchScanner(
+            targets,
+            context,
+            workers=args.workers,
+            clustering=not args.no_clustering,
+            cluster_sample=args.cluster_sample
+        )
+    else:
+        scanner = Scanner(args.target, context=context)
+    
+    # Первый Ctrl+C останавливает модули, и отчет строится по найденному;
+    # второй прерывает сканирование сразу
+    interrupted = False
+    
+    def handle_interrupt(signum, frame):
+        nonlocal interrupted
+        if interrupted:
+            raise KeyboardInterrupt
+        interrupted = True
+        print("\n\n⏹️  Останавливаем сканирование, найденное будет сохранено (Ctrl+C еще раз - выход)")
+        context.cancel_token.cancel("прервано пользователем")
+    
+    signal.signal(signal.SIGINT, handle_interrupt)
     
     try:
         # Запускаем сканирование
@@ -146,6 +1177,9 @@ def main():
         
     except KeyboardInterrupt:
         print("\n\n⏹️  Сканирование прервано пользователем")
+        # Отчет по уже объединенным результатам модулей
+        scanner.scan_results['incomplete'] = "прервано пользователем"
+        print(scanner.generate_report(format=args.format, output_file=args.output))
         sys.exit(1)
     except Exception as e:
         print(f"\n❌ Критическая ошибка: {str(e)}")
@@ -153,6 +1187,11 @@ def main():
             import traceback
             traceback.print_exc()
         sys.exit(1)
+    finally:
+        context.close()
+    
+    if interrupted:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
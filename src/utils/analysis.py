@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Analysis stage: CPU-heavy response analysis separated from network fetching.
+Дипломный проект - Автоматизированный веб-сканер
+"""
+
+import re
+import signal
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+
+# Паттерны SQL ошибок для разных СУБД
+ERROR_PATTERNS = {
+    'mysql': [
+        r"SQL syntax.*MySQL",
+        r"Warning.*mysql_.*",
+        r"MySQLSyntaxErrorException",
+        r"valid MySQL result",
+    ],
+    'postgresql': [
+        r"PostgreSQL.*ERROR",
+        r"Warning.*\Wpg_.*",
+        r"valid PostgreSQL result",
+    ],
+    'mssql': [
+        r"Microsoft OLE DB Provider for ODBC Drivers",
+        r"ODBC SQL Server Driver",
+        r"SQLServer JDBC Driver",
+    ],
+    'oracle': [
+        r"ORA-[0-9][0-9][0-9][0-9]",
+        r"Oracle error",
+        r"Oracle.*Driver",
+    ]
+}
+
+SQL_KEYWORDS = ['mysql', 'sql', 'database', 'query', 'syntax']
+
+# Регулярные выражения компилируются один раз на процесс (в т.ч. в воркерах пула)
+_COMPILED_ERROR_PATTERNS = {
+    db_type: [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+    for db_type, patterns in ERROR_PATTERNS.items()
+}
+_FORM_RE = re.compile(r'<form[^>]*>.*?</form>', re.IGNORECASE | re.DOTALL)
+_INPUT_RE = re.compile(r'<input[^>]*>', re.IGNORECASE)
+_TEXTAREA_RE = re.compile(r'<textarea[^>]*>', re.IGNORECASE)
+_SCRIPT_RE = re.compile(r'<script[^>]*>', re.IGNORECASE)
+_ACTION_RE = re.compile(r'action=["\']?([^"\'\s>]+)', re.IGNORECASE)
+_METHOD_RE = re.compile(r'method=["\']?([^"\'\s>]+)', re.IGNORECASE)
+_NAME_RE = re.compile(r'name=["\']?([^"\'\s>]+)', re.IGNORECASE)
+_TYPE_RE = re.compile(r'type=["\']?([^"\'\s>]+)', re.IGNORECASE)
+
+
+def decode_body(body: bytes, encoding: Optional[str]) -> str:
+    """
+    Decode a raw response body with its declared charset, utf-8 otherwise.
+
+    Unlike ``Response.text`` there is no charset guessing, so a baseline
+    and a probe response decoded here always have comparable lengths.
+    """
+    try:
+        return body.decode(encoding or 'utf-8', errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+
+def detect_db_from_errors(response_text: str,
+                          error_patterns: Optional[Dict[str, List[str]]] = None) -> Optional[str]:
+    """Определение СУБД по ошибкам в ответе"""
+    if error_patterns is None or error_patterns is ERROR_PATTERNS:
+        compiled = _COMPILED_ERROR_PATTERNS
+    else:
+        compiled = {
+            db_type: [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+            for db_type, patterns in error_patterns.items()
+        }
+
+    for db_type, patterns in compiled.items():
+        for pattern in patterns:
+            if pattern.search(response_text):
+                return db_type
+    return None
+
+
+def analyze_sqli_response(body: bytes, encoding: Optional[str], baseline_length: int) -> Dict[str, Any]:
+    """Analyze one SQLi probe response; runs inside an analysis worker."""
+    text = decode_body(body, encoding)
+    lowered = text.lower()
+
+    length_diff = abs(len(text) - baseline_length)
+    length_ratio = length_diff / baseline_length if baseline_length > 0 else 0
+
+    return {
+        'db': detect_db_from_errors(text),
+        'length_ratio': length_ratio,
+        'keyword_matches': sum(1 for keyword in SQL_KEYWORDS if keyword in lowered),
+        'sql_error_text': 'error' in lowered and 'sql' in lowered,
+    }
+
+
+def extract_page_structure(body: bytes, encoding: Optional[str]) -> Dict[str, Any]:
+    """
+    Extract forms, input fields and script tags from an HTML page.
+
+    Attributes that are missing in the markup are returned as None so that
+    each module can apply its own defaults.
+    """
+    html = decode_body(body, encoding)
+
+    forms = []
+    for form in _FORM_RE.findall(html):
+        action_match = _ACTION_RE.search(form)
+        method_match = _METHOD_RE.search(form)
+
+        inputs = []
+        for inp in _INPUT_RE.findall(form):
+            name_match = _NAME_RE.search(inp)
+            type_match = _TYPE_RE.search(inp)
+            inputs.append((
+                name_match.group(1) if name_match else None,
+                type_match.group(1) if type_match else None,
+            ))
+
+        forms.append({
+            'action': action_match.group(1) if action_match else None,
+            'method': method_match.group(1) if method_match else None,
+            'inputs': inputs,
+            'textareas': len(_TEXTAREA_RE.findall(form)),
+        })
+
+    return {
+        'forms': forms,
+        'script_tags': len(_SCRIPT_RE.findall(html)),
+    }
+
+
+def reflection_context(body: bytes, encoding: Optional[str], value: str) -> Optional[str]:
+    """
+    Context in which a parameter value is reflected in the page:
+    'javascript', 'attribute', 'html' or None when it is not reflected.
+    """
+    if not value:
+        return None
+    html = decode_body(body, encoding)
+    position = html.find(value)
+    if position < 0:
+        return None
+
+    before = html[:position].lower()
+    if before.rfind('<script') > before.rfind('</script'):
+        return 'javascript'
+    if before.rfind('<') > before.rfind('>'):
+        return 'attribute'
+    return 'html'
+
+
+def _ignore_interrupts():
+    # Ctrl+C обрабатывает основной процесс: он останавливает сканирование
+    # и дожидается анализа уже полученных ответов
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class AnalysisPool:
+    """
+    Process pool for response analysis.
+
+    With ``workers=0`` analysis runs inline in the calling thread, which keeps
+    single-target CLI runs free of process start-up cost. With ``workers > 0``
+    response bodies are pickled to worker processes so that regex matching
+    does not hold the GIL of the process issuing requests.
+    """
+
+    def __init__(self, workers: int = 0):
+        self.workers = max(0, workers)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_ignore_interrupts
+        ) if self.workers else None
+
+    def submit(self, func: Callable, *args) -> Future:
+        """Schedule ``func(*args)`` and return a future with its result."""
+        if self._executor is not None:
+            return self._executor.submit(func, *args)
+
+        future = Future()
+        try:
+            future.set_result(func(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self):
+        """Stop worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Authentication for scans of applications behind a login (DVWA, WebGoat).
+Дипломный проект - Автоматизированный веб-сканер
+"""
+
+import re
+import threading
+from http.cookiejar import MozillaCookieJar
+from typing import Dict, Optional
+from urllib.parse import urljoin, urlparse
+
+import requests
+
+
+_HIDDEN_INPUT_RE = re.compile(r'<input[^>]*type=["\']?hidden["\']?[^>]*>', re.IGNORECASE)
+_NAME_RE = re.compile(r'name=["\']?([^"\'\s>]+)', re.IGNORECASE)
+_VALUE_RE = re.compile(r'value=["\']?([^"\'>]*)', re.IGNORECASE)
+_PASSWORD_INPUT_RE = re.compile(r'<input[^>]*type=["\']?password', re.IGNORECASE)
+
+
+class AuthenticationError(Exception):
+    """Login failed; scanning without a session would only probe the login page."""
+
+
+class Authenticator:
+    """
+    Base class for login strategies.
+
+    ``generation`` grows with every successful login. A request remembers the
+    generation it was sent with; when several in-flight requests detect an
+    expired session, only the first one whose generation is still current
+    logs in again and the rest simply retry with the new session.
+
+    Strategies get the scan's transport: login requests go through
+    ``transport.send`` and so stop on cancellation and at the deadline.
+    """
+
+    def __init__(self, logout_marker: Optional[str] = None, login_url: Optional[str] = None):
+        self.logout_marker = logout_marker
+        self.login_url = login_url
+        self.generation = 0
+        self.logins = 0
+        # Имена cookies, которые держат сессию входа: их значения не подменяются пробами
+        self.session_cookies = set()
+        self._lock = threading.Lock()
+
+    def login(self, transport):
+        raise NotImplementedError
+
+    def ensure_logged_in(self, transport) -> int:
+        """Log in on first use; returns the current session generation."""
+        if self.generation == 0:
+            self.relogin(transport, 0)
+        return self.generation
+
+    def relogin(self, transport, seen_generation: Optional[int]):
+        with self._lock:
+            if seen_generation is not None and self.generation != seen_generation:
+                return  # Сессию уже обновил другой запрос
+            self.login(transport)
+            if transport is not None:
+                self.session_cookies = {cookie.name for cookie in transport.session.cookies}
+            self.generation += 1
+            self.logins += 1
+
+    def is_expired(self, response: requests.Response) -> bool:
+        """Session loss shows up as a logout marker or a redirect to the login page."""
+        if response.status_code == 401:
+            return True
+        if self.login_url and response.history:
+            login_path = urlparse(self.login_url).path
+            if login_path and urlparse(response.url).path == login_path:
+                return True
+        if self.logout_marker and response.request.method != 'HEAD':
+            return self.logout_marker in response.text
+        return False
+
+
+class FormAuth(Authenticator):
+    """Login through an HTML form; hidden fields (CSRF tokens) are sent back."""
+
+    def __init__(self, login_url: str, username: str, password: str,
+                 username_field: str = 'username', password_field: str = 'password',
+                 extra_fields: Optional[Dict[str, str]] = None, logout_marker: Optional[str] = None):
+        super().__init__(logout_marker=logout_marker, login_url=login_url)
+        self.username = username
+        self.password = password
+        self.username_field = username_field
+        self.password_field = password_field
+        self.extra_fields = extra_fields or {}
+
+    def login(self, transport):
+        page = transport.send('GET', self.login_url, timeout=10)
+
+        form = {}
+        for hidden in _HIDDEN_INPUT_RE.findall(page.text):
+            name_match = _NAME_RE.search(hidden)
+            value_match = _VALUE_RE.search(hidden)
+            if name_match:
+                form[name_match.group(1)] = value_match.group(1) if value_match else ''
+        form.update(self.extra_fields)
+        form[self.username_field] = self.username
+        form[self.password_field] = self.password
+
+        response = transport.send('POST', self.login_url, data=form, timeout=10)
+        if _PASSWORD_INPUT_RE.search(response.text) and urlparse(response.url).path == urlparse(self.login_url).path:
+            raise AuthenticationError(f"Не удалось войти через форму {self.login_url}")
+
+
+class BearerAuth(Authenticator):
+    """Static bearer token sent with every request."""
+
+    def __init__(self, token: str, logout_marker: Optional[str] = None):
+        super().__init__(logout_marker=logout_marker)
+        self.token = token
+
+    def login(self, transport):
+        if self.generation > 0:
+            raise AuthenticationError("Bearer токен отклонен сервером")
+        transport.session.headers['Authorization'] = f"Bearer {self.token}"
+
+
+class CookieJarAuth(Authenticator):
+    """Cookies from a Netscape/Mozilla cookie jar file (e.g. exported from a browser)."""
+
+    def __init__(self, path: str, logout_marker: Optional[str] = None, login_url: Optional[str] = None):
+        super().__init__(logout_marker=logout_marker, login_url=login_url)
+        self.path = path
+
+    def login(self, transport):
+        if self.generation > 0:
+            raise AuthenticationError(f"Сессия из {self.path} истекла")
+        jar = MozillaCookieJar(self.path)
+        jar.load(ignore_discard=True, ignore_expires=True)
+        for cookie in jar:
+            transport.session.cookies.set_cookie(cookie)
+
+
+def parse_fields(pairs) -> Dict[str, str]:
+    """['Login=Login', 'a=b'] -> {'Login': 'Login', 'a': 'b'}"""
+    fields = {}
+    for pair in pairs or []:
+        name, _, value = pair.partition('=')
+        fields[name] = value
+    return fields
+
+
+def build_authenticator(target_url: str, login_url: Optional[str] = None, username: Optional[str] = None,
+                        password: Optional[str] = None, fields=None, bearer_token: Optional[str] = None,
+                        cookie_jar: Optional[str] = None,
+                        logout_marker: Optional[str] = None) -> Optional[Authenticator]:
+    """Authenticator from CLI options, or None for anonymous scans."""
+    if bearer_token:
+        return BearerAuth(bearer_token, logout_marker=logout_marker)
+    if cookie_jar:
+        return CookieJarAuth(cookie_jar, logout_marker=logout_marker,
+                             login_url=urljoin(target_url, login_url) if login_url else None)
+    if login_url:
+        if username is None or password is None:
+            raise AuthenticationError("Для входа через форму нужны --auth-user и --auth-password")
+        return FormAuth(urljoin(target_url, login_url), username, password,
+                        extra_fields=parse_fields(fields), logout_marker=logout_marker)
+    return None
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Cooperative cancellation and the global scan deadline.
+Дипломный проект - Автоматизированный веб-сканер
+"""
+
+import threading
+import time
+from typing import Callable, List, Optional
+
+
+# Минимальный таймаут запроса у самого дедлайна: запрос с нулевым
+# таймаутом requests отправит без ограничения времени
+MIN_REQUEST_TIMEOUT = 0.1
+
+
+class ScanCancelled(Exception):
+    """Raised by the transport once the scan is cancelled or past its deadline."""
+
+
+class CancelToken:
+    """
+    Shared by the transport, budgets and modules of one scan.
+
+    The token is cancelled explicitly (Ctrl+C) or implicitly when the
+    ``max_duration`` deadline passes. Work checks it between requests and
+    request timeouts are capped to the time left, so a request in flight
+    never outlives the deadline.
+    """
+
+    def __init__(self, max_duration: Optional[float] = None):
+        self.started = time.monotonic()
+        self.deadline = self.started + max_duration if max_duration else None
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def cancel(self, reason: str = "отменено"):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    @property
+    def cancelled(self) -> bool:
+        if not self._event.is_set() and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("достигнут лимит времени сканирования")
+        return self._event.is_set()
+
+    def on_cancel(self, callback: Callable[[], None]):
+        """Run ``callback`` once when the token is cancelled."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self):
+        if self.cancelled:
+            raise ScanCancelled(self.reason)
+
+    def timeout(self, timeout):
+        """Request timeout capped to the time left before the deadline."""
+        remaining = self.remaining()
+        if remaining is None or not isinstance(timeout, (int, float)):
+            return timeout
+        return max(MIN_REQUEST_TIMEOUT, min(timeout, remaining))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Response similarity clustering: near-identical pages share one full scan.
+Дипломный проект - Автоматизированный веб-сканер
+"""
+
+import hashlib
+import re
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+FINGERPRINT_BITS = 64
+
+# Число полос для поиска кандидатов: при расстоянии Хэмминга < BANDS хотя бы
+# одна 16-битная полоса совпадает полностью (принцип Дирихле)
+BANDS = 4
+BAND_BITS = FINGERPRINT_BITS // BANDS
+
+SHINGLE_SIZE = 4
+
+# Шаблон страницы виден в ее начале: для отпечатка читается только префикс тела
+FINGERPRINT_BYTES = 64 * 1024
+
+_TAG_RE = re.compile(r'<([a-zA-Z][a-zA-Z0-9-]*)([^>]*)>')
+_ATTR_NAME_RE = re.compile(r'([a-zA-Z_:][-a-zA-Z0-9_:.]*)\s*=')
+
+
+def structure_tokens(html: str) -> List[str]:
+    """DOM structure as a sequence of tags with their attribute names (values ignored)."""
+    tokens = []
+    for tag, attributes in _TAG_RE.findall(html):
+        names = sorted(set(name.lower() for name in _ATTR_NAME_RE.findall(attributes)))
+        tokens.append(tag.lower() + ('[' + ','.join(names) + ']' if names else ''))
+    return tokens
+
+
+def _hash64(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def structure_simhash(body: bytes, encoding: Optional[str]) -> int:
+    """64-bit simhash over shingles of the page's tag structure; runs in the analysis pool."""
+    html = body.decode(encoding or 'utf-8', errors='replace')
+    tokens = structure_tokens(html) or html.split()
+    if len(tokens) > SHINGLE_SIZE:
+        shingles = [' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)]
+    else:
+        shingles = [' '.join(tokens)]
+
+    weights = [0] * FINGERPRINT_BITS
+    for shingle in shingles:
+        value = _hash64(shingle)
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+class PageClusterer:
+    """
+    Groups pages whose structure fingerprints differ in at most
+    ``max_distance`` bits. Pages are compared only inside the same group
+    (e.g. host and status code), and only against cluster representatives
+    that share at least one fingerprint band, so clustering stays close to
+    linear in the number of pages.
+    """
+
+    def __init__(self, max_distance: int = 3):
+        if max_distance >= BANDS:
+            raise ValueError(f"max_distance должен быть меньше {BANDS}")
+        self.max_distance = max_distance
+        self.clusters: Dict[Hashable, List[Hashable]] = {}
+        self._fingerprints: Dict[Hashable, int] = {}
+        self._bands: Dict[Tuple, List[Hashable]] = {}
+
+    def add(self, key: Hashable, group: Hashable, fingerprint: int) -> Hashable:
+        """Place a page into a cluster; returns the key of the cluster representative."""
+        candidates = []
+        for band in range(BANDS):
+            band_value = fingerprint >> (band * BAND_BITS) & ((1 << BAND_BITS) - 1)
+            candidates.append((group, band, band_value))
+
+        for band_key in candidates:
+            for representative in self._bands.get(band_key, ()):
+                if hamming_distance(fingerprint, self._fingerprints[representative]) <= self.max_distance:
+                    self.clusters[representative].append(key)
+                    return representative
+
+        self._fingerprints[key] = fingerprint
+        self.clusters[key] = [key]
+        for band_key in candidates:
+            self._bands.setdefault(band_key, []).append(key)
+        return key
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Scan daemon: prioritized job queue with a local HTTP/JSON API.
+Дипломный проект - Автоматизированный веб-сканер
+
+Endpoints (the same on TCP and on a Unix socket):
+
+    POST   /jobs              {"target": "http://...", "priority": 0, ...} -> 202 job
+    GET    /jobs              list of jobs without events
+    GET    /jobs/<id>         job with all events so far
+    GET    /jobs/<id>/events  events as NDJSON, streamed until the job ends
+    DELETE /jobs/<id>         cancel a queued or running job
+    GET    /health            queue, worker and runner statistics
+
+The API has no authentication: TCP listens on loopback addresses only and
+the Unix socket is accessible to its owner only.
+"""
+
+import heapq
+import ipaddress
+import itertools
+import json
+import os
+import re
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+FINISHED_STATUSES = ('done', 'failed', 'cancelled')
+
+# Сколько завершенных заданий хранить для чтения результатов
+MAX_FINISHED_JOBS = 1000
+
+# Максимальный размер тела запроса к API
+MAX_REQUEST_BODY = 64 * 1024
+
+_JOB_PATH_RE = re.compile(r'^/jobs/([0-9a-f]{32})(/events)?/?$')
+
+# Поля заданий с учетными данными не возвращаются через API
+_SECRET_FIELD_RE = re.compile(r'token|password|passwd|secret|cookie|authorization|api_?key', re.IGNORECASE)
+
+
+def redact(value: Any) -> Any:
+    """Copy of a job request with the values of credential fields masked, at any depth."""
+    if isinstance(value, dict):
+        return {
+            key: '***' if isinstance(key, str) and _SECRET_FIELD_RE.search(key) else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    return value
+
+
+def is_loopback(host: str) -> bool:
+    """Whether every address ``host`` resolves to is a loopback address."""
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, None)}
+    except socket.gaierror:
+        return False
+    return bool(addresses) and all(
+        ipaddress.ip_address(address.split('%')[0]).is_loopback for address in addresses
+    )
+
+
+class Job:
+    """One submitted scan; events are appended while it runs and can be followed."""
+
+    def __init__(self, request: Dict[str, Any], priority: int = 0):
+        self.id = uuid.uuid4().hex
+        self.request = request
+        self.priority = priority
+        self.status = 'queued'
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.summary: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.events: List[Dict[str, Any]] = []
+        self.cancel_requested = False
+        self._cancel_callbacks: List[Callable[[], None]] = []
+        self._condition = threading.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def emit(self, event: Dict[str, Any]):
+        with self._condition:
+            self.events.append(event)
+            self._condition.notify_all()
+
+    def on_cancel(self, callback: Callable[[], None]):
+        """Register how the runner stops this job; runs at once if already cancelled."""
+        with self._condition:
+            if not self.cancel_requested:
+                self._cancel_callbacks.append(callback)
+                return
+        callback()
+
+    def cancel(self) -> bool:
+        with self._condition:
+            if self.done or self.cancel_requested:
+                return False
+            self.cancel_requested = True
+            if self.status == 'queued':
+                self._finish('cancelled')
+                return True
+            callbacks = list(self._cancel_callbacks)
+        for callback in callbacks:
+            callback()
+        return True
+
+    def start(self) -> bool:
+        with self._condition:
+            if self.status != 'queued':
+                return False
+            self.status = 'running'
+            self.started = time.time()
+            return True
+
+    def finish(self, status: str, summary: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        with self._condition:
+            self.summary = summary
+            self.error = error
+            self._finish(status)
+
+    def _finish(self, status: str):
+        self.status = status
+        self.finished = time.time()
+        self._condition.notify_all()
+
+    def follow(self, poll: float = 1.0) -> Iterator[Dict[str, Any]]:
+        """All events from the start, then new ones as they arrive, until the job ends."""
+        index = 0
+        while True:
+            with self._condition:
+                while index == len(self.events) and not self.done:
+                    self._condition.wait(poll)
+                pending = self.events[index:]
+                index = len(self.events)
+                finished = self.done and index == len(self.events)
+            yield from pending
+            if finished:
+                yield {'event': 'end', **self.to_dict(events=False)}
+                return
+
+    def to_dict(self, events: bool = True) -> Dict[str, Any]:
+        data = {
+            'id': self.id,
+            'status': self.status,
+            'priority': self.priority,
+            'request': redact(self.request),
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'summary': self.summary,
+            'error': self.error,
+        }
+        if events:
+            data['events'] = list(self.events)
+        return data
+
+
+class JobQueue:
+    """Blocking priority queue: higher priority first, FIFO within a priority."""
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def put(self, job: Job):
+        with self._condition:
+            heapq.heappush(self._heap, (-job.priority, next(self._counter), job))
+            self._condition.notify()
+
+    def get(self) -> Optional[Job]:
+        """Next job to run; ``None`` once the queue is closed."""
+        with self._condition:
+            while True:
+                while self._heap:
+                    job = heapq.heappop(self._heap)[2]
+                    if job.start():  # Отмененные в очереди задания пропускаются
+                        return job
+                if self._closed:
+                    return None
+                self._condition.wait()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def __len__(self):
+        with self._condition:
+            return sum(1 for _, _, job in self._heap if job.status == 'queued')
+
+
+class ScanDaemon:
+    """
+    Runs submitted jobs on a fixed set of worker threads.
+
+    ``runner(job)`` performs the scan, reports findings through
+    ``job.emit`` and returns a summary dict. ``validate(request)`` may
+    normalize the submitted JSON and raises ``ValueError`` to reject it.
+    """
+
+    def __init__(self, runner: Callable[[Job], Dict[str, Any]], workers: int = 2,
+                 validate: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+                 stats: Optional[Callable[[], Dict[str, Any]]] = None,
+                 max_finished_jobs: int = MAX_FINISHED_JOBS):
+        self.runner = runner
+        self.validate = validate
+        self.runner_stats = stats
+        self.workers = max(1, workers)
+        self.max_finished_jobs = max_finished_jobs
+        self.queue = JobQueue()
+        self.completed = 0
+        self.started = time.time()
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._servers: List[socketserver.BaseServer] = []
+
+    def start(self):
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"scan-worker-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, request: Dict[str, Any]) -> Job:
+        if not isinstance(request, dict):
+            raise ValueError("Тело запроса должно быть JSON объектом")
+        if self.validate is not None:
+            request = self.validate(request)
+        priority = request.pop('priority', 0)
+        if not isinstance(priority, int):
+            raise ValueError("priority должен быть целым числом")
+
+        job = Job(request, priority)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+        self.queue.put(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.get(job_id)
+        return job is not None and job.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        jobs = self.jobs()
+        data = {
+            'uptime': round(time.time() - self.started, 1),
+            'workers': self.workers,
+            'queued': len(self.queue),
+            'running': sum(1 for job in jobs if job.status == 'running'),
+            'completed': self.completed,
+        }
+        if self.runner_stats is not None:
+            data.update(self.runner_stats())
+        return data
+
+    def _evict(self):
+        # Старые завершенные задания удаляются, чтобы память не росла без предела
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
+
+    def _work(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            try:
+                summary = self.runner(job)
+                job.finish('cancelled' if job.cancel_requested else 'done', summary)
+            except Exception as e:
+                job.finish('failed', error=str(e))
+            with self._lock:
+                self.completed += 1
+
+    def serve_tcp(self, host: str = '127.0.0.1', port: int = 8765) -> socketserver.BaseServer:
+        if not is_loopback(host):
+            raise ValueError(f"API без аутентификации слушает только loopback адреса, а не {host}")
+        server = DaemonHTTPServer((host, port), DaemonRequestHandler)
+        return self._serve(server)
+
+    def serve_unix(self, path: str) -> socketserver.BaseServer:
+        if os.path.exists(path):
+            os.unlink(path)
+        server = DaemonUnixServer(path, DaemonRequestHandler)
+        return self._serve(server)
+
+    def _serve(self, server: socketserver.BaseServer) -> socketserver.BaseServer:
+        server.daemon = self
+        thread = threading.Thread(target=server.serve_forever, name="scan-api", daemon=True)
+        thread.start()
+        self._servers.append(server)
+        return server
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop accepting requests, cancel queued and running jobs and wait for workers."""
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+            if isinstance(server, DaemonUnixServer) and os.path.exists(server.server_address):
+                os.unlink(server.server_address)
+        for job in self.jobs():
+            job.cancel()
+        self.queue.close()
+        for thread in self._threads:
+            thread.join(timeout)
+
+
+class DaemonHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    daemon: ScanDaemon
+
+
+class DaemonUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        # Сокет создается в закрытом каталоге (0700), получает права 0600 и
+        # только потом переносится на место: umask общий для всех потоков процесса
+        path = self.server_address
+        directory = tempfile.mkdtemp(prefix='.scan-api-', dir=os.path.dirname(os.path.abspath(path)))
+        private_path = os.path.join(directory, 'api.sock')
+        try:
+            self.socket.bind(private_path)
+            os.chmod(private_path, 0o600)
+            os.rename(private_path, path)
+        except OSError:
+            if os.path.exists(private_path):
+                os.unlink(private_path)
+            raise
+        finally:
+            os.rmdir(directory)
+        self.server_address = path
+    daemon: ScanDaemon
+
+
+class DaemonRequestHandler(BaseHTTPRequestHandler):
+    """JSON API over HTTP/1.1; event streams use chunked transfer encoding."""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'ScannerDaemon/1.0'
+
+    def log_message(self, format, *args):
+        pass  # Запросы к API не засоряют вывод сканирований
+
+    def address_string(self):
+        # У Unix сокета нет адреса клиента
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    @property
+    def daemon(self) -> ScanDaemon:
+        return self.server.daemon
+
+    def do_GET(self):
+        if self.path == '/health':
+            return self._send_json(200, self.daemon.stats())
+        if self.path.rstrip('/') == '/jobs':
+            return self._send_json(200, [job.to_dict(events=False) for job in self.daemon.jobs()])
+
+        job, stream = self._job_from_path()
+        if job is None:
+            return self._send_json(404, {'error': 'not found'})
+        if stream:
+            return self._stream_events(job)
+        return self._send_json(200, job.to_dict())
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/jobs':
+            return self._send_json(404, {'error': 'not found'})
+        length = self.headers.get('Content-Length') or '0'
+        if not (length.isascii() and length.isdigit()):
+            # Без длины тело нельзя отделить от следующего запроса
+            return self._send_json(400, {'error': 'invalid Content-Length'}, headers={'Connection': 'close'})
+        length = int(length)
+        if length > MAX_REQUEST_BODY:
+            # Непрочитанное тело иначе было бы принято за следующий запрос
+            return self._send_json(413, {'error': 'request body too large'}, headers={'Connection': 'close'})
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+            job = self.daemon.submit(request)
+        except (ValueError, TypeError) as e:
+            return self._send_json(400, {'error': str(e)})
+        self._send_json(202, job.to_dict(events=False), headers={'Location': f'/jobs/{job.id}'})
+
+    def do_DELETE(self):
+        job, stream = self._job_from_path()
+        if job is None or stream:
+            return self._send_json(404, {'error': 'not found'})
+        cancelled = job.cancel()
+        self._send_json(202 if cancelled else 409, job.to_dict(events=False))
+
+    def _job_from_path(self):
+        match = _JOB_PATH_RE.match(self.path)
+        if not match:
+            return None, False
+        return self.daemon.get(match.group(1)), bool(match.group(2))
+
+    def _send_json(self, status: int, data: Any, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_events(self, job: Job):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for event in job.follow():
+                line = json.dumps(event, ensure_ascii=False).encode('utf-8') + b'\n'
+                self.wfile.write(f"{len(line):x}\r\n".encode('ascii') + line + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Diffing of scan results between runs.
+Дипломный проект - Автоматизированный веб-сканер
+"""
+
+import json
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from utils.findings import fingerprint_vulnerability, fingerprint_warning
+
+
+def iter_findings(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yield ``(fingerprint, finding)`` pairs from a saved result set.
+
+    Accepts a scan report (JSON object with ``vulnerabilities`` and
+    ``warnings``) or a ``.jsonl`` file with one finding per line. Findings
+    without a stored fingerprint get one computed from their fields.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith('.jsonl'):
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    if _is_status_row(row):
+                        continue
+                    yield _fingerprint_row(row.get('target', ''), row), row
+            return
+        report = json.load(f)
+
+    target = report.get('target', '')
+    for vulnerability in report.get('vulnerabilities', []):
+        yield _fingerprint_row(target, vulnerability), vulnerability
+    for warning in report.get('warnings', []):
+        if isinstance(warning, str):
+            yield fingerprint_warning(target, warning), {'type': 'WARNING', 'description': warning}
+        else:
+            yield _fingerprint_row(target, warning), warning
+
+
+def incomplete_reason(path: str) -> Optional[str]:
+    """Why the run saved in ``path`` stopped early, or None for a complete run."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith('.jsonl'):
+            # Отметка о неполном сканировании - первая строка файла
+            line = f.readline()
+            row = json.loads(line) if line.strip() else {}
+            return row.get('incomplete') if _is_status_row(row) else None
+        return json.load(f).get('incomplete')
+
+
+def _is_status_row(row: Dict[str, Any]) -> bool:
+    return 'incomplete' in row and 'type' not in row
+
+
+def _fingerprint_row(target: str, row: Dict[str, Any]) -> str:
+    return row.get('fingerprint') or fingerprint_vulnerability(target, row)
+
+
+def diff_findings(old: Iterable[Tuple[str, Dict[str, Any]]],
+                  new: Iterable[Tuple[str, Dict[str, Any]]],
+                  incomplete: bool = False) -> Dict[str, list]:
+    """
+    Split findings into new, resolved and unchanged in linear time.
+
+    The old result set is indexed by fingerprint; every new finding is one
+    dict lookup, and whatever is left in the index afterwards is resolved.
+    An ``incomplete`` new run may simply not have reached those findings:
+    they are reported as ``unverified`` instead.
+    """
+    old_index = {}
+    for fingerprint, finding in old:
+        old_index.setdefault(fingerprint, finding)
+
+    result = {'new': [], 'resolved': [], 'unchanged': [], 'unverified': []}
+    seen = set()
+    for fingerprint, finding in new:
+        if fingerprint in seen:
+            continue
+        seen.add(fingerprint)
+        finding = dict(finding, fingerprint=fingerprint)
+        if old_index.pop(fingerprint, None) is not None:
+            result['unchanged'].append(finding)
+        else:
+            result['new'].append(finding)
+
+    missing = [dict(finding, fingerprint=fingerprint) for fingerprint, finding in old_index.items()]
+    result['unverified' if incomplete else 'resolved'] = missing
+    return result
+
+
+def diff_files(old_path: str, new_path: str) -> Dict[str, Any]:
+    """Diff of two saved result sets; ``incomplete`` holds why either run stopped early."""
+    incomplete = {'old': incomplete_reason(old_path), 'new': incomplete_reason(new_path)}
+    result = diff_findings(iter_findings(old_path), iter_findings(new_path), incomplete=bool(incomplete['new']))
+    result['incomplete'] = incomplete
+    return result
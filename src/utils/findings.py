@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Finding identity: stable fingerprints and ordering of scan findings.
+Дипломный проект - Автоматизированный веб-сканер
+"""
+
+import hashlib
+import re
+import sys
+from typing import Any, Dict, Iterable, Iterator, Optional
+from urllib.parse import parse_qsl, urlparse
+
+
+SEVERITY_ORDER = ['critical', 'high', 'medium', 'low', 'info']
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+_NON_WORD_RE = re.compile(r'[^0-9a-zа-яё]+')
+
+# Класс уязвимости вместо техники в отпечатке: какая техника или контекст
+# сработали первыми, зависит от адаптивного порядка payload
+VULNERABILITY_CLASSES = {
+    'SQL_INJECTION': 'sqli',
+    'REFLECTED_XSS': 'xss',
+}
+
+
+def normalize_target(url: str) -> str:
+    """
+    Canonical form of a scanned URL: lowercase scheme and host, no default
+    port, and only the sorted names of query parameters (their values vary
+    between runs and payloads).
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').lower()
+    if parsed.port and parsed.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parsed.port}"
+    names = sorted({name for name, _ in parse_qsl(parsed.query, keep_blank_values=True)})
+    target = f"{scheme}://{host}{parsed.path or '/'}"
+    if names:
+        target += "?" + "&".join(names)
+    return target
+
+
+def normalize_payload_class(payload_class: Optional[str]) -> str:
+    """'Boolean-Based' / 'boolean based' -> 'boolean_based'."""
+    if not payload_class:
+        return 'none'
+    return _NON_WORD_RE.sub('_', payload_class.lower()).strip('_') or 'none'
+
+
+def vulnerability_class(finding_type: str, payload_class: Optional[str]) -> str:
+    """Class part of the identity: fixed per type for SQLi/XSS, the payload class otherwise."""
+    return VULNERABILITY_CLASSES.get(finding_type) or normalize_payload_class(payload_class)
+
+
+def finding_fingerprint(target: str, finding_type: str, parameter: Optional[str],
+                        payload_class: Optional[str]) -> str:
+    """Stable identity of a finding across scan runs."""
+    finding_type = (finding_type or '').upper()
+    key = "|".join([
+        normalize_target(target),
+        finding_type,
+        parameter or '',
+        vulnerability_class(finding_type, payload_class),
+    ])
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:24]
+
+
+def fingerprint_vulnerability(target: str, vulnerability: Dict[str, Any]) -> str:
+    """Fingerprint of a vulnerability dict as produced by the scanner modules."""
+    return finding_fingerprint(
+        vulnerability.get('target') or target,
+        vulnerability.get('type', 'UNKNOWN'),
+        vulnerability.get('parameter'),
+        vulnerability.get('payload_type'),
+    )
+
+
+def fingerprint_warning(target: str, warning: str) -> str:
+    """Warnings are free-form text: their normalized text is the parameter."""
+    return finding_fingerprint(target, 'WARNING', normalize_payload_class(warning), None)
+
+
+def severity_rank(severity: Optional[str]) -> int:
+    severity = (severity or 'medium').lower()
+    return SEVERITY_ORDER.index(severity) if severity in SEVERITY_ORDER else len(SEVERITY_ORDER)
+
+
+def literal_template(text: Optional[str]) -> Optional[str]:
+    """Template that formats to ``text`` as is."""
+    if text is None:
+        return None
+    return str(text).replace('{', '{{').replace('}', '}}')
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
+class Finding:
+    """
+    Compact record of a scan finding.
+
+    Repeated fields (type, severity, module, payload class) are interned, and
+    ``description``/``details`` are kept as templates that are formatted on
+    access with the finding's own fields, e.g.
+    ``'Reflected XSS в параметре {parameter}'`` or ``'Payload: {payload:.50}'``.
+    """
+
+    __slots__ = ('type', 'severity', 'module', 'target', 'parameter', 'payload_type',
+                 'payload', 'evidence', 'url', '_description', '_details', '_fingerprint')
+
+    def __init__(self, type: str, severity: str, description: str, details: Optional[str] = None,
+                 module: Optional[str] = None, target: Optional[str] = None,
+                 parameter: Optional[str] = None, payload_type: Optional[str] = None,
+                 payload: Optional[str] = None, evidence: Optional[str] = None,
+                 url: Optional[str] = None, fingerprint: Optional[str] = None):
+        self.type = sys.intern(type)
+        self.severity = sys.intern(severity.lower())
+        self.module = _intern(module)
+        self.target = target
+        self.parameter = parameter
+        self.payload_type = _intern(payload_type)
+        self.payload = payload
+        self.evidence = evidence
+        self.url = url
+        self._description = description
+        self._details = details
+        self._fingerprint = fingerprint
+
+    @classmethod
+    def warning(cls, text: str, module: Optional[str] = None, target: Optional[str] = None,
+                severity: str = 'low') -> 'Finding':
+        """Free-form warning; its normalized text identifies it."""
+        return cls('WARNING', severity, '{evidence}', module=module, target=target, evidence=text)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Finding':
+        """Finding from a saved report row or a legacy module dict."""
+        return cls(
+            data.get('type', 'UNKNOWN'), data.get('severity') or 'medium',
+            literal_template(data.get('description', '')),
+            details=literal_template(data.get('details')),
+            module=data.get('module'), target=data.get('target'),
+            parameter=data.get('parameter'), payload_type=data.get('payload_type'),
+            url=data.get('url'), fingerprint=data.get('fingerprint')
+        )
+
+    def _format(self, template: Optional[str]) -> Optional[str]:
+        if template is None:
+            return None
+        return template.format(
+            type=self.type, severity=self.severity, module=self.module, target=self.target,
+            parameter=self.parameter, payload_type=self.payload_type, payload=self.payload or '',
+            evidence=self.evidence or '', url=self.url or ''
+        )
+
+    @property
+    def description(self) -> str:
+        return self._format(self._description)
+
+    @property
+    def details(self) -> Optional[str]:
+        return self._format(self._details)
+
+    @property
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            parameter = self.parameter
+            if parameter is None and self.type == 'WARNING':
+                parameter = normalize_payload_class(self.description)
+            self._fingerprint = finding_fingerprint(self.target or '', self.type, parameter, self.payload_type)
+        return self._fingerprint
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'type': self.type,
+            'severity': self.severity,
+            'description': self.description,
+            'details': self.details,
+            'module': self.module,
+            'target': self.target,
+            'parameter': self.parameter,
+            'payload_type': self.payload_type,
+            'url': self.url,
+            'fingerprint': self.fingerprint,
+        }
+        return {key: value for key, value in data.items() if value is not None}
+
+    def __str__(self):
+        return self.description
+
+    def __repr__(self):
+        return f"Finding({self.type!r}, {self.severity!r}, parameter={self.parameter!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, Finding) and self.fingerprint == other.fingerprint
+
+    def __hash__(self):
+        return hash(self.fingerprint)
+
+
+def as_finding(item: Any, target: Optional[str] = None, module: Optional[str] = None) -> Finding:
+    """Convert a module result (Finding, legacy dict or warning text) to a Finding."""
+    if isinstance(item, Finding):
+        finding = item
+    elif isinstance(item, dict):
+        finding = Finding.from_dict(item)
+    else:
+        finding = Finding.warning(str(item))
+    if finding.target is None and target:
+        finding.target = target
+    if finding.module is None and module:
+        finding.module = sys.intern(module)
+    return finding
+
+
+class FindingSet:
+    """Insertion-ordered set of findings, deduplicated by fingerprint in O(1)."""
+
+    def __init__(self, findings: Iterable[Finding] = ()):
+        self._items: Dict[str, Finding] = {}
+        self.duplicates = 0
+        for finding in findings:
+            self.add(finding)
+
+    def add(self, finding: Finding) -> bool:
+        """Add a finding; returns False if an identical one is already present."""
+        if finding.fingerprint in self._items:
+            self.duplicates += 1
+            return False
+        self._items[finding.fingerprint] = finding
+        return True
+
+    def extend(self, findings: Iterable[Finding]):
+        for finding in findings:
+            self.add(finding)
+
+    def sort(self, key=None):
+        """Reorder in place (by severity and fingerprint by default)."""
+        key = key or (lambda f: (severity_rank(f.severity), f.fingerprint))
+        self._items = {f.fingerprint: f for f in sorted(self._items.values(), key=key)}
+
+    def __contains__(self, finding: Finding) -> bool:
+        return finding.fingerprint in self._items
+
+    def __iter__(self) -> Iterator[Finding]:
+        return iter(self._items.values())
+
+    def __len__(self):
+        return len(self._items)
+
+    def __bool__(self):
+        return bool(self._items)
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Injection points: query, path, header, cookie and JSON body locations of a request.
+Дипломный проект - Автоматизированный веб-сканер
+"""
+
+import copy
+import random
+import re
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlencode, urlparse
+
+import requests
+
+from utils.param_discovery import CANARY_PREFIX
+from utils.scheduler import Probe, ProbeScheduler, RequestBudget
+
+
+VECTORS = ('query', 'path', 'header', 'cookie', 'json')
+
+# Заголовки, которые приложения часто пишут в логи, БД и страницы
+INJECTABLE_HEADERS = ('User-Agent', 'Referer', 'X-Forwarded-For')
+
+# Точки, которые не влияют друг на друга: разные заголовки и cookies
+# проверяются одним запросом, каждый payload со своим canary
+BATCHABLE_KINDS = ('header', 'cookie')
+
+MAX_BATCH = 8
+
+# Сегменты пути, похожие на значения (идентификаторы), а не на каталоги
+_VALUE_SEGMENT_RE = re.compile(r'\d')
+
+# Символы, которые нельзя передать в значении заголовка
+_INVALID_HEADER_RE = re.compile(r'[\r\n\x00]|^\s')
+
+
+class InjectionPoint:
+    """
+    One place of the request a payload replaces. ``key`` identifies the
+    point in probes and findings; for query parameters it is the bare name,
+    so findings keep the fingerprints of earlier scans.
+    """
+
+    __slots__ = ('kind', 'name', 'value', 'location')
+
+    def __init__(self, kind: str, name: str, value: str = '', location: Any = None):
+        self.kind = kind
+        self.name = name
+        self.value = value
+        # Индекс сегмента пути или путь к значению в JSON
+        self.location = location
+
+    @property
+    def key(self) -> str:
+        if self.kind == 'query':
+            return self.name
+        return f"{self.kind}:{self.name}"
+
+    def accepts(self, payload: str) -> bool:
+        if self.kind in ('header', 'cookie'):
+            return not _INVALID_HEADER_RE.search(payload)
+        return True
+
+    def __repr__(self):
+        return f"InjectionPoint({self.key!r})"
+
+
+def _json_leaves(value: Any, path: Tuple = ()) -> Iterator[Tuple[Tuple, Any]]:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _json_leaves(item, path + (key,))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            yield from _json_leaves(item, path + (index,))
+    elif isinstance(value, (str, int, float)) and not isinstance(value, bool):
+        yield path, value
+
+
+def _cookie_pairs(header: Optional[str]) -> List[Tuple[str, str]]:
+    pairs = []
+    for part in (header or '').split(';'):
+        name, _, value = part.strip().partition('=')
+        if name:
+            pairs.append((name, value))
+    return pairs
+
+
+class InjectionRequest:
+    """The unmodified request of a target; probes are copies with some points replaced."""
+
+    def __init__(self, url: str, json_body: Any = None):
+        self.url = url
+        self.parsed = urlparse(url)
+        self.query = parse_qs(self.parsed.query)
+        self.segments = self.parsed.path.split('/')
+        self.json_body = json_body
+        self.method = 'POST' if json_body is not None else 'GET'
+
+    def points(self, vectors=VECTORS, headers: Optional[Dict[str, str]] = None,
+               cookie_header: Optional[str] = None,
+               extra_parameters: Optional[Dict[str, str]] = None) -> List[InjectionPoint]:
+        """All points of the enabled vectors; ``headers`` are the values the baseline was sent with."""
+        points = []
+        if 'query' in vectors:
+            points += [InjectionPoint('query', name, values[0]) for name, values in self.query.items()]
+            # Скрытые параметры передаются только в пробах, со значением-canary в эталоне
+            points += [
+                InjectionPoint('query', name, value)
+                for name, value in (extra_parameters or {}).items() if name not in self.query
+            ]
+        if 'path' in vectors:
+            points += [
+                InjectionPoint('path', str(index), segment, index)
+                for index, segment in enumerate(self.segments)
+                if segment and _VALUE_SEGMENT_RE.search(segment)
+            ]
+        if 'header' in vectors:
+            points += [
+                InjectionPoint('header', name, (headers or {}).get(name, ''))
+                for name in INJECTABLE_HEADERS
+            ]
+        if 'cookie' in vectors:
+            points += [InjectionPoint('cookie', name, value) for name, value in _cookie_pairs(cookie_header)]
+        if 'json' in vectors and self.json_body is not None:
+            points += [
+                InjectionPoint('json', '.'.join(str(part) for part in path), str(value), path)
+                for path, value in _json_leaves(self.json_body)
+            ]
+        return points
+
+    def url_with(self, point: InjectionPoint, value: str) -> str:
+        """URL of the request with one query parameter or path segment replaced."""
+        query = self.query
+        path = self.parsed.path
+        if point.kind == 'query':
+            query = dict(query)
+            query[point.name] = [value]
+        elif point.kind == 'path':
+            segments = list(self.segments)
+            segments[point.location] = quote(value, safe='')
+            path = '/'.join(segments)
+
+        url = f"{self.parsed.scheme}://{self.parsed.netloc}{path}"
+        if query:
+            url += "?" + urlencode(query, doseq=True)
+        return url
+
+    def build(self, mutations: List[Tuple[InjectionPoint, str]], headers: Optional[Dict[str, str]] = None,
+              cookie_header: Optional[str] = None) -> Tuple[str, str, Dict[str, Any]]:
+        """``(method, url, request kwargs)`` with the given points replaced."""
+        url = self.url
+        headers = dict(headers or {})
+        cookies = OrderedDict(_cookie_pairs(cookie_header))
+        body = self.json_body
+
+        for point, value in mutations:
+            if point.kind in ('query', 'path'):
+                url = self.url_with(point, value)
+            elif point.kind == 'header':
+                headers[point.name] = value
+            elif point.kind == 'cookie':
+                # Разделители cookie кодируются: PHP, Express и др. декодируют значения
+                cookies[point.name] = quote(value, safe='')
+            elif point.kind == 'json':
+                if body is self.json_body:
+                    body = copy.deepcopy(self.json_body)
+                target = body
+                for part in point.location[:-1]:
+                    target = target[part]
+                target[point.location[-1]] = value
+
+        kwargs: Dict[str, Any] = {'headers': headers}
+        if any(point.kind == 'cookie' for point, _ in mutations):
+            # Явный заголовок Cookie заменяет cookies сессии в этом запросе
+            headers['Cookie'] = '; '.join(f"{name}={value}" for name, value in cookies.items())
+        if body is not None:
+            kwargs['json'] = body
+        return self.method, url, kwargs
+
+
+def reflected_near(text: str, canary: str, markers, span: int) -> bool:
+    """Whether a marker of the payload follows its canary: a reflection of this very payload."""
+    start = text.find(canary)
+    while start >= 0:
+        window = text[start:start + len(canary) + span]
+        if any(marker in window for marker in markers):
+            return True
+        start = text.find(canary, start + 1)
+    return False
+
+
+class InjectionExecutor:
+    """
+    Sends probes against the injection points of one target.
+
+    ``batches`` groups the probes of a scheduler into requests: a probe for
+    a header or cookie shares its request with probes for other headers and
+    cookies, and each payload in such a request is prefixed with its own
+    canary so that a reflection can be attributed. Probes for query, path
+    and JSON points, and slow probes, are sent alone. Every request sent
+    is charged to ``budget``.
+    """
+
+    def __init__(self, transport, target_url: str, vectors=VECTORS, json_body: Any = None,
+                 headers: Optional[Dict[str, str]] = None, max_batch: int = MAX_BATCH,
+                 seed: Optional[int] = None, budget: Optional[RequestBudget] = None):
+        self.transport = transport
+        self.budget = budget or RequestBudget()
+        self.request = InjectionRequest(target_url, json_body)
+        self.vectors = vectors
+        self.headers = headers or {}
+        self.max_batch = max_batch
+        self.batched_probes = 0
+        self._points: Dict[str, InjectionPoint] = {}
+        self._rng = random.Random(seed)
+        self._baseline = None
+        self._lock = threading.Lock()
+
+    def cookie_header(self) -> Optional[str]:
+        """Cookies the session would send to the target now (after login or re-login)."""
+        prepared = self.transport.session.prepare_request(requests.Request(self.request.method, self.request.url))
+        return prepared.headers.get('Cookie')
+
+    def points(self, extra_parameters: Optional[Dict[str, str]] = None) -> List[InjectionPoint]:
+        """
+        Points of the target; cookies set by the baseline response are
+        included, the cookies of the login session are not.
+        """
+        self.baseline()
+        points = self.request.points(
+            self.vectors, dict(self.transport.session.headers), self.cookie_header(), extra_parameters
+        )
+        auth = self.transport.auth
+        if auth is not None:
+            # Подмена cookie сессии выглядит для приложения как выход из системы
+            points = [
+                point for point in points
+                if point.kind != 'cookie' or point.name not in auth.session_cookies
+            ]
+        self._points = {point.key: point for point in points}
+        return points
+
+    def point(self, key: str) -> InjectionPoint:
+        return self._points[key]
+
+    def baseline(self, point: Optional[InjectionPoint] = None) -> requests.Response:
+        """Response without payload; for a hidden parameter - with its safe value."""
+        if point is not None and point.kind == 'query' and point.name not in self.request.query:
+            return self.transport.baseline(self.request.url_with(point, point.value))
+        if self.request.method == 'GET':
+            return self.transport.baseline(self.request.url)
+        with self._lock:
+            if self._baseline is None:
+                method, url, kwargs = self.request.build([], self.headers)
+                self._baseline = self.transport.request(method, url, timeout=10, **kwargs)
+            return self._baseline
+
+    def batchable(self, probe: Probe) -> bool:
+        point = self._points[probe.parameter]
+        return point.kind in BATCHABLE_KINDS and probe.cost <= 1.0
+
+    def batches(self, scheduler: ProbeScheduler) -> Iterator[List[Probe]]:
+        """Probes of the scheduler grouped into requests, in priority order where possible."""
+        batch: 'OrderedDict[str, Probe]' = OrderedDict()
+        held: 'OrderedDict[str, deque]' = OrderedDict()
+
+        def active():
+            # Пакет полон, когда в нем есть проба для каждой нерешенной точки
+            return sum(1 for key, point in self._points.items()
+                       if point.kind in BATCHABLE_KINDS and not scheduler.is_settled(key))
+
+        def ready():
+            probes = [probe for key, probe in batch.items() if not scheduler.is_settled(key)]
+            batch.clear()
+            # Пробы, собранные в пакет до исчерпания бюджета, не отправляются
+            if probes and self.budget.exhausted():
+                scheduler.skipped += len(probes)
+                return []
+            # Следующие пробы тех же точек ждут следующего пакета
+            for key in list(held):
+                queue = held[key]
+                if scheduler.is_settled(key):
+                    queue.clear()
+                if queue:
+                    batch[key] = queue.popleft()
+                if not queue:
+                    del held[key]
+            return probes
+
+        for probe in scheduler:
+            if not self.batchable(probe):
+                if batch:
+                    probes = ready()
+                    if probes:
+                        yield probes
+                if self.budget.exhausted():
+                    scheduler.skipped += 1
+                else:
+                    yield [probe]
+                continue
+
+            if probe.parameter in batch:
+                held.setdefault(probe.parameter, deque()).append(probe)
+            else:
+                batch[probe.parameter] = probe
+            if len(batch) >= min(self.max_batch, active()):
+                probes = ready()
+                if probes:
+                    yield probes
+
+        while batch or held:
+            probes = ready()
+            if probes:
+                yield probes
+
+    def canary(self) -> str:
+        return f"{CANARY_PREFIX}{self._rng.getrandbits(32):08x}"
+
+    def send(self, probes: List[Probe], timeout: float) -> Tuple[requests.Response, Dict[str, str]]:
+        """One request with the probes' payloads; canaries by point key for batched probes."""
+        canaries = {}
+        mutations = []
+        for probe in probes:
+            payload = probe.payload
+            if len(probes) > 1:
+                canaries[probe.parameter] = self.canary()
+                payload = canaries[probe.parameter] + payload
+            mutations.append((self._points[probe.parameter], payload))
+        if len(probes) > 1:
+            with self._lock:
+                self.batched_probes += len(probes)
+
+        cookies = any(point.kind == 'cookie' for point, _ in mutations)
+        cookie_header = self.cookie_header() if cookies else None
+        method, url, kwargs = self.request.build(mutations, self.headers, cookie_header)
+        self.budget.spend()
+        # Явный заголовок Cookie повторился бы и после повторного входа
+        response = self.transport.request(method, url, timeout=timeout, relogin=not cookies, **kwargs)
+        return response, canaries
+
+    def probe_url(self, probe: Probe) -> str:
+        point = self._points[probe.parameter]
+        if point.kind in ('query', 'path'):
+            return self.request.url_with(point, probe.payload)
+        return self.request.url
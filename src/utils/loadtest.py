@@ -0,0 +1,535 @@
+#!/usr/bin/env python3
+"""
+Load-test harness: synthetic slow targets and runtime metrics of a batch scan.
+Дипломный проект - Автоматизированный веб-сканер
+"""
+
+import contextlib
+import html
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import socket
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+LATENCY_DISTRIBUTIONS = ('fixed', 'exponential', 'lognormal', 'pareto')
+
+BASELINE_VERSION = 1
+
+# Метрики для сравнения с базовой линией: (раздел, ключ, больше - лучше)
+COMPARED_METRICS = (
+    ('throughput', 'targets_per_second', True),
+    ('throughput', 'requests_per_second', True),
+    ('request_latency', 'p99', False),
+    ('target_latency', 'scan.p99', False),
+    ('memory', 'growth_kb', False),
+    ('fds', 'peak', False),
+    ('stuck', 'workers', False),
+)
+
+# Разница меньше этой доли шума таймеров не считается регрессией
+_MIN_ABSOLUTE_CHANGE = {'p99': 0.005, 'scan.p99': 0.05, 'growth_kb': 4096, 'peak': 4}
+
+
+class LatencyModel:
+    """
+    Response delay of a synthetic target. ``median`` is the same for every
+    distribution; ``shape`` sets the tail: sigma of the lognormal, alpha of
+    the Pareto distribution (smaller - heavier). Samples are capped at ``cap``.
+    """
+
+    def __init__(self, distribution: str = 'lognormal', median: float = 0.02,
+                 shape: float = 1.0, cap: float = 30.0):
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"неизвестное распределение: {distribution}")
+        self.distribution = distribution
+        self.median = median
+        self.shape = shape
+        self.cap = cap
+
+    def sample(self, rng: random.Random) -> float:
+        if self.distribution == 'fixed':
+            value = self.median
+        elif self.distribution == 'exponential':
+            value = rng.expovariate(math.log(2) / self.median) if self.median > 0 else 0.0
+        elif self.distribution == 'lognormal':
+            value = rng.lognormvariate(math.log(self.median), self.shape) if self.median > 0 else 0.0
+        else:
+            # Медиана распределения Парето: xm * 2^(1/alpha)
+            value = self.median / 2 ** (1 / self.shape) * rng.paretovariate(self.shape)
+        return min(value, self.cap)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'distribution': self.distribution, 'median': self.median, 'shape': self.shape, 'cap': self.cap}
+
+
+class TargetProfile:
+    """
+    Behaviour of the stand-in servers: latency of every response, the share
+    of 503 answers, of stalls (the connection is held ``stall_seconds`` and
+    closed without a response) and of black-holed hosts that never accept
+    connections.
+    """
+
+    def __init__(self, latency: Optional[LatencyModel] = None, error_rate: float = 0.01,
+                 stall_rate: float = 0.001, stall_seconds: float = 60.0, blackhole_rate: float = 0.01):
+        self.latency = latency or LatencyModel()
+        self.error_rate = error_rate
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self.blackhole_rate = blackhole_rate
+
+    def blackholed_hosts(self, hosts: int) -> int:
+        # Заданная доля не теряется при малом числе хостов
+        if self.blackhole_rate <= 0:
+            return 0
+        return min(hosts, max(1, round(hosts * self.blackhole_rate)))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'latency': self.latency.to_dict(),
+            'error_rate': self.error_rate,
+            'stall_rate': self.stall_rate,
+            'stall_seconds': self.stall_seconds,
+            'blackhole_rate': self.blackhole_rate,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TargetProfile':
+        data = dict(data)
+        data['latency'] = LatencyModel(**data['latency'])
+        return cls(**data)
+
+
+class _SyntheticHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _respond(self, body: bool):
+        server = self.server
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+
+        roll = server.rng.random()
+        profile = server.profile
+        if roll < profile.stall_rate:
+            server.count('stalls')
+            time.sleep(profile.stall_seconds)
+            self.close_connection = True
+            return
+        time.sleep(profile.latency.sample(server.rng))
+
+        if roll < profile.stall_rate + profile.error_rate:
+            server.count('errors')
+            self._send(503, b"<html><body>Service Unavailable</body></html>", body)
+            return
+
+        server.count('responses')
+        query = parse_qs(urlparse(self.path).query)
+        echo = html.escape(' '.join(value for values in query.values() for value in values))
+        self._send(200, server.page.replace('{echo}', echo).encode('utf-8'), body)
+
+    def _send(self, status: int, payload: bytes, body: bool):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        if body:
+            self.wfile.write(payload)
+
+    def do_GET(self):
+        self._respond(True)
+
+    def do_POST(self):
+        self._respond(True)
+
+    def do_HEAD(self):
+        self._respond(False)
+
+
+class _SyntheticServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, profile: TargetProfile, seed: int):
+        super().__init__(('127.0.0.1', 0), _SyntheticHandler)
+        self.profile = profile
+        self.rng = random.Random(seed)
+        self.page = synthetic_page(seed)
+        self.counters = {'responses': 0, 'errors': 0, 'stalls': 0}
+        self._lock = threading.Lock()
+
+    def count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+
+def synthetic_page(seed: int) -> str:
+    """Page template of one host; hosts differ in structure, so each forms its own cluster."""
+    rng = random.Random(seed)
+    rows = ''.join(
+        f"<{tag} class='c{i}'><a href='/item/{i}'>item {i}</a></{tag}>"
+        for i, tag in enumerate(rng.choice(('li', 'p', 'div', 'span')) for _ in range(rng.randint(5, 40)))
+    )
+    return (f"<html><head><title>host {seed}</title></head><body><form action='/search'>"
+            f"<input name='q' value='{{echo}}'></form><ul>{rows}</ul></body></html>")
+
+
+def _serve(hosts: int, profile_data: Dict[str, Any], seed: int, connection):
+    """Child process: start the servers, report their ports, serve until told to stop."""
+    profile = TargetProfile.from_dict(profile_data)
+    blackholed = profile.blackholed_hosts(hosts)
+    ports, servers, sockets = [], [], []
+    for index in range(hosts):
+        if index < blackholed:
+            # Сокет слушает, но соединения не принимаются: после заполнения
+            # очереди SYN отбрасываются, клиент ждет до таймаута
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.bind(('127.0.0.1', 0))
+            sock.listen(0)
+            sockets.append(sock)
+            ports.append(sock.getsockname()[1])
+            continue
+        server = _SyntheticServer(profile, seed * 100003 + index)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        ports.append(server.server_address[1])
+    connection.send(ports)
+
+    try:
+        connection.recv()
+    except EOFError:
+        pass
+    totals = {'responses': 0, 'errors': 0, 'stalls': 0}
+    for server in servers:
+        for name, value in server.counters.items():
+            totals[name] += value
+    connection.send(totals)
+
+
+class SyntheticTargets:
+    """
+    Local stand-in HTTP servers for a load test. They run in a child process
+    so that their threads and sockets are not counted as the scanner's and
+    do not compete with it for the GIL. The first hosts of the list are
+    black-holed, targets are spread over all hosts round-robin.
+    """
+
+    def __init__(self, hosts: int = 100, profile: Optional[TargetProfile] = None, seed: int = 0):
+        self.hosts = hosts
+        self.profile = profile or TargetProfile()
+        self.seed = seed
+        self.ports: List[int] = []
+        self.server_stats: Dict[str, int] = {}
+        self._process = None
+        self._connection = None
+
+    def start(self) -> List[int]:
+        self._connection, child = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=_serve, args=(self.hosts, self.profile.to_dict(), self.seed, child), daemon=True
+        )
+        self._process.start()
+        child.close()
+        self.ports = self._connection.recv()
+        return self.ports
+
+    def targets(self, count: int) -> List[str]:
+        """``count`` distinct URLs with a query parameter; target ``i`` lives on host ``i % hosts``."""
+        return [
+            f"http://127.0.0.1:{self.ports[i % len(self.ports)]}/item/{i}?id={i}"
+            for i in range(count)
+        ]
+
+    def stop(self):
+        if self._process is None:
+            return
+        try:
+            self._connection.send('stop')
+            if self._connection.poll(5):
+                self.server_stats = self._connection.recv()
+        except (OSError, EOFError):
+            pass
+        self._process.join(5)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        self._connection.close()
+        self._process = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def rss_kb() -> int:
+    """Current resident set size; the peak one where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource  # Только POSIX: на Windows память не измеряется
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS сообщает байты, Linux - килобайты
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def open_fds() -> Optional[int]:
+    for path in ('/proc/self/fd', '/dev/fd'):
+        try:
+            return len(os.listdir(path))
+        except OSError:
+            continue
+    return None
+
+
+def percentiles(values: List[float]) -> Dict[str, Any]:
+    """Nearest-rank percentiles of ``values``."""
+    if not values:
+        return {'count': 0}
+    ordered = sorted(values)
+
+    def rank(p):
+        return round(ordered[min(len(ordered) - 1, max(0, math.ceil(p * len(ordered)) - 1))], 4)
+
+    return {
+        'count': len(ordered),
+        'p50': rank(0.50),
+        'p90': rank(0.90),
+        'p99': rank(0.99),
+        'p999': rank(0.999),
+        'max': round(ordered[-1], 4),
+    }
+
+
+class LoadMonitor:
+    """
+    Collects the runtime metrics of a batch scan: the latency of every HTTP
+    request (``attach`` sets the transport's ``on_request``), the duration of
+    every target phase (``track``) and, from a sampler thread, RSS, open file
+    descriptors and threads over time.
+
+    A worker is reported as stuck when it has been inside a target for
+    ``stuck_after`` seconds without finishing a single request; the report
+    holds the innermost frames of its stack at that moment.
+    """
+
+    def __init__(self, interval: float = 1.0, stuck_after: float = 30.0):
+        self.interval = interval
+        self.stuck_after = stuck_after
+        self.timeline: List[Dict[str, Any]] = []
+        self.stuck: List[Dict[str, Any]] = []
+        self.request_times: List[float] = []
+        self.request_errors: Dict[str, int] = {}
+        self.phase_times: Dict[str, List[float]] = {}
+        self.phase_errors: Dict[str, int] = {}
+        self.started = None
+        self.finished = None
+        self._in_flight: Dict[int, Tuple[str, str, float]] = {}
+        self._activity: Dict[int, float] = {}
+        self._reported = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def attach(self, transport):
+        transport.on_request = self.record_request
+
+    def record_request(self, method: str, url: str, elapsed: float, error: Optional[Exception]):
+        with self._lock:
+            self.request_times.append(elapsed)
+            if error is not None:
+                name = type(error).__name__
+                self.request_errors[name] = self.request_errors.get(name, 0) + 1
+            self._activity[threading.get_ident()] = time.monotonic()
+
+    @contextlib.contextmanager
+    def track(self, target: str, phase: str):
+        ident = threading.get_ident()
+        started = time.monotonic()
+        with self._lock:
+            self._in_flight[ident] = (target, phase, started)
+            self._activity[ident] = started
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                del self._in_flight[ident]
+                self.phase_times.setdefault(phase, []).append(elapsed)
+                if failed:
+                    self.phase_errors[phase] = self.phase_errors.get(phase, 0) + 1
+
+    def start(self):
+        self.started = time.monotonic()
+        self._sample()
+        self._thread = threading.Thread(target=self._run, name='load-monitor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.finished = time.monotonic()
+        self._sample()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+            self._detect_stuck()
+
+    def _sample(self):
+        with self._lock:
+            completed = sum(len(times) for phase, times in self.phase_times.items() if phase != 'fingerprint')
+            requests_done = len(self.request_times)
+            in_flight = len(self._in_flight)
+        self.timeline.append({
+            't': round(time.monotonic() - self.started, 2),
+            'rss_kb': rss_kb(),
+            'fds': open_fds(),
+            'threads': threading.active_count(),
+            'targets_done': completed,
+            'requests': requests_done,
+            'in_flight': in_flight,
+        })
+
+    def _detect_stuck(self):
+        now = time.monotonic()
+        frames = None
+        with self._lock:
+            candidates = [
+                (ident, target, phase, started, now - self._activity.get(ident, started))
+                for ident, (target, phase, started) in self._in_flight.items()
+            ]
+        for ident, target, phase, started, idle in candidates:
+            if idle < self.stuck_after or (ident, target, phase) in self._reported:
+                continue
+            self._reported.add((ident, target, phase))
+            if frames is None:
+                frames = sys._current_frames()
+            stack = traceback.extract_stack(frames[ident])[-4:] if ident in frames else []
+            self.stuck.append({
+                'target': target,
+                'phase': phase,
+                'elapsed': round(now - started, 1),
+                'idle': round(idle, 1),
+                'stack': [f"{frame.filename}:{frame.lineno} in {frame.name}" for frame in stack],
+            })
+
+    def report(self, targets: int) -> Dict[str, Any]:
+        duration = (self.finished or time.monotonic()) - self.started
+        done = sum(len(times) for phase, times in self.phase_times.items() if phase != 'fingerprint')
+        rss = [sample['rss_kb'] for sample in self.timeline]
+        fds = [sample['fds'] for sample in self.timeline if sample['fds'] is not None]
+        growth = rss[-1] - rss[0]
+        return {
+            'duration': round(duration, 2),
+            'targets': {
+                'total': targets,
+                'done': done,
+                'failed': sum(count for phase, count in self.phase_errors.items() if phase != 'fingerprint'),
+                'not_scanned': targets - done,
+            },
+            'throughput': {
+                'targets_per_second': round(done / duration, 2) if duration else 0.0,
+                'requests_per_second': round(len(self.request_times) / duration, 2) if duration else 0.0,
+            },
+            'request_latency': dict(percentiles(self.request_times), errors=dict(self.request_errors)),
+            'target_latency': {phase: percentiles(times) for phase, times in sorted(self.phase_times.items())},
+            'memory': {
+                'rss_start_kb': rss[0],
+                'rss_peak_kb': max(rss),
+                'rss_end_kb': rss[-1],
+                'growth_kb': growth,
+                'growth_per_1k_targets_kb': round(growth * 1000 / done, 1) if done else None,
+            },
+            'fds': {'start': fds[0], 'peak': max(fds), 'end': fds[-1]} if fds else {},
+            'threads': {'peak': max(sample['threads'] for sample in self.timeline)},
+            'stuck': {'workers': len(self.stuck), 'details': self.stuck},
+            'timeline': self.timeline,
+        }
+
+
+def build_baseline(config: Dict[str, Any], report: Dict[str, Any]) -> Dict[str, Any]:
+    """Load-test result with the configuration and environment it was obtained in."""
+    return dict(
+        version=BASELINE_VERSION,
+        timestamp=datetime.now().isoformat(),
+        environment={
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        config=config,
+        **report
+    )
+
+
+def save_baseline(path: str, baseline: Dict[str, Any]):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2, ensure_ascii=False)
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _metric(report: Dict[str, Any], section: str, key: str) -> Optional[float]:
+    value: Any = report.get(section, {})
+    for part in key.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value if isinstance(value, (int, float)) else None
+
+
+def compare_baselines(old: Dict[str, Any], new: Dict[str, Any], tolerance: float = 0.25) -> List[Dict[str, Any]]:
+    """
+    Key metrics of two load-test results. A metric regressed when it got
+    worse by more than ``tolerance`` (a share of the old value) and by more
+    than timer noise; any new stuck worker is a regression.
+    """
+    rows = []
+    for section, key, higher_is_better in COMPARED_METRICS:
+        before, after = _metric(old, section, key), _metric(new, section, key)
+        if before is None or after is None:
+            continue
+        worse = before - after if higher_is_better else after - before
+        if key == 'workers':
+            regression = worse > 0
+        else:
+            regression = worse > abs(before) * tolerance and worse > _MIN_ABSOLUTE_CHANGE.get(key, 0)
+        rows.append({
+            'metric': f"{section}.{key}",
+            'baseline': before,
+            'current': after,
+            'change': round((after - before) / before, 3) if before else None,
+            'regression': regression,
+        })
+    return rows
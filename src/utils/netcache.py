@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+DNS and TLS session caches for repeat connections to the same hosts.
+Дипломный проект - Автоматизированный веб-сканер
+"""
+
+import socket
+import ssl
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from requests.adapters import DEFAULT_POOLBLOCK, HTTPAdapter
+from requests.utils import DEFAULT_CA_BUNDLE_PATH
+from urllib3 import PoolManager
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+from urllib3.util.ssl_ import resolve_cert_reqs
+from urllib3.util.timeout import _DEFAULT_TIMEOUT
+
+
+# getaddrinfo не сообщает TTL записи, поэтому время жизни задается явно
+DEFAULT_DNS_TTL = 300.0
+
+
+def _rate(hits: int, misses: int) -> float:
+    total = hits + misses
+    return hits / total if total else 0.0
+
+
+class DNSCache:
+    """
+    Thread-safe ``getaddrinfo`` cache with a fixed TTL.
+
+    Concurrent lookups of the same host wait for a single resolution
+    instead of all querying the resolver.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_DNS_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Tuple[str, int], Tuple[float, List[tuple]]] = {}
+        self._locks: Dict[Tuple[str, int], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, host: str, port: int) -> List[tuple]:
+        key = (host, port)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            with self._lock:
+                self.hits += 1
+            return entry[1]
+
+        with self._lock:
+            host_lock = self._locks.setdefault(key, threading.Lock())
+        with host_lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                with self._lock:
+                    self.hits += 1
+                return entry[1]
+
+            addresses = socket.getaddrinfo(host, port, allowed_gai_family(), socket.SOCK_STREAM)
+            with self._lock:
+                self.misses += 1
+            if self.ttl > 0:
+                self._entries[key] = (time.monotonic() + self.ttl, addresses)
+            return addresses
+
+    def invalidate(self, host: str, port: int):
+        self._entries.pop((host, port), None)
+
+    @property
+    def hit_rate(self) -> float:
+        return _rate(self.hits, self.misses)
+
+
+class TLSSessionCache:
+    """
+    Last resumable TLS session per SSL context and server name, with
+    resumption counters. A session can only be resumed by the context
+    that created it, so contexts with different verification settings
+    keep separate sessions for the same host.
+    """
+
+    def __init__(self):
+        self.resumed = 0
+        self.full_handshakes = 0
+        self._sessions: Dict[Tuple[ssl.SSLContext, str], ssl.SSLSession] = {}
+        self._lock = threading.Lock()
+
+    def get(self, context: ssl.SSLContext, server_hostname: str) -> Optional[ssl.SSLSession]:
+        return self._sessions.get((context, server_hostname))
+
+    def record(self, server_hostname: str, sock: ssl.SSLSocket):
+        with self._lock:
+            if sock.session_reused:
+                self.resumed += 1
+            else:
+                self.full_handshakes += 1
+        self.store(server_hostname, sock)
+
+    def store(self, server_hostname: str, sock: ssl.SSLSocket):
+        """Remember the socket's session; TLS 1.3 tickets arrive after the handshake."""
+        session = sock.session
+        if session is None or not (session.has_ticket or session.id):
+            return
+        key = (sock.context, server_hostname)
+        current = self._sessions.get(key)
+        if current is None or session.has_ticket or not current.has_ticket:
+            self._sessions[key] = session
+
+    @property
+    def resumption_rate(self) -> float:
+        return _rate(self.resumed, self.full_handshakes)
+
+
+class ResumingSSLContext(ssl.SSLContext):
+    """SSL context that offers the cached session for the server name on every handshake."""
+
+    session_cache: Optional[TLSSessionCache] = None
+
+    def wrap_socket(self, sock, server_side=False, do_handshake_on_connect=True,
+                    suppress_ragged_eofs=True, server_hostname=None, session=None):
+        cache = self.session_cache
+        if cache is not None and session is None and server_hostname and not server_side:
+            session = cache.get(self, server_hostname)
+        ssl_sock = super().wrap_socket(
+            sock, server_side=server_side, do_handshake_on_connect=do_handshake_on_connect,
+            suppress_ragged_eofs=suppress_ragged_eofs, server_hostname=server_hostname, session=session
+        )
+        if cache is not None and server_hostname and do_handshake_on_connect:
+            cache.record(server_hostname, ssl_sock)
+        return ssl_sock
+
+
+class NetworkCache:
+    """DNS cache, TLS session cache and the SSL contexts sessions are bound to."""
+
+    def __init__(self, dns_ttl: float = DEFAULT_DNS_TTL):
+        self.dns = DNSCache(dns_ttl)
+        self.tls = TLSSessionCache()
+        self.connections = 0
+        self._contexts: Dict[tuple, ResumingSSLContext] = {}
+        self._lock = threading.Lock()
+
+    def ssl_context(self, cert_reqs=None, ca_certs: Optional[str] = None,
+                    ca_cert_dir: Optional[str] = None) -> ResumingSSLContext:
+        """Shared context per verification setting: sessions resume only within one context."""
+        verify_mode = resolve_cert_reqs(cert_reqs)
+        key = (verify_mode, ca_certs, ca_cert_dir)
+        with self._lock:
+            context = self._contexts.get(key)
+            if context is None:
+                context = ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+                context.minimum_version = ssl.TLSVersion.TLSv1_2
+                context.session_cache = self.tls
+                if verify_mode == ssl.CERT_NONE:
+                    context.check_hostname = False
+                    context.verify_mode = ssl.CERT_NONE
+                elif ca_certs or ca_cert_dir:
+                    context.load_verify_locations(cafile=ca_certs, capath=ca_cert_dir)
+                else:
+                    context.load_verify_locations(cafile=DEFAULT_CA_BUNDLE_PATH)
+                self._contexts[key] = context
+            return context
+
+    def connect(self, host: str, port: int, timeout=_DEFAULT_TIMEOUT, source_address=None,
+                socket_options=None) -> socket.socket:
+        """``socket.create_connection`` over cached addresses."""
+        host = host.strip('[]')
+        error = None
+        for family, socktype, proto, _, address in self.dns.resolve(host, port):
+            sock = None
+            try:
+                sock = socket.socket(family, socktype, proto)
+                for option in socket_options or ():
+                    sock.setsockopt(*option)
+                if timeout is not _DEFAULT_TIMEOUT:
+                    sock.settimeout(timeout)
+                if source_address:
+                    sock.bind(source_address)
+                sock.connect(address)
+                with self._lock:
+                    self.connections += 1
+                return sock
+            except OSError as e:
+                error = e
+                if sock is not None:
+                    sock.close()
+        # Адрес из кэша мог устареть: следующее соединение разрешит имя заново
+        self.dns.invalidate(host, port)
+        if error is not None:
+            raise error
+        raise OSError("getaddrinfo returns an empty list")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'connections': self.connections,
+            'dns_hits': self.dns.hits,
+            'dns_misses': self.dns.misses,
+            'dns_hit_rate': round(self.dns.hit_rate, 3),
+            'tls_resumed': self.tls.resumed,
+            'tls_full_handshakes': self.tls.full_handshakes,
+            'tls_resumption_rate': round(self.tls.resumption_rate, 3),
+        }
+
+
+class _CachedConnectionMixin:
+    """urllib3 connection that opens its socket through a ``NetworkCache``."""
+
+    def __init__(self, *args, network_cache: Optional[NetworkCache] = None, **kwargs):
+        self.network_cache = network_cache
+        super().__init__(*args, **kwargs)
+
+    def _new_conn(self) -> socket.socket:
+        if self.network_cache is None:
+            return super()._new_conn()
+        try:
+            sock = self.network_cache.connect(
+                self._dns_host, self.port, self.timeout,
+                source_address=self.source_address, socket_options=self.socket_options
+            )
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        except socket.timeout as e:
+            raise ConnectTimeoutError(
+                self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})"
+            ) from e
+        except OSError as e:
+            raise NewConnectionError(self, f"Failed to establish a new connection: {e}") from e
+
+        sys.audit("http.client.connect", self, self.host, self.port)
+        return sock
+
+
+class CachedHTTPConnection(_CachedConnectionMixin, HTTPConnection):
+    pass
+
+
+class CachedHTTPSConnection(_CachedConnectionMixin, HTTPSConnection):
+
+    def getresponse(self, *args, **kwargs):
+        # Сокет запоминается заранее: при "Connection: close" http.client
+        # отвязывает его от соединения до возврата ответа
+        sock = self.sock
+        response = super().getresponse(*args, **kwargs)
+        # Билет TLS 1.3 приходит после рукопожатия, к ответу он уже получен
+        if self.network_cache is not None and isinstance(sock, ssl.SSLSocket):
+            self.network_cache.tls.store(self.server_hostname or self.host, sock)
+        return response
+
+
+class CachedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = CachedHTTPConnection
+
+
+class CachedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = CachedHTTPSConnection
+
+
+class CachingPoolManager(PoolManager):
+    """Pool manager whose connections share one DNS cache and TLS session cache."""
+
+    def __init__(self, network_cache: NetworkCache, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.network_cache = network_cache
+        self.pool_classes_by_scheme = {
+            'http': CachedHTTPConnectionPool,
+            'https': CachedHTTPSConnectionPool,
+        }
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        request_context = dict(self.connection_pool_kw if request_context is None else request_context)
+        request_context['network_cache'] = self.network_cache
+        if scheme == 'https':
+            # Один контекст на настройку проверки: сессии возобновляются между пулами
+            request_context['ssl_context'] = self.network_cache.ssl_context(
+                request_context.get('cert_reqs'),
+                request_context.get('ca_certs'),
+                request_context.get('ca_cert_dir'),
+            )
+        return super()._new_pool(scheme, host, port, request_context)
+
+
+class CachingHTTPAdapter(HTTPAdapter):
+    """``requests`` adapter backed by ``CachingPoolManager``."""
+
+    def __init__(self, network_cache: NetworkCache, **kwargs):
+        self.network_cache = network_cache
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=DEFAULT_POOLBLOCK, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = CachingPoolManager(
+            self.network_cache, num_pools=connections, maxsize=maxsize, block=block, **pool_kwargs
+        )
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Hidden parameter discovery: many candidate names per request, bisected on change.
+Дипломный проект - Автоматизированный веб-сканер
+"""
+
+import os
+import random
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from utils.analysis import AnalysisPool
+from utils.clustering import hamming_distance, structure_simhash
+from utils.payload_corpus import DEFAULT_CORPUS_DIR
+from utils.scheduler import RequestBudget
+
+
+DEFAULT_WORDLIST = os.path.join(DEFAULT_CORPUS_DIR, 'params.txt')
+
+CANARY_PREFIX = 'wsc'
+
+# Длина строки запроса с кандидатами: серверы обычно ограничивают
+# строку запроса 4-8 КБ, поэтому берем с запасом
+MAX_QUERY_LENGTH = 1800
+
+# Минимальное изменение длины ответа, которое считается реакцией на параметр
+MIN_LENGTH_TOLERANCE = 16
+
+# Различие отпечатков структуры (бит), начиная с которого страница другая
+STRUCTURE_DISTANCE = 4
+
+
+def load_wordlist(path: Optional[str] = None) -> List[str]:
+    """Parameter names, one per line; blank lines and ``#`` comments are skipped."""
+    with open(path or DEFAULT_WORDLIST, encoding='utf-8') as f:
+        names = (line.strip() for line in f)
+        return list(dict.fromkeys(name for name in names if name and not name.startswith('#')))
+
+
+class ResponseSignature:
+    """What a parameter can change: status, structure fingerprint, length and reflected canaries."""
+
+    __slots__ = ('status', 'structure', 'length', 'body')
+
+    def __init__(self, status: int, structure: int, length: int, body: str):
+        self.status = status
+        self.structure = structure
+        self.length = length
+        self.body = body
+
+
+class ParameterDiscovery:
+    """
+    Finds parameter names the application reacts to.
+
+    Candidates are packed into as few requests as fit in a query string,
+    each with its own canary value. A canary that appears in the response
+    identifies its parameter directly; a response that otherwise differs
+    from a control request (random names of the same shape) is split in
+    half until the responsible names are isolated, so a wordlist of ``n``
+    names with ``k`` hits costs about ``n / batch + k * log2(batch)``
+    requests instead of ``n``. Requests are charged to ``budget``; once it
+    is spent the search stops with the names found so far.
+    """
+
+    def __init__(self, transport, wordlist: Optional[List[str]] = None, analysis_pool=None,
+                 max_batch: int = 64, max_query_length: int = MAX_QUERY_LENGTH,
+                 timeout: float = 8, seed: Optional[int] = None, budget: Optional[RequestBudget] = None):
+        self.transport = transport
+        self.wordlist = wordlist if wordlist is not None else load_wordlist()
+        self.analysis_pool = analysis_pool or AnalysisPool()
+        self.max_batch = max_batch
+        self.max_query_length = max_query_length
+        self.timeout = timeout
+        self.budget = budget or RequestBudget()
+        self.requests_sent = 0
+        # Контрольный ответ цели и его шум; задаются в начале discover()
+        self.reference: Optional[ResponseSignature] = None
+        self.echoes_query = False
+        self.length_tolerance = MIN_LENGTH_TOLERANCE
+        self._rng = random.Random(seed)
+
+    def canary(self) -> str:
+        return f"{CANARY_PREFIX}{self._rng.getrandbits(40):010x}"
+
+    def discover(self, url: str) -> Dict[str, str]:
+        """Discovered parameter names mapped to the canary value they were found with."""
+        existing = parse_qs(urlparse(url).query)
+        names = [name for name in self.wordlist if name not in existing]
+        if not names:
+            return {}
+
+        # Два контрольных запроса со случайными именами: шум длины ответа
+        # и признак страницы, которая отражает всю строку запроса
+        size = min(self.max_batch, len(names))
+        controls = []
+        for _ in range(2):
+            params = {f"{CANARY_PREFIX}{self._rng.getrandbits(24):06x}": self.canary() for _ in range(size)}
+            controls.append((params, self._fetch(url, params)))
+        self.reference = controls[0][1]
+        self.echoes_query = any(
+            value in signature.body for params, signature in controls for value in params.values()
+        )
+        noise = abs(controls[0][1].length - controls[1][1].length)
+        self.length_tolerance = max(2 * noise, MIN_LENGTH_TOLERANCE)
+
+        found: Dict[str, str] = {}
+        for batch in self._batches(names):
+            if self.budget.exhausted():
+                break
+            self._search(url, {name: self.canary() for name in batch}, found)
+        return found
+
+    def _batches(self, names: List[str]) -> Iterator[List[str]]:
+        batch, length = [], 0
+        for name in names:
+            # имя=canary& в закодированном виде
+            pair_length = len(urlencode({name: ''})) + len(CANARY_PREFIX) + 11
+            if batch and (len(batch) >= self.max_batch or length + pair_length > self.max_query_length):
+                yield batch
+                batch, length = [], 0
+            batch.append(name)
+            length += pair_length
+        if batch:
+            yield batch
+
+    def _search(self, url: str, params: Dict[str, str], found: Dict[str, str]):
+        signature = self._fetch(url, params)
+
+        # Отраженный canary сразу указывает на параметр
+        reflected = [] if self.echoes_query else [
+            name for name, value in params.items() if value in signature.body
+        ]
+        for name in reflected:
+            found[name] = params[name]
+
+        rest = {name: value for name, value in params.items() if name not in found}
+        if not rest:
+            return
+        if reflected:
+            # Отражение меняет длину ответа, остальные имена проверяются отдельно
+            self._search(url, rest, found)
+            return
+
+        if not self._differs(signature):
+            return
+        if len(rest) == 1:
+            found.update(rest)
+            return
+
+        names = list(rest)
+        middle = len(names) // 2
+        for half in (names[:middle], names[middle:]):
+            if self.budget.exhausted():
+                return
+            self._search(url, {name: rest[name] for name in half}, found)
+
+    def _differs(self, signature: ResponseSignature) -> bool:
+        reference = self.reference
+        if signature.status != reference.status:
+            return True
+        if hamming_distance(signature.structure, reference.structure) >= STRUCTURE_DISTANCE:
+            return True
+        # Длина не сравнивается, если страница отражает всю строку запроса
+        return not self.echoes_query and abs(signature.length - reference.length) > self.length_tolerance
+
+    def _fetch(self, url: str, params: Dict[str, str]) -> ResponseSignature:
+        separator = '&' if urlparse(url).query else '?'
+        self.budget.spend()
+        response = self.transport.get(url + separator + urlencode(params), timeout=self.timeout)
+        self.requests_sent += 1
+
+        structure = self.analysis_pool.submit(structure_simhash, response.content, response.encoding)
+        body = response.text
+        # Canary не учитываются в длине: их отражение проверяется отдельно
+        length = len(body) - sum(body.count(value) * len(value) for value in params.values())
+        return ResponseSignature(response.status_code, structure.result(), length, body)
+
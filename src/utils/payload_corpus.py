@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Payload corpus loader with precomputed encodings and tag index.
+Дипломный проект - Автоматизированный веб-сканер
+
+Corpus files are JSON Lines, one payload per line:
+
+    {"payload": "<script>alert('XSS')</script>", "technique": "basic",
+     "encodings": ["url", "html"]}
+    {"payload": "' OR SLEEP(5)--", "technique": "time_based", "dbms": ["mysql"]}
+
+Optional keys: ``dbms`` (list), ``context`` (html/attribute/javascript),
+``encodings`` (variants to generate) and ``markers`` (strings that confirm a
+hit; by default a payload is its own marker). Blank lines and lines starting
+with ``#`` are ignored.
+"""
+
+import hashlib
+import html
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+
+CACHE_VERSION = 1
+
+DEFAULT_CORPUS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'payloads')
+
+# Кодировщики вариантов payload; порядок задает порядок вариантов в корпусе
+ENCODERS = {
+    'url': lambda payload: quote(payload, safe=''),
+    'double_url': lambda payload: quote(quote(payload, safe=''), safe=''),
+    'html': lambda payload: html.escape(payload, quote=False),
+}
+
+_memory_cache: Dict[Tuple[str, str], 'PayloadCorpus'] = {}
+_memory_lock = threading.Lock()
+
+
+class PayloadEntry:
+    """A single payload variant with its tags and detection markers."""
+
+    __slots__ = ('payload', 'technique', 'dbms', 'context', 'encoding', 'markers')
+
+    def __init__(self, payload: str, technique: str, dbms: Tuple[str, ...] = (),
+                 context: Optional[str] = None, encoding: str = 'raw',
+                 markers: Tuple[str, ...] = ()):
+        self.payload = payload
+        self.technique = technique
+        self.dbms = dbms
+        self.context = context
+        self.encoding = encoding
+        self.markers = markers or (payload,)
+
+    def to_row(self) -> list:
+        return [self.payload, self.technique, list(self.dbms), self.context, self.encoding, list(self.markers)]
+
+    @classmethod
+    def from_row(cls, row: list) -> 'PayloadEntry':
+        payload, technique, dbms, context, encoding, markers = row
+        return cls(payload, technique, tuple(dbms), context, encoding, tuple(markers))
+
+    def __repr__(self):
+        return f"PayloadEntry({self.payload!r}, technique={self.technique!r}, encoding={self.encoding!r})"
+
+
+def parse_corpus(text: str) -> List[PayloadEntry]:
+    """Parse corpus source and expand encoded variants (raw payloads first)."""
+    raw_entries = []
+    variants = {name: [] for name in ENCODERS}
+
+    for line_number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"Строка {line_number}: некорректный JSON ({e})") from None
+        if not isinstance(record, dict) or not isinstance(record.get('payload'), str):
+            raise ValueError(f"Строка {line_number}: нет строкового поля payload")
+
+        payload = record['payload']
+        technique = record.get('technique', 'generic')
+        dbms = tuple(record.get('dbms', ()))
+        context = record.get('context')
+        markers = tuple(record.get('markers', ()))
+
+        raw_entries.append(PayloadEntry(payload, technique, dbms, context, 'raw', markers))
+        for encoding in record.get('encodings', ()):
+            if encoding not in ENCODERS:
+                raise ValueError(f"Строка {line_number}: неизвестная кодировка {encoding}")
+            encoded = ENCODERS[encoding](payload)
+            variants[encoding].append(PayloadEntry(encoded, technique, dbms, context, encoding))
+
+    entries = raw_entries
+    for encoding in ENCODERS:
+        entries.extend(variants[encoding])
+    return entries
+
+
+class PayloadCorpus:
+    """Payload entries indexed by technique, DBMS, context and encoding."""
+
+    def __init__(self, entries: List[PayloadEntry]):
+        self.entries = entries
+        self._index: Dict[Tuple[str, Optional[str]], List[int]] = {}
+        for position, entry in enumerate(entries):
+            keys = [('technique', entry.technique), ('context', entry.context), ('encoding', entry.encoding)]
+            keys.extend(('dbms', dbms) for dbms in entry.dbms)
+            for key in keys:
+                self._index.setdefault(key, []).append(position)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def values(self, tag: str) -> List[Optional[str]]:
+        """Distinct values of a tag in corpus order."""
+        return [value for key, value in self._index if key == tag]
+
+    def select(self, **tags) -> List[PayloadEntry]:
+        """
+        Entries matching all given tags, in corpus order.
+
+        ``select(technique='error_based', dbms='mysql', encoding='raw')``;
+        a ``None`` value matches entries without that tag (e.g. context=None).
+        """
+        positions = None
+        for tag, value in tags.items():
+            matched = self._index.get((tag, value), [])
+            positions = set(matched) if positions is None else positions.intersection(matched)
+            if not positions:
+                return []
+        if positions is None:
+            return list(self.entries)
+        return [self.entries[position] for position in sorted(positions)]
+
+    def payloads(self, **tags) -> List[str]:
+        return [entry.payload for entry in self.select(**tags)]
+
+    @classmethod
+    def load(cls, path: str, cache_dir: Optional[str] = None) -> 'PayloadCorpus':
+        """
+        Load a corpus file.
+
+        Parsed and encoded corpora are cached in memory for the lifetime of the
+        process and on disk, keyed by the content hash of the source, so
+        unchanged corpora are neither re-parsed nor re-encoded. The disk cache
+        is kept in the user cache directory (``default_cache_dir``), or as
+        ``<cache_dir>/<file>.cache.json`` when ``cache_dir`` is given; pass
+        the corpus directory to keep it beside the corpus.
+        """
+        with open(path, "rb") as f:
+            source = f.read()
+        digest = hashlib.sha256(source).hexdigest()
+        memory_key = (os.path.abspath(path), digest)
+
+        with _memory_lock:
+            if memory_key in _memory_cache:
+                return _memory_cache[memory_key]
+
+        cache_path = _cache_path(path, cache_dir)
+        entries = _read_cache(cache_path, digest)
+        if entries is None:
+            entries = parse_corpus(source.decode('utf-8'))
+            _write_cache(cache_path, digest, entries)
+
+        corpus = cls(entries)
+        with _memory_lock:
+            _memory_cache[memory_key] = corpus
+        return corpus
+
+
+def load_corpus(name: str, corpus_dir: Optional[str] = None) -> PayloadCorpus:
+    """Load ``<name>.jsonl`` from the corpus directory (bundled payloads by default)."""
+    return PayloadCorpus.load(os.path.join(corpus_dir or DEFAULT_CORPUS_DIR, f"{name}.jsonl"))
+
+
+def default_cache_dir() -> str:
+    """Per-user cache directory: XDG_CACHE_HOME, LOCALAPPDATA on Windows, or ~/.cache."""
+    base = os.environ.get('XDG_CACHE_HOME')
+    if not base and os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA')
+    base = base or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'automated-web-scanner', 'payloads')
+
+
+def _cache_path(path: str, cache_dir: Optional[str]) -> str:
+    if cache_dir:
+        return os.path.join(cache_dir, os.path.basename(path) + '.cache.json')
+    # Корпуса с одинаковыми именами из разных каталогов не вытесняют друг друга
+    source = hashlib.sha256(os.path.abspath(path).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(default_cache_dir(), f"{os.path.basename(path)}.{source}.cache.json")
+
+
+def _read_cache(cache_path: str, digest: str) -> Optional[List[PayloadEntry]]:
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # Кэш чужой версии или поврежденный - корпус просто разбирается заново
+    if not isinstance(data, dict) or data.get('version') != CACHE_VERSION or data.get('source_sha256') != digest:
+        return None
+    try:
+        return [PayloadEntry.from_row(row) for row in data['entries']]
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _write_cache(cache_path: str, digest: str, entries: List[PayloadEntry]):
+    # Кэш - только ускорение: каталог корпуса может быть недоступен для записи
+    try:
+        directory = os.path.dirname(os.path.abspath(cache_path))
+        os.makedirs(directory, exist_ok=True)
+        # Уникальный временный файл: кэш могут одновременно писать несколько процессов
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(cache_path), suffix='.tmp')
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({
+                'version': CACHE_VERSION,
+                'source_sha256': digest,
+                'entries': [entry.to_row() for entry in entries],
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        os.unlink(tmp_path)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Payload statistics store and bandit-style payload ordering.
+Дипломный проект - Автоматизированный веб-сканер
+"""
+
+import json
+import math
+import os
+import tempfile
+import threading
+from typing import Dict, List, Optional
+
+
+# Вес априорной оценки payload, выраженный в "виртуальных" попытках
+PRIOR_WEIGHT = 4.0
+
+# Коэффициент исследования в UCB: малое значение сохраняет статический порядок без данных
+EXPLORATION = 0.1
+
+# Сколько попыток payload нужно на теге технологии, чтобы оценка бралась по нему
+MIN_TAG_TRIALS = 3
+
+
+def technology_tags(server: Optional[str] = None, db: Optional[str] = None,
+                    context: Optional[str] = None) -> List[str]:
+    """Build statistics tags from detected technologies of a target, most general first."""
+    tags = ['any']
+    if server:
+        # "Apache/2.4.41 (Ubuntu)" -> "apache"
+        tags.append(f"server:{server.split('/')[0].split()[0].lower()}")
+    if db:
+        tags.append(f"db:{db.lower()}")
+    if context:
+        tags.append(f"context:{context}")
+    return tags
+
+
+class PayloadStats:
+    """
+    Records which payloads succeeded against which technologies and scores
+    payloads with an upper confidence bound for future scans.
+
+    Counters are kept per ``module -> tag -> payload`` as ``[trials, hits]``.
+    Facts learned about hosts (for example the DBMS behind an application)
+    are remembered so that later scans of the same host start with them.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.counters: Dict[str, Dict[str, Dict[str, List[int]]]] = {}
+        self.hosts: Dict[str, Dict[str, str]] = {}
+        self._totals: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+        # Одновременные сохранения (задания демона) записывают файл по очереди
+        self._save_lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Optional[str]) -> 'PayloadStats':
+        stats = cls(path)
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            stats.counters = data.get('counters', {})
+            stats.hosts = data.get('hosts', {})
+            for module, by_tag in stats.counters.items():
+                for tag, payloads in by_tag.items():
+                    stats._totals[(module, tag)] = sum(c[0] for c in payloads.values())
+        return stats
+
+    def save(self):
+        """Persist statistics; a no-op for in-memory stores."""
+        if not self.path:
+            return
+        with self._save_lock:
+            # Снимок сериализуется под блокировкой: record() меняет вложенные словари
+            with self._lock:
+                data = json.dumps({'counters': self.counters, 'hosts': self.hosts}, ensure_ascii=False)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)),
+                                            prefix=os.path.basename(self.path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+    def record(self, module: str, tags: List[str], payload: str, hit: bool):
+        with self._lock:
+            by_tag = self.counters.setdefault(module, {})
+            for tag in tags:
+                counter = by_tag.setdefault(tag, {}).setdefault(payload, [0, 0])
+                counter[0] += 1
+                counter[1] += int(hit)
+                self._totals[(module, tag)] = self._totals.get((module, tag), 0) + 1
+
+    def remember(self, host: str, fact: str, value: str):
+        with self._lock:
+            self.hosts.setdefault(host, {})[fact] = value
+
+    def host_fact(self, host: str, fact: str) -> Optional[str]:
+        return self.hosts.get(host, {}).get(fact)
+
+    def score(self, module: str, tags: List[str], payload: str, prior: float) -> float:
+        """
+        UCB score of a payload for the given technologies.
+
+        Counters of one tag are used: the most specific tag (the last in
+        ``tags``) with at least ``MIN_TAG_TRIALS`` trials of the payload, or
+        the most general one, so results on other technologies recorded
+        under ``any`` do not dilute the hit rate on this one. Without
+        recorded trials the score equals ``prior``, so the static ordering
+        of each module is kept until statistics accumulate.
+        """
+        by_tag = self.counters.get(module, {})
+        tag = tags[0] if tags else 'any'
+        for candidate in reversed(tags):
+            counter = by_tag.get(candidate, {}).get(payload)
+            if counter and counter[0] >= MIN_TAG_TRIALS:
+                tag = candidate
+                break
+        trials, hits = by_tag.get(tag, {}).get(payload) or (0, 0)
+        total = self._totals.get((module, tag), 0)
+
+        mean = (hits + prior * PRIOR_WEIGHT) / (trials + PRIOR_WEIGHT)
+        bonus = EXPLORATION * math.sqrt(2 * math.log(total + 1) / (trials + 1))
+        return mean + bonus
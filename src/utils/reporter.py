@@ -6,86 +6,157 @@ Reporter module for generating security scan reports.
 
 import json
 import datetime
+import itertools
 import os
-from typing import List, Dict, Any
+import sys
+from typing import Any, Dict, Iterator, Optional, TextIO
+
+from utils.findings import SEVERITY_ORDER, Finding, as_finding
+
+
+class SeveritySummary:
+    """Severity aggregates collected in the same pass that writes findings."""
+
+    def __init__(self):
+        self.counts = {severity: 0 for severity in SEVERITY_ORDER}
+        self.total = 0
+
+    def add(self, finding: Finding):
+        severity = finding.severity
+        self.counts[severity] = self.counts.get(severity, 0) + 1
+        self.total += 1
+
+    def rows(self) -> Iterator:
+        """(severity, count, percentage) for every severity level."""
+        for severity, count in self.counts.items():
+            percentage = (count / self.total * 100) if self.total > 0 else 0
+            yield severity, count, percentage
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'total_vulnerabilities': self.total, 'by_severity': dict(self.counts)}
+
+
+def open_report(filepath: str) -> TextIO:
+    """Open a report file for writing, creating its directory if needed."""
+    directory = os.path.dirname(filepath)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return open(filepath, "w", encoding="utf-8")
+
+
+def to_json(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
 
 
 class Reporter:
-    """Generates various types of security reports."""
-    
-    def __init__(self, output_dir: str = "security_reports"):
-        self.output_dir = output_dir
-    
-    def generate_json_report(self, 
-                           vulnerabilities: List[Dict[str, Any]], 
-                           filename: str = "security_report.json") -> str:
-        """Generate JSON format report."""
-        report = {
-            "scan_date": datetime.datetime.now().isoformat(),
-            "total_vulnerabilities": len(vulnerabilities),
-            "vulnerabilities": vulnerabilities
-        }
-        
-        os.makedirs(self.output_dir, exist_ok=True)
-        
-        filepath = f"{self.output_dir}/{filename}"
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(report, f, indent=2, ensure_ascii=False)
-        
+    """
+    Generates various types of security reports.
+
+    ``scan_results`` is the dict built by ``Scanner.run_scan``; its
+    ``vulnerabilities`` may be any iterable of findings (including a
+    generator), which is consumed exactly once while the report is written.
+    Findings are ``Finding`` records; legacy dicts are converted on the fly.
+    """
+
+    def __init__(self, scan_results: Dict[str, Any]):
+        self.scan_results = scan_results
+
+    def findings(self) -> Iterator[Finding]:
+        target = self.scan_results.get('target')
+        return (as_finding(item, target) for item in self.scan_results.get('vulnerabilities', []))
+
+    def warnings(self) -> Iterator[Finding]:
+        target = self.scan_results.get('target')
+        return (as_finding(item, target) for item in self.scan_results.get('warnings', []))
+
+    def scan_date(self) -> str:
+        return self.scan_results.get('timestamp') or datetime.datetime.now().isoformat()
+
+    def generate_json_report(self, filepath: str = "scan_report.json") -> str:
+        """Generate JSON format report, one finding per line."""
+        summary = SeveritySummary()
+        with open_report(filepath) as f:
+            f.write('{\n')
+            f.write(f'  "target": {to_json(self.scan_results.get("target", ""))},\n')
+            f.write(f'  "scan_date": {to_json(self.scan_date())},\n')
+            if self.scan_results.get('incomplete'):
+                f.write(f'  "incomplete": {to_json(self.scan_results["incomplete"])},\n')
+            f.write('  "vulnerabilities": [')
+            for i, vuln in enumerate(self.findings()):
+                summary.add(vuln)
+                f.write(',\n    ' if i else '\n    ')
+                f.write(to_json(vuln.to_dict()))
+            f.write('\n  ],\n')
+            f.write(f'  "warnings": {to_json([warning.to_dict() for warning in self.warnings()])},\n')
+            f.write(f'  "info": {to_json(list(self.scan_results.get("info", [])))},\n')
+            # Сводка пишется последней: она считается в том же проходе по находкам
+            f.write(f'  "summary": {to_json(summary.to_dict())}\n')
+            f.write('}\n')
         return filepath
-    
-    def generate_markdown_report(self, 
-                                vulnerabilities: List[Dict[str, Any]], 
-                                filename: str = "security_report.md") -> str:
+
+    def generate_jsonl_report(self, filepath: str = "scan_report.jsonl") -> str:
+        """
+        Generate JSON Lines report (one finding per line, suitable for diff).
+        Warnings follow the vulnerabilities, as in the JSON report; an
+        incomplete scan starts with an ``{"incomplete": reason}`` line.
+        """
+        with open_report(filepath) as f:
+            if self.scan_results.get('incomplete'):
+                f.write(to_json({'incomplete': self.scan_results['incomplete']}))
+                f.write('\n')
+            for finding in itertools.chain(self.findings(), self.warnings()):
+                f.write(to_json(finding.to_dict()))
+                f.write('\n')
+        return filepath
+
+    def generate_markdown_report(self, filepath: str = "scan_report.md") -> str:
         """Generate Markdown format report."""
-        os.makedirs(self.output_dir, exist_ok=True)
-        
-        filepath = f"{self.output_dir}/{filename}"
-        with open(filepath, "w", encoding="utf-8") as f:
+        summary = SeveritySummary()
+        with open_report(filepath) as f:
             f.write(f"# Security Scan Report\n\n")
-            f.write(f"**Date:** {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            f.write(f"**Total Vulnerabilities Found:** {len(vulnerabilities)}\n\n")
-            
-            if vulnerabilities:
-                f.write("## Vulnerabilities Details:\n\n")
-                for i, vuln in enumerate(vulnerabilities, 1):
-                    f.write(f"### {i}. {vuln.get('title', 'Vulnerability')}\n")
-                    f.write(f"- **Type:** {vuln.get('type', 'Unknown')}\n")
-                    f.write(f"- **Severity:** {vuln.get('severity', 'Medium')}\n")
-                    f.write(f"- **Description:** {vuln.get('description', '')}\n")
-                    f.write(f"- **Recommendation:** {vuln.get('recommendation', '')}\n\n")
+            f.write(f"**Target:** {self.scan_results.get('target', 'Unknown')}\n\n")
+            f.write(f"**Date:** {self.scan_date()}\n\n")
+            if self.scan_results.get('incomplete'):
+                f.write(f"**⚠️ Incomplete scan:** {self.scan_results['incomplete']}\n\n")
+            f.write("## Vulnerabilities Details:\n\n")
+            for i, vuln in enumerate(self.findings(), 1):
+                summary.add(vuln)
+                f.write(f"### {i}. {vuln.description}\n")
+                f.write(f"- **Type:** {vuln.type}\n")
+                f.write(f"- **Severity:** {vuln.severity}\n")
+                f.write(f"- **Parameter:** {vuln.parameter or '-'}\n")
+                f.write(f"- **Details:** {vuln.details or ''}\n\n")
+            if summary.total:
+                f.write(f"**Total Vulnerabilities Found:** {summary.total}\n")
             else:
                 f.write("## ✅ No vulnerabilities found\n")
-
-    def generate_console_report(self, scan_results):
-        """Generate console output for scan results."""
-        print("\n" + "="*80)
-        print("SECURITY SCAN REPORT")
-        print("="*80)
-        print(f"Target: {scan_results.get('target', 'Unknown')}")
-        print(f"Scan date: {scan_results.get('timestamp', 'Unknown')}")
-        
-        vulns = scan_results.get('vulnerabilities', [])
-        warnings = scan_results.get('warnings', [])
-        info = scan_results.get('info', [])
-        
-        print(f"\nVulnerabilities found: {len(vulns)}")
-        if vulns:
-            for i, vuln in enumerate(vulns, 1):
-                print(f"  {i}. {vuln.get('title', 'Unknown')} "
-                      f"(Severity: {vuln.get('severity', 'Medium')})")
-        
-        print(f"\nWarnings: {len(warnings)}")
-        if warnings:
-            for i, warning in enumerate(warnings, 1):
-                print(f"  {i}. {warning.get('title', 'Unknown')}")
-        
-        print(f"\nInfo messages: {len(info)}")
-        
-        print("\n" + "="*80)
-        print("END OF REPORT")
-        print("="*80)
-        
-        return scan_results
-        
         return filepath
+
+    def generate_console_report(self, stream: Optional[TextIO] = None) -> str:
+        """Print console output for scan results; returns the summary line."""
+        out = stream or sys.stdout
+        out.write("\n" + "=" * 80 + "\n")
+        out.write("SECURITY SCAN REPORT\n")
+        out.write("=" * 80 + "\n")
+        out.write(f"Target: {self.scan_results.get('target', 'Unknown')}\n")
+        out.write(f"Scan date: {self.scan_date()}\n")
+        if self.scan_results.get('incomplete'):
+            out.write(f"Incomplete scan: {self.scan_results['incomplete']}\n")
+
+        out.write("\nVulnerabilities:\n")
+        summary = SeveritySummary()
+        for vuln in self.findings():
+            summary.add(vuln)
+            out.write(f"  {summary.total}. {vuln.description} (Severity: {vuln.severity})\n")
+
+        out.write("\nWarnings:\n")
+        for i, warning in enumerate(self.warnings(), 1):
+            out.write(f"  {i}. {warning}\n")
+
+        out.write(f"\nInfo messages: {len(self.scan_results.get('info', []))}\n")
+        out.write("\n" + "=" * 80 + "\n")
+        out.write("END OF REPORT\n")
+        out.write("=" * 80 + "\n")
+
+        counts = ", ".join(f"{severity}: {count}" for severity, count, _ in summary.rows() if count)
+        return f"Vulnerabilities found: {summary.total}" + (f" ({counts})" if counts else "")
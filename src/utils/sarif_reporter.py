@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+SARIF 2.1.0 reporter for CI integrations (GitHub code scanning, GitLab).
+Дипломный проект - Автоматизированный веб-сканер
+"""
+
+from typing import Any, Dict, Iterator
+
+from utils.findings import Finding, as_finding
+from utils.reporter import open_report, to_json
+
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
+TOOL_NAME = "automated-web-scanner"
+
+# Соответствие severity сканера уровням SARIF
+SARIF_LEVELS = {
+    'critical': 'error',
+    'high': 'error',
+    'medium': 'warning',
+    'low': 'note',
+    'info': 'note',
+}
+
+
+class SARIFReporter:
+    """
+    Streams findings into a SARIF log.
+
+    Results are written as they are read; rule descriptors (one per finding
+    type) are collected on the way and written after the results, which
+    SARIF consumers accept since JSON object members are unordered.
+    """
+
+    def __init__(self, scan_results: Dict[str, Any]):
+        self.scan_results = scan_results
+
+    def findings(self) -> Iterator[Finding]:
+        target = self.scan_results.get('target')
+        return (as_finding(item, target) for item in self.scan_results.get('vulnerabilities', []))
+
+    def generate_report(self, filepath: str = "scan_report.sarif") -> str:
+        rules = {}
+
+        with open_report(filepath) as f:
+            f.write('{\n')
+            f.write(f'  "$schema": "{SARIF_SCHEMA}",\n')
+            f.write('  "version": "2.1.0",\n')
+            f.write('  "runs": [{\n')
+            f.write('    "results": [')
+            for i, vuln in enumerate(self.findings()):
+                rules.setdefault(vuln.type, vuln)
+                f.write(',\n      ' if i else '\n      ')
+                f.write(to_json(self._result(vuln)))
+            f.write('\n    ],\n')
+            f.write(f'    "invocations": [{to_json(self._invocation())}],\n')
+
+            driver = {
+                'name': TOOL_NAME,
+                'informationUri': 'https://github.com/LeoKnigh/automated-web-scanner',
+                'rules': [self._rule(rule_id, vuln) for rule_id, vuln in rules.items()],
+            }
+            f.write(f'    "tool": {{"driver": {to_json(driver)}}}\n')
+            f.write('  }]\n')
+            f.write('}\n')
+
+        return filepath
+
+    def _invocation(self) -> Dict[str, Any]:
+        """Stopped scans are reported as unsuccessful executions with the reason."""
+        reason = self.scan_results.get('incomplete')
+        invocation = {'executionSuccessful': not reason}
+        if reason:
+            invocation['toolExecutionNotifications'] = [{'level': 'warning', 'message': {'text': reason}}]
+        return invocation
+
+    def _rule(self, rule_id: str, example: Finding) -> Dict[str, Any]:
+        return {
+            'id': rule_id,
+            'name': rule_id.title().replace('_', ''),
+            'shortDescription': {'text': rule_id.replace('_', ' ').capitalize()},
+            'defaultConfiguration': {
+                'level': SARIF_LEVELS.get(example.severity, 'warning')
+            },
+        }
+
+    def _location(self, vuln: Finding) -> Dict[str, Any]:
+        """Artifact of the finding; SAST findings (url "path:line") also get the line region."""
+        location = {'artifactLocation': {'uri': vuln.target or ''}}
+        if vuln.target and vuln.url and vuln.url.startswith(vuln.target + ':'):
+            line = vuln.url[len(vuln.target) + 1:]
+            if line.isdigit() and int(line) > 0:
+                location['region'] = {'startLine': int(line)}
+        return location
+
+    def _result(self, vuln: Finding) -> Dict[str, Any]:
+        data = vuln.to_dict()
+        return {
+            'ruleId': vuln.type,
+            'level': SARIF_LEVELS.get(vuln.severity, 'warning'),
+            'message': {'text': vuln.description},
+            'locations': [{'physicalLocation': self._location(vuln)}],
+            'partialFingerprints': {'scannerFingerprint/v1': vuln.fingerprint},
+            'properties': {
+                key: data[key]
+                for key in ('severity', 'module', 'parameter', 'payload_type', 'details', 'url')
+                if key in data
+            },
+        }
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Incremental static analysis: Bandit and Semgrep in parallel with a per-file result cache.
+Дипломный проект - Автоматизированный веб-сканер
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.findings import Finding, finding_fingerprint, normalize_payload_class
+
+
+DEFAULT_CACHE_PATH = '.sast.cache.json'
+
+DEFAULT_SEMGREP_CONFIGS = ['custom-opengrep-rules.yml']
+
+CACHE_VERSION = 1
+
+# Меньше файлов на процесс не дает выигрыша: запуск инструмента дороже анализа
+MIN_CHUNK_SIZE = 8
+
+SEMGREP_SEVERITIES = {'ERROR': 'high', 'WARNING': 'medium', 'INFO': 'low'}
+
+
+class SASTError(Exception):
+    """A static analysis tool failed or produced unreadable output."""
+
+
+def file_hash(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def source_line(root: str, path: str, line: int) -> str:
+    try:
+        with open(os.path.join(root, path), encoding='utf-8', errors='replace') as f:
+            for number, text in enumerate(f, 1):
+                if number == line:
+                    return text.strip()
+    except OSError:
+        pass
+    return ''
+
+
+def sast_finding(root: str, path: str, line: int, rule: str, severity: str, message: str,
+                 module: str, details: Optional[str] = None, cwe: Optional[str] = None) -> Finding:
+    """
+    Finding for a static analysis result. The flagged source line, not its
+    number, identifies it, so code moving within the file keeps the fingerprint.
+    """
+    # Bandit добавляет "./" к путям: приводим к виду, в котором файлы лежат в кэше
+    if os.path.isabs(path):
+        path = os.path.relpath(path, root)
+    path = os.path.normpath(path).replace(os.sep, '/')
+    finding_type = normalize_payload_class(rule).upper()
+    code = source_line(root, path, line)
+    return Finding(
+        finding_type, severity, '{evidence}',
+        details=(details or '').replace('{', '{{').replace('}', '}}') or None,
+        module=module, target=path, payload_type=cwe, evidence=message,
+        url=f"{path}:{line}",
+        fingerprint=finding_fingerprint(path, finding_type, normalize_payload_class(code), cwe)
+    )
+
+
+def number_occurrences(findings: List[Finding]) -> List[Finding]:
+    """
+    Distinct fingerprints for identical flagged lines in one file.
+
+    Copies of the same line under the same rule share a fingerprint; the
+    second and later ones in source order get an occurrence index mixed in,
+    so the first keeps the fingerprint it would have on its own.
+    """
+    seen: Dict[str, int] = {}
+    numbered = []
+    for finding in sorted(findings, key=lambda f: (f.target, int(f.url.rsplit(':', 1)[1]))):
+        index = seen.get(finding.fingerprint, 0)
+        seen[finding.fingerprint] = index + 1
+        if index:
+            fingerprint = hashlib.sha256(f"{finding.fingerprint}#{index}".encode('utf-8')).hexdigest()[:24]
+            finding = Finding.from_dict(dict(finding.to_dict(), fingerprint=fingerprint))
+        numbered.append(finding)
+    return numbered
+
+
+def git_changed_files(root: str, since: str) -> List[str]:
+    """Files changed since ``since`` (committed, uncommitted and untracked)."""
+    def git(*args):
+        result = subprocess.run(['git', *args], cwd=root, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise SASTError(result.stderr.strip() or f"git {args[0]} завершился с ошибкой")
+        return [line for line in result.stdout.splitlines() if line]
+
+    # Пути относительно root, даже если он вложен в репозиторий
+    changed = git('diff', '--name-only', '--diff-filter=d', '--relative', since)
+    changed += git('ls-files', '--others', '--exclude-standard')
+    return sorted(set(changed))
+
+
+def python_files(root: str, paths: Iterable[str]) -> List[str]:
+    """Python files under ``paths``, relative to ``root``."""
+    files = set()
+    for path in paths:
+        full_path = os.path.join(root, path)
+        if os.path.isfile(full_path):
+            files.add(os.path.relpath(full_path, root))
+            continue
+        for directory, subdirs, names in os.walk(full_path):
+            subdirs[:] = [d for d in subdirs if not d.startswith('.') and d != '__pycache__']
+            for name in names:
+                if name.endswith('.py'):
+                    files.add(os.path.relpath(os.path.join(directory, name), root))
+    return sorted(path.replace(os.sep, '/') for path in files)
+
+
+class SASTTool:
+    """One analyzer run as a subprocess over a list of files with JSON output."""
+
+    name = ''
+    executable = ''
+
+    def __init__(self, timeout: float = 600):
+        self.timeout = timeout
+        self._version: Optional[str] = None
+
+    def available(self) -> bool:
+        return shutil.which(self.executable) is not None
+
+    def version(self) -> str:
+        if self._version is None:
+            try:
+                result = subprocess.run([self.executable, '--version'], capture_output=True, text=True,
+                                        timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                raise SASTError(f"{self.name}: --version не ответил за {self.timeout:.0f} с")
+            self._version = result.stdout.strip()
+        return self._version
+
+    def ruleset(self, root: str) -> List[str]:
+        """What besides the tool version decides the results for an unchanged file."""
+        return []
+
+    def ruleset_hash(self, root: str) -> str:
+        digest = hashlib.sha256()
+        for part in [self.name, self.version(), *self.ruleset(root)]:
+            digest.update(part.encode('utf-8') + b'\0')
+        return digest.hexdigest()[:16]
+
+    def command(self, files: List[str]) -> List[str]:
+        raise NotImplementedError
+
+    def parse(self, root: str, output: Dict[str, Any]) -> List[Finding]:
+        raise NotImplementedError
+
+    def run(self, root: str, files: List[str]) -> List[Finding]:
+        try:
+            result = subprocess.run(self.command(files), cwd=root, capture_output=True, text=True,
+                                    timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            raise SASTError(f"{self.name}: превышено время анализа ({self.timeout:.0f} с)")
+        try:
+            output = json.loads(result.stdout)
+        except ValueError:
+            raise SASTError(f"{self.name}: {(result.stderr.strip() or 'нет JSON вывода')[:200]}")
+        return self.parse(root, output)
+
+
+class BanditTool(SASTTool):
+    name = 'Bandit'
+    executable = 'bandit'
+
+    def __init__(self, config: Optional[str] = None, timeout: float = 600):
+        super().__init__(timeout)
+        self.config = config
+
+    def ruleset(self, root: str) -> List[str]:
+        if not self.config:
+            return []
+        return [self.config, file_hash(os.path.join(root, self.config))]
+
+    def command(self, files: List[str]) -> List[str]:
+        command = [self.executable, '-f', 'json', '-q', '--exit-zero']
+        if self.config:
+            command += ['-c', self.config]
+        return command + files
+
+    def parse(self, root: str, output: Dict[str, Any]) -> List[Finding]:
+        findings = []
+        for result in output.get('results', []):
+            cwe = result.get('issue_cwe', {}).get('id')
+            findings.append(sast_finding(
+                root, result['filename'], result['line_number'], result['test_name'],
+                result['issue_severity'].lower(), result['issue_text'], self.name,
+                details=f"{result['test_id']}, уверенность: {result['issue_confidence'].lower()}",
+                cwe=f"CWE-{cwe}" if cwe else None
+            ))
+        return findings
+
+
+class SemgrepTool(SASTTool):
+    """
+    Semgrep (or OpenGrep) with local rule files or registry configs.
+
+    Registry configs (``p/python``) are hashed by name only: a cache built
+    with them is refreshed with ``--no-cache`` after the registry changes.
+    """
+
+    name = 'Semgrep'
+    executable = 'semgrep'
+
+    def __init__(self, configs: Optional[List[str]] = None, timeout: float = 600):
+        super().__init__(timeout)
+        self.configs = configs or DEFAULT_SEMGREP_CONFIGS
+
+    def ruleset(self, root: str) -> List[str]:
+        parts = []
+        for config in self.configs:
+            path = os.path.join(root, config)
+            parts += [config, file_hash(path) if os.path.isfile(path) else '']
+        return parts
+
+    def command(self, files: List[str]) -> List[str]:
+        command = [self.executable, 'scan', '--json', '--quiet', '--metrics=off', '--disable-version-check']
+        for config in self.configs:
+            command += ['--config', config]
+        return command + files
+
+    def parse(self, root: str, output: Dict[str, Any]) -> List[Finding]:
+        findings = []
+        for result in output.get('results', []):
+            extra = result.get('extra', {})
+            cwe = extra.get('metadata', {}).get('cwe')
+            if isinstance(cwe, list):
+                cwe = cwe[0] if cwe else None
+            findings.append(sast_finding(
+                root, result['path'], result['start']['line'], result['check_id'].rsplit('.', 1)[-1],
+                SEMGREP_SEVERITIES.get(extra.get('severity'), 'medium'), extra.get('message', ''),
+                self.name, details=result['check_id'], cwe=cwe.split(':')[0] if cwe else None
+            ))
+        return findings
+
+
+class SASTCache:
+    """
+    Findings per tool and file, valid while the file content and the tool's
+    rule set are unchanged. Semgrep and Bandit rules look at one file at a
+    time, so an unchanged file gives the same results.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.entries: Dict[str, Dict[str, list]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Optional[str]) -> 'SASTCache':
+        cache = cls(path)
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    data = json.load(f)
+            except ValueError:
+                return cache  # Поврежденный кэш просто строится заново
+            if isinstance(data, dict) and data.get('version') == CACHE_VERSION:
+                cache.entries = data.get('entries', {})
+        return cache
+
+    def get(self, tool: str, path: str, content_hash: str, ruleset_hash: str) -> Optional[List[Finding]]:
+        entry = self.entries.get(tool, {}).get(path)
+        if entry is None or entry[0] != content_hash or entry[1] != ruleset_hash:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return [Finding.from_dict(data) for data in entry[2]]
+
+    def put(self, tool: str, path: str, content_hash: str, ruleset_hash: str, findings: List[Finding]):
+        with self._lock:
+            self.entries.setdefault(tool, {})[path] = [
+                content_hash, ruleset_hash, [finding.to_dict() for finding in findings]
+            ]
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = json.dumps({'version': CACHE_VERSION, 'entries': self.entries}, ensure_ascii=False)
+        # Уникальный временный файл: параллельные запуски не пишут в один и тот же
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)),
+                                        prefix=os.path.basename(self.path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+class SASTRunner:
+    """
+    Runs the tools over files that have no valid cached results.
+
+    Uncached files are split into chunks and every (tool, chunk) pair runs
+    as its own subprocess, so the tools and parts of a large change set are
+    analyzed in parallel.
+    """
+
+    def __init__(self, root: str, tools: List[SASTTool], cache: Optional[SASTCache] = None,
+                 jobs: Optional[int] = None):
+        self.root = root
+        self.tools = tools
+        self.cache = cache or SASTCache()
+        self.jobs = jobs or os.cpu_count() or 1
+        self.info: List[str] = []
+        self.errors: List[str] = []
+
+    def _chunks(self, files: List[str]) -> List[List[str]]:
+        size = max(MIN_CHUNK_SIZE, -(-len(files) // self.jobs))
+        return [files[i:i + size] for i in range(0, len(files), size)]
+
+    def run(self, files: List[str]) -> List[Finding]:
+        hashes = {path: file_hash(os.path.join(self.root, path)) for path in files}
+        findings: List[Finding] = []
+        tasks: List[Tuple[SASTTool, str, List[str]]] = []
+
+        for tool in self.tools:
+            if not tool.available():
+                self.errors.append(f"{tool.name} не установлен: {tool.executable} не найден в PATH")
+                continue
+            try:
+                ruleset_hash = tool.ruleset_hash(self.root)
+            except SASTError as e:
+                self.errors.append(str(e))
+                continue
+            pending = []
+            for path in files:
+                cached = self.cache.get(tool.name, path, hashes[path], ruleset_hash)
+                if cached is None:
+                    pending.append(path)
+                else:
+                    findings.extend(cached)
+            self.info.append(f"{tool.name}: {len(files) - len(pending)} из {len(files)} файлов из кэша")
+            tasks += [(tool, ruleset_hash, chunk) for chunk in self._chunks(pending)]
+
+        if tasks:
+            with ThreadPoolExecutor(max_workers=min(self.jobs, len(tasks))) as executor:
+                futures = {
+                    executor.submit(tool.run, self.root, chunk): (tool, ruleset_hash, chunk)
+                    for tool, ruleset_hash, chunk in tasks
+                }
+                for future in as_completed(futures):
+                    tool, ruleset_hash, chunk = futures[future]
+                    try:
+                        results = future.result()
+                    except SASTError as e:
+                        # Файлы неудачного запуска не кэшируются и проверяются в следующий раз
+                        self.errors.append(str(e))
+                        continue
+                    # Все находки файла приходят из одного запуска: нумерация повторов стабильна
+                    results = number_occurrences(results)
+                    by_file: Dict[str, List[Finding]] = {path: [] for path in chunk}
+                    for finding in results:
+                        by_file.setdefault(finding.target, []).append(finding)
+                    for path in chunk:
+                        self.cache.put(tool.name, path, hashes[path], ruleset_hash, by_file[path])
+                    findings.extend(results)
+
+        self.cache.save()
+        return findings
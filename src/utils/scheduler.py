@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Request budget planner and prioritized probe scheduler.
+Дипломный проект - Автоматизированный веб-сканер
+"""
+
+import heapq
+import itertools
+import time
+from collections import namedtuple
+from typing import Iterator, Optional
+
+
+# Вес риска параметра при расчете приоритета пробы
+RISK_WEIGHTS = {'high': 2.0, 'medium': 1.5, 'low': 1.0}
+
+# Ключевые слова в имени поля, повышающие риск до high
+HIGH_RISK_KEYWORDS = ['user', 'name', 'id', 'query', 'search']
+
+Probe = namedtuple('Probe', ['parameter', 'payload', 'payload_type', 'expected_yield', 'cost', 'risk'])
+
+
+def parameter_risk(name: str, field_type: str = 'text') -> str:
+    """Risk score of an input field or query parameter (low/medium/high)."""
+    risk = 'low'
+    if field_type in ['text', 'search', 'email', 'password']:
+        risk = 'medium'
+    if any(keyword in name.lower() for keyword in HIGH_RISK_KEYWORDS):
+        risk = 'high'
+    return risk
+
+
+def probe_priority(probe: Probe) -> float:
+    """Expected value of a probe per unit of cost."""
+    return probe.expected_yield * RISK_WEIGHTS.get(probe.risk, 1.0) / max(probe.cost, 1e-6)
+
+
+class RequestBudget:
+    """
+    Per-target budget of HTTP requests and wall-clock seconds.
+
+    Requests are charged with ``spend`` by whoever sends them, so probes
+    batched into one request cost one request, and parameter discovery and
+    re-tests are charged as well. ``None`` for either limit means unlimited. Cost of a probe is measured in
+    expected seconds, so a time-based payload that sleeps on the server is
+    not started when it can no longer fit into the remaining time. A cancel
+    token adds the global scan deadline on top of the per-target limits.
+    """
+
+    def __init__(self, max_requests: Optional[int] = None, max_seconds: Optional[float] = None,
+                 cancel_token=None):
+        self.max_requests = max_requests
+        self.max_seconds = max_seconds
+        self.cancel_token = cancel_token
+        # Пробы пропускались из-за общего дедлайна: результаты цели неполные
+        self.deadline_reached = False
+        self.used_requests = 0
+        self.started = time.monotonic()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining_seconds(self) -> Optional[float]:
+        limits = []
+        if self.max_seconds is not None:
+            limits.append(max(0.0, self.max_seconds - self.elapsed()))
+        if self.cancel_token is not None and self.cancel_token.remaining() is not None:
+            limits.append(self.cancel_token.remaining())
+        return min(limits) if limits else None
+
+    def exhausted(self) -> bool:
+        if self.cancel_token is not None and self.cancel_token.cancelled:
+            self.deadline_reached = True
+            return True
+        if self.max_requests is not None and self.used_requests >= self.max_requests:
+            return True
+        remaining = self.remaining_seconds()
+        return remaining is not None and remaining <= 0
+
+    def fits(self, cost: float) -> bool:
+        """Whether a probe with the given expected duration can still run."""
+        remaining = self.remaining_seconds()
+        if remaining is None or cost <= remaining:
+            return True
+        # Проба не помещается из-за общего дедлайна, а не бюджета самой цели
+        own_remaining = None if self.max_seconds is None else self.max_seconds - self.elapsed()
+        if own_remaining is None or cost <= own_remaining:
+            self.deadline_reached = True
+        return False
+
+    def spend(self, requests: int = 1):
+        self.used_requests += requests
+
+
+class ProbeScheduler:
+    """
+    Orders probes by expected value and hands them out until the budget is
+    spent or the result for their parameter is settled.
+    """
+
+    def __init__(self, budget: Optional[RequestBudget] = None,
+                 per_parameter_limit: Optional[int] = None):
+        self.budget = budget or RequestBudget()
+        self.per_parameter_limit = per_parameter_limit
+        self.skipped = 0
+        self._heap = []
+        self._counter = itertools.count()
+        self._settled = set()
+        self._issued = {}
+
+    def add(self, probe: Probe):
+        # Счетчик сохраняет исходный порядок payload при равном приоритете
+        heapq.heappush(self._heap, (-probe_priority(probe), next(self._counter), probe))
+
+    def settle(self, parameter: str):
+        """Mark the result for a parameter as known; its remaining probes are dropped."""
+        self._settled.add(parameter)
+
+    def is_settled(self, parameter: str) -> bool:
+        return parameter in self._settled
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __iter__(self) -> Iterator[Probe]:
+        while self._heap:
+            probe = heapq.heappop(self._heap)[2]
+
+            if probe.parameter in self._settled:
+                continue
+
+            issued = self._issued.get(probe.parameter, 0)
+            if self.per_parameter_limit is not None and issued >= self.per_parameter_limit:
+                continue
+
+            if self.budget.exhausted():
+                self.skipped += self._unissued([probe] + [rest for _, _, rest in self._heap])
+                self._heap = []
+                return
+
+            if not self.budget.fits(probe.cost):
+                self.skipped += 1
+                continue
+
+            self._issued[probe.parameter] = issued + 1
+            yield probe
+
+    def _unissued(self, probes) -> int:
+        """How many of ``probes`` would still have been issued without the budget."""
+        counts = {}
+        for probe in probes:
+            if probe.parameter in self._settled:
+                continue
+            issued = self._issued.get(probe.parameter, 0) + counts.get(probe.parameter, 0)
+            if self.per_parameter_limit is not None and issued >= self.per_parameter_limit:
+                continue
+            counts[probe.parameter] = counts.get(probe.parameter, 0) + 1
+        return sum(counts.values())
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP transport: one session for all modules and worker threads.
+Дипломный проект - Автоматизированный веб-сканер
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+import requests
+from urllib3.util.request import ACCEPT_ENCODING
+
+from utils.cancellation import CancelToken, ScanCancelled
+from utils.netcache import DEFAULT_DNS_TTL, CachingHTTPAdapter, NetworkCache
+
+
+# Остаток тела, который дочитывается после нужного префикса, чтобы
+# соединение вернулось в пул; больший остаток обрывается закрытием
+DRAIN_LIMIT = 8 * 1024
+
+# Коды, которыми серверы отвечают на HEAD, если метод не поддерживается
+HEAD_UNSUPPORTED = (405, 501)
+
+# Сколько исходных страниц хранится: пакетные и нагрузочные запуски
+# проходят тысячи целей, старые страницы вытесняются
+BASELINE_CACHE_SIZE = 256
+
+# Загрузки исходных страниц разделены по URL между блокировками, чтобы
+# одна страница скачивалась один раз без словаря блокировок на каждый URL
+BASELINE_LOCKS = 64
+
+
+class Transport:
+    """
+    Wraps a single ``requests.Session`` so that connection pools, cookies and
+    authentication state are shared by every module of a scan.
+
+    Unmodified target pages are fetched once and kept in a bounded LRU cache
+    (``baseline``), and an optional authenticator is consulted before and after each request to
+    log in and to recover from an expired session. Every request checks the
+    cancel token first and has its timeout capped to the scan deadline.
+
+    Passing an existing ``adapter`` gives the transport its own cookies and
+    cancel token on top of warm connection pools owned by someone else.
+
+    The authenticator logs in with ``send``, which skips the login checks
+    but still honours the cancel token and the deadline.
+
+    A request sent with ``relogin=False`` is not checked for an expired
+    session: a probe that replaces the session's cookies would otherwise
+    trigger a login and be re-sent with the same replaced cookies.
+
+    Checks declare how much of a response they need with ``max_bytes``:
+    ``0`` for headers only (a HEAD request), ``N`` for the first ``N``
+    decoded bytes of the body (a GET closed early) and ``None`` for the
+    whole body. Truncated responses are marked with ``partial = True``.
+    """
+
+    def __init__(self, auth=None, verify: bool = False, pool_size: int = 20,
+                 cancel_token: Optional[CancelToken] = None, dns_ttl: float = DEFAULT_DNS_TTL,
+                 adapter: Optional[CachingHTTPAdapter] = None):
+        self.session = requests.Session()
+        # Соединения используют общий кэш DNS и возобновляют TLS сессии
+        self._owns_adapter = adapter is None
+        if adapter is None:
+            adapter = CachingHTTPAdapter(NetworkCache(dns_ttl), pool_connections=pool_size, pool_maxsize=pool_size)
+        self.adapter = adapter
+        self.network_cache = adapter.network_cache
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # Сжатие запрашивается явно; urllib3 распаковывает тело по мере чтения
+        # (br и zstd - если установлены brotli и zstandard)
+        self.session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        self.verify = verify
+        self.auth = auth
+        self.cancel_token = cancel_token or CancelToken()
+        # После отмены пул соединений закрывается, новые запросы не отправляются
+        self.cancel_token.on_cancel(self.close)
+        self.requests_sent = 0
+        # Байты тел ответов, полученные из сети (до распаковки)
+        self.bytes_received = 0
+        # Вызывается после каждого запроса: on_request(method, url, elapsed, error)
+        self.on_request: Optional[Callable] = None
+        self._baselines: 'OrderedDict[str, requests.Response]' = OrderedDict()
+        self._baseline_locks = [threading.Lock() for _ in range(BASELINE_LOCKS)]
+        self._lock = threading.Lock()
+
+    def request(self, method: str, url: str, max_bytes: Optional[int] = None, relogin: bool = True,
+                **kwargs) -> requests.Response:
+        generation = None
+        if self.auth is not None:
+            generation = self.auth.ensure_logged_in(self)
+
+        response = self.send(method, url, max_bytes, **kwargs)
+
+        if relogin and self.auth is not None and self.auth.is_expired(response):
+            # Повторный вход выполняется один раз для всех запросов "в полете"
+            self.auth.relogin(self, generation)
+            response = self.send(method, url, max_bytes, **kwargs)
+
+        return response
+
+    def send(self, method: str, url: str, max_bytes: Optional[int] = None, **kwargs) -> requests.Response:
+        """One request without the login checks of ``request``."""
+        kwargs.setdefault('verify', self.verify)
+        self.cancel_token.check()
+        if 'timeout' in kwargs:
+            kwargs['timeout'] = self.cancel_token.timeout(kwargs['timeout'])
+        if max_bytes is not None:
+            kwargs['stream'] = True
+        with self._lock:
+            self.requests_sent += 1
+        started = time.monotonic()
+        error = None
+        try:
+            response = self.session.request(method, url, **kwargs)
+            if max_bytes is not None:
+                self._read_prefix(response, max_bytes)
+        except requests.exceptions.RequestException as e:
+            error = e
+            # Таймаут, обрезанный дедлайном, не должен выглядеть как time-based SQLi
+            if self.cancel_token.cancelled:
+                raise ScanCancelled(self.cancel_token.reason) from e
+            raise
+        finally:
+            if self.on_request is not None:
+                self.on_request(method, url, time.monotonic() - started, error)
+        if not kwargs.get('stream'):
+            with self._lock:
+                self.bytes_received += response.raw.tell()
+        return response
+
+    def _read_prefix(self, response: requests.Response, max_bytes: int):
+        """Read about ``max_bytes`` of the decoded body, then release or drop the connection."""
+        raw = response.raw
+
+        def enough(size):
+            # Небольшой остаток дочитывается: ответ полный, соединение возвращается в пул
+            remaining = raw.length_remaining
+            return size >= max_bytes and (remaining is None or remaining > DRAIN_LIMIT)
+
+        chunks, size = [], 0
+        complete = not enough(0)
+        if complete:
+            # Распакованная порция может быть больше прочитанной сжатой
+            for chunk in raw.stream(16 * 1024, decode_content=True):
+                chunks.append(chunk)
+                size += len(chunk)
+                if enough(size):
+                    complete = False
+                    break
+        if not complete:
+            raw.close()  # Обрыв соединения дешевле скачивания остатка
+        with self._lock:
+            self.bytes_received += raw.tell()
+
+        response._content = b''.join(chunks)
+        response._content_consumed = True
+        response.partial = not complete or response.request.method == 'HEAD'
+        response.close()
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        return self.request('HEAD', url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def fetch(self, url: str, max_bytes: Optional[int] = None, **kwargs) -> requests.Response:
+        """GET reading only what the check needs; headers only are requested with HEAD."""
+        if max_bytes == 0:
+            response = self.head(url, allow_redirects=True, max_bytes=0, **kwargs)
+            if response.status_code not in HEAD_UNSUPPORTED:
+                return response
+        return self.get(url, max_bytes=max_bytes, **kwargs)
+
+    def baseline(self, url: str, timeout: float = 10, max_bytes: Optional[int] = None) -> requests.Response:
+        """
+        Unmodified response for ``url``, fetched once per transport. A cached
+        partial response serves later checks that need no more than it has.
+        """
+        cached = self._cached(url)
+        if cached is not None and covers(cached, max_bytes):
+            return cached
+
+        with self._baseline_locks[hash(url) % BASELINE_LOCKS]:
+            cached = self._cached(url)
+            if cached is None or not covers(cached, max_bytes):
+                cached = self.fetch(url, max_bytes, timeout=timeout)
+                with self._lock:
+                    self._baselines[url] = cached
+                    if len(self._baselines) > BASELINE_CACHE_SIZE:
+                        self._baselines.popitem(last=False)
+            return cached
+
+    def cached_baseline(self, url: str) -> Optional[requests.Response]:
+        cached = self._cached(url)
+        return cached if cached is not None and covers(cached, None) else None
+
+    def _cached(self, url: str) -> Optional[requests.Response]:
+        with self._lock:
+            cached = self._baselines.get(url)
+            if cached is not None:
+                self._baselines.move_to_end(url)
+            return cached
+
+    def close(self):
+        # Чужой адаптер с общими пулами соединений остается открытым
+        if self._owns_adapter:
+            self.session.close()
+
+
+def covers(response: requests.Response, max_bytes: Optional[int]) -> bool:
+    """Whether ``response`` holds what a check needing ``max_bytes`` of the body reads."""
+    if not getattr(response, 'partial', False):
+        return True
+    if max_bytes is None:
+        return False
+    # Ответ на HEAD не содержит тела
+    return max_bytes == 0 or (response.request.method != 'HEAD' and len(response.content) >= max_bytes)
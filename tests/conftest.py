@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Сканер запускается как src/scanner.py, поэтому модули импортируются от src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
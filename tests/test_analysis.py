@@ -0,0 +1,45 @@
+import requests
+
+from modules.sql_scanner import AdvancedSQLScanner
+from utils.analysis import AnalysisPool, analyze_sqli_response, extract_page_structure
+
+
+def test_sqli_response_detects_mysql_error():
+    """Ошибка MySQL распознается в теле ответа"""
+    body = b"You have an error in your SQL syntax; check the manual for MySQL"
+    analysis = analyze_sqli_response(body, 'utf-8', len(body))
+    assert analysis['db'] == 'mysql'
+    assert analysis['sql_error_text']
+
+
+def test_page_structure_extracts_forms():
+    """Формы и поля извлекаются без значений по умолчанию"""
+    html = b'<form method="post"><input name="user" type="text"><input name="q"></form><script></script>'
+    page = extract_page_structure(html, None)
+    assert page['forms'][0]['method'] == 'post'
+    assert page['forms'][0]['inputs'] == [('user', 'text'), ('q', None)]
+    assert page['script_tags'] == 1
+
+
+def test_analysis_pool_runs_in_worker_processes():
+    """Результат из процесса-воркера совпадает с анализом в основном процессе"""
+    body = b"ORA-01756: quoted string not properly terminated"
+    with AnalysisPool(workers=1) as pool:
+        remote = pool.submit(analyze_sqli_response, body, 'utf-8', 10).result()
+    assert remote == analyze_sqli_response(body, 'utf-8', 10)
+    assert remote['db'] == 'oracle'
+
+
+def test_baseline_length_uses_the_probe_decoding():
+    """Эталон и ответ на пробу без charset декодируются одинаково: длины сравнимы"""
+    # UTF-8 страница без charset, которую угадывание кодировки requests принимает за CP932
+    body = ('<p>' + 'été café ' * 30 + '</p>').encode('utf-8')
+    response = requests.Response()
+    response._content = body
+    response.encoding = None
+    scanner = AdvancedSQLScanner('http://example.com/?id=1')
+    scanner.executor.baseline = lambda point=None: response
+
+    baseline_length, _ = scanner.fetch_baseline()
+    analysis = analyze_sqli_response(body, response.encoding, baseline_length)
+    assert analysis['length_ratio'] == 0
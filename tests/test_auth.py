@@ -0,0 +1,27 @@
+import threading
+
+from utils.auth import Authenticator, parse_fields
+
+
+class CountingAuth(Authenticator):
+    def login(self, transport):
+        self.session_value = self.logins
+
+
+def test_expired_session_relogin_happens_once_for_inflight_requests():
+    """Запросы, заметившие истечение одной и той же сессии, вызывают один повторный вход"""
+    auth = CountingAuth()
+    seen = auth.ensure_logged_in(transport=None)
+
+    threads = [threading.Thread(target=auth.relogin, args=(None, seen)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert auth.logins == 2
+    assert auth.generation == seen + 1
+
+
+def test_parse_extra_form_fields():
+    assert parse_fields(['Login=Login', 'token=a=b']) == {'Login': 'Login', 'token': 'a=b'}
@@ -0,0 +1,42 @@
+import time
+
+import pytest
+
+from utils.auth import FormAuth
+from utils.cancellation import CancelToken, ScanCancelled
+from utils.scheduler import Probe, ProbeScheduler, RequestBudget
+from utils.transport import Transport
+
+
+def test_deadline_cancels_token_and_caps_timeouts():
+    token = CancelToken(max_duration=0.2)
+    assert not token.cancelled
+    assert token.timeout(10) <= 0.2
+    time.sleep(0.25)
+    assert token.cancelled
+    with pytest.raises(ScanCancelled):
+        token.check()
+
+
+def test_cancelled_scan_stops_probes_and_requests():
+    """После отмены планировщик не выдает пробы, а транспорт не отправляет запросы"""
+    token = CancelToken()
+    budget = RequestBudget(cancel_token=token)
+    scheduler = ProbeScheduler(budget)
+    for i in range(3):
+        scheduler.add(Probe('id', f'p{i}', 'test', 0.5, 1.0, 'high'))
+
+    issued = []
+    for probe in scheduler:
+        issued.append(probe.payload)
+        token.cancel("прервано пользователем")
+    assert issued == ['p0']
+    assert budget.deadline_reached
+
+    transport = Transport(cancel_token=token)
+    with pytest.raises(ScanCancelled):
+        transport.get('http://127.0.0.1:9/', timeout=1)
+    # Вход через форму тоже идет через транспорт и останавливается отменой
+    with pytest.raises(ScanCancelled):
+        FormAuth('http://127.0.0.1:9/login', 'admin', 'password').login(transport)
+    assert transport.requests_sent == 0
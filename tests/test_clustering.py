@@ -0,0 +1,38 @@
+from utils.clustering import PageClusterer, hamming_distance, structure_simhash
+
+
+ITEM_PAGE = """<html><head><title>{title}</title></head><body>
+<div class="nav"><a href="/">Home</a><a href="/catalog">Catalog</a></div>
+<div class="item"><h1>{title}</h1><p class="price">{price}</p>
+<form action="/cart" method="post"><input type="hidden" name="id" value="{id}">
+<input type="submit" value="Buy"></form></div></body></html>"""
+
+LOGIN_PAGE = """<html><body><form action="/login" method="post">
+<input name="username" type="text"><input name="password" type="password">
+<textarea name="note"></textarea><select name="lang"><option>en</option></select>
+</form><script src="/app.js"></script></body></html>"""
+
+
+def fingerprint(html):
+    return structure_simhash(html.encode(), 'utf-8')
+
+
+def test_same_template_pages_share_fingerprint():
+    """Страницы одного шаблона с разными данными дают близкие отпечатки"""
+    first = fingerprint(ITEM_PAGE.format(title='Lamp', price='10', id=1))
+    second = fingerprint(ITEM_PAGE.format(title='Chair with a long name', price='999', id=2))
+    other = fingerprint(LOGIN_PAGE)
+    assert hamming_distance(first, second) == 0
+    assert hamming_distance(first, other) > 3
+
+
+def test_clusterer_groups_by_fingerprint_and_group():
+    """Похожие страницы попадают в кластер первой, но только внутри своей группы"""
+    clusterer = PageClusterer(max_distance=3)
+    base = fingerprint(ITEM_PAGE.format(title='a', price='1', id=1))
+    assert clusterer.add('/item?id=1', 'shop', base) == '/item?id=1'
+    assert clusterer.add('/item?id=2', 'shop', base ^ 0b101) == '/item?id=1'
+    assert clusterer.add('/login', 'shop', fingerprint(LOGIN_PAGE)) == '/login'
+    assert clusterer.add('/other?id=1', 'blog', base) == '/other?id=1'
+    assert clusterer.clusters['/item?id=1'] == ['/item?id=1', '/item?id=2']
+    assert len(clusterer.clusters) == 3
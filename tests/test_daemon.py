@@ -0,0 +1,104 @@
+import http.client
+import json
+import os
+import threading
+
+import pytest
+
+from utils.daemon import MAX_REQUEST_BODY, Job, JobQueue, ScanDaemon
+
+
+def test_queue_orders_by_priority_and_skips_cancelled():
+    queue = JobQueue()
+    low, high, cancelled, high_later = Job({}, 0), Job({}, 5), Job({}, 9), Job({}, 5)
+    for job in (low, high, cancelled, high_later):
+        queue.put(job)
+    cancelled.cancel()
+
+    assert [queue.get() for _ in range(3)] == [high, high_later, low]
+    assert cancelled.status == 'cancelled'
+    queue.close()
+    assert queue.get() is None
+
+
+def test_jobs_stream_findings_over_http():
+    """Задание принимается через API, находки приходят потоком NDJSON"""
+    release = threading.Event()
+
+    def runner(job):
+        job.emit({'event': 'finding', 'target': job.request['target']})
+        release.wait(5)
+        return {'vulnerabilities': 1}
+
+    daemon = ScanDaemon(runner, workers=1)
+    daemon.start()
+    server = daemon.serve_tcp('127.0.0.1', 0)
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+    try:
+        connection.request('POST', '/jobs', json.dumps({'target': 'http://example.test/'}))
+        response = connection.getresponse()
+        assert response.status == 202
+        job_id = json.loads(response.read())['id']
+
+        connection.request('POST', '/jobs', 'not json')
+        response = connection.getresponse()
+        assert response.status == 400
+        response.read()
+
+        connection.request('GET', f'/jobs/{job_id}/events')
+        response = connection.getresponse()
+        release.set()
+        events = [json.loads(line) for line in response.read().splitlines()]
+        assert events[0] == {'event': 'finding', 'target': 'http://example.test/'}
+        assert events[-1]['event'] == 'end'
+        assert events[-1]['status'] == 'done'
+        assert events[-1]['summary'] == {'vulnerabilities': 1}
+    finally:
+        connection.close()
+        daemon.stop(timeout=5)
+
+
+def test_api_hides_credentials_and_closes_after_oversized_body(tmp_path):
+    daemon = ScanDaemon(lambda job: {}, workers=0)
+    job = daemon.submit({'target': 'http://example.test/', 'bearer_token': 'secret',
+                         'json_body': {'user': 'bob', 'password': 'hunter2'}})
+    assert job.to_dict()['request'] == {
+        'target': 'http://example.test/', 'bearer_token': '***',
+        'json_body': {'user': 'bob', 'password': '***'},
+    }
+    assert job.request['bearer_token'] == 'secret'
+
+    server = daemon.serve_tcp('127.0.0.1', 0)
+    socket_path = str(tmp_path / 'api.sock')
+    daemon.serve_unix(socket_path)
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+    try:
+        assert os.stat(socket_path).st_mode & 0o777 == 0o600
+        connection.request('POST', '/jobs', b'x' * (MAX_REQUEST_BODY + 1))
+        response = connection.getresponse()
+        assert response.status == 413
+        assert response.getheader('Connection') == 'close'
+
+        # Нечисловая или отрицательная длина тела - ошибка запроса, а не обрыв или ожидание
+        for length in ('abc', '-1'):
+            connection.close()
+            connection.putrequest('POST', '/jobs')
+            connection.putheader('Content-Length', length)
+            connection.endheaders()
+            response = connection.getresponse()
+            assert response.status == 400
+            assert response.getheader('Connection') == 'close'
+    finally:
+        connection.close()
+        daemon.stop(timeout=5)
+
+
+def test_api_refuses_non_loopback_addresses():
+    """API без аутентификации не открывается на внешних интерфейсах"""
+    daemon = ScanDaemon(lambda job: {}, workers=0)
+    try:
+        with pytest.raises(ValueError):
+            daemon.serve_tcp('0.0.0.0', 0)
+        assert daemon.serve_tcp('localhost', 0)
+    finally:
+        daemon.stop(timeout=5)
@@ -0,0 +1,80 @@
+import json
+
+from utils.diff import diff_files
+from utils.findings import Finding, FindingSet
+from utils.reporter import Reporter
+
+
+def test_diff_splits_new_resolved_unchanged(tmp_path):
+    """Сравнение JSON отчета с JSON Lines результатами"""
+    old = tmp_path / 'old.json'
+    old.write_text(json.dumps({
+        'target': 'http://example.com/item?id=1',
+        'vulnerabilities': [
+            {'type': 'SQL_INJECTION', 'parameter': 'id', 'payload_type': 'error_based'},
+            {'type': 'REFLECTED_XSS', 'parameter': 'q', 'payload_type': 'reflected'},
+        ],
+        'warnings': ['Content-Security-Policy отсутствует'],
+    }), encoding='utf-8')
+    new = tmp_path / 'new.jsonl'
+    new.write_text('\n'.join(json.dumps(row) for row in [
+        {'target': 'http://example.com/item?id=2', 'type': 'SQL_INJECTION', 'parameter': 'id', 'payload_type': 'error_based'},
+        {'target': 'http://example.com/item?id=2', 'type': 'SQL_INJECTION', 'parameter': 'page', 'payload_type': 'error_based'},
+    ]), encoding='utf-8')
+
+    result = diff_files(str(old), str(new))
+    assert [f['parameter'] for f in result['unchanged']] == ['id']
+    assert [f['parameter'] for f in result['new']] == ['page']
+    assert len(result['resolved']) == 2
+
+
+def test_same_vulnerability_found_by_another_technique_is_unchanged(tmp_path):
+    """Адаптивный порядок payload меняет сработавшую технику, но не отпечаток"""
+    runs = []
+    for name, technique, context in (('old', 'error_based', 'html_text'), ('new', 'boolean_based', 'attribute')):
+        findings = FindingSet([
+            Finding('SQL_INJECTION', 'high', 'SQLi', target='http://example.com/item?id=1',
+                    parameter='id', payload_type=technique),
+            Finding('REFLECTED_XSS', 'high', 'XSS', target='http://example.com/item?id=1',
+                    parameter='q', payload_type=context),
+        ])
+        path = tmp_path / f'{name}.jsonl'
+        path.write_text('\n'.join(json.dumps(finding.to_dict()) for finding in findings), encoding='utf-8')
+        runs.append(str(path))
+
+    result = diff_files(*runs)
+    assert sorted(f['parameter'] for f in result['unchanged']) == ['id', 'q']
+    assert result['new'] == result['resolved'] == []
+
+
+def test_json_and_jsonl_reports_of_one_scan_do_not_differ(tmp_path):
+    """JSON Lines отчет содержит и предупреждения, иначе они выглядят исправленными"""
+    results = {
+        'target': 'http://example.com/?q=1',
+        'vulnerabilities': [Finding('REFLECTED_XSS', 'high', 'XSS', parameter='q', payload_type='attribute')],
+        'warnings': [Finding.warning('Content-Security-Policy отсутствует', 'HeaderScanner')],
+    }
+    json_path = Reporter(results).generate_json_report(str(tmp_path / 'r.json'))
+    jsonl_path = Reporter(results).generate_jsonl_report(str(tmp_path / 'r.jsonl'))
+
+    result = diff_files(json_path, jsonl_path)
+    assert result['new'] == result['resolved'] == []
+    assert len(result['unchanged']) == 2
+
+
+def test_findings_missing_from_incomplete_run_are_not_resolved(tmp_path):
+    """Прерванное сканирование могло не дойти до находки: она не считается исправленной"""
+    xss = Finding('REFLECTED_XSS', 'high', 'XSS', parameter='q', payload_type='attribute')
+    sqli = Finding('SQL_INJECTION', 'critical', 'SQLi', parameter='id', payload_type='error_based')
+    target = 'http://example.com/?q=1&id=1'
+    old = Reporter({'target': target, 'vulnerabilities': [xss, sqli]}).generate_json_report(str(tmp_path / 'old.json'))
+    for name in ('new.json', 'new.jsonl'):
+        reporter = Reporter({'target': target, 'vulnerabilities': [xss], 'incomplete': 'превышен бюджет'})
+        new = reporter.generate_jsonl_report(str(tmp_path / name)) if name.endswith('.jsonl') \
+            else reporter.generate_json_report(str(tmp_path / name))
+
+        result = diff_files(old, new)
+        assert result['incomplete'] == {'old': None, 'new': 'превышен бюджет'}
+        assert result['resolved'] == []
+        assert [f['type'] for f in result['unverified']] == ['SQL_INJECTION']
+        assert len(result['unchanged']) == 1
@@ -0,0 +1,31 @@
+from utils.findings import Finding, FindingSet, finding_fingerprint
+
+
+def test_fingerprint_ignores_parameter_values_and_case():
+    """Отпечаток не зависит от значений параметров, регистра хоста и порта по умолчанию"""
+    first = finding_fingerprint('http://Example.com:80/item?id=1&q=a', 'SQL_INJECTION', 'id', 'Boolean-Based')
+    second = finding_fingerprint('http://example.com/item?q=zzz&id=42', 'sql_injection', 'id', 'boolean based')
+    assert first == second
+    assert first != finding_fingerprint('http://example.com/item?id=1', 'SQL_INJECTION', 'q', 'boolean_based')
+
+
+def test_finding_description_is_formatted_lazily():
+    """Описание хранится шаблоном и форматируется при обращении"""
+    finding = Finding('REFLECTED_XSS', 'HIGH', 'Reflected XSS в параметре {parameter}',
+                      'Payload: {payload:.5}...', target='http://example.com/?q=1',
+                      parameter='q', payload='<script>alert(1)</script>')
+    assert finding.severity == 'high'
+    assert finding.description == 'Reflected XSS в параметре q'
+    assert finding.to_dict()['details'] == 'Payload: <scri...'
+    assert not hasattr(finding, '__dict__')
+
+
+def test_finding_set_deduplicates_repeated_warnings():
+    """Повторяющиеся предупреждения схлопываются по отпечатку"""
+    findings = FindingSet()
+    for _ in range(3):
+        findings.add(Finding('INSECURE_COOKIE', 'low', 'Cookie без флага HttpOnly',
+                             target='http://example.com/', parameter='HttpOnly'))
+    assert findings.add(Finding.warning('Не удалось проверить CSP', target='http://example.com/'))
+    assert len(findings) == 2
+    assert findings.duplicates == 2
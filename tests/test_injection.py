@@ -0,0 +1,108 @@
+import requests
+
+from utils.auth import Authenticator
+from utils.injection import InjectionExecutor, InjectionRequest, reflected_near
+from utils.scheduler import Probe, ProbeScheduler, RequestBudget
+
+
+class FakeTransport:
+    def __init__(self, auth=None):
+        self.session = requests.Session()
+        self.session.cookies.set('sid', 'abc')
+        self.auth = auth
+        self.sent = []
+
+    def baseline(self, url):
+        return None
+
+    def request(self, method, url, **kwargs):
+        self.sent.append(kwargs)
+        return None
+
+
+class CountingAuth(Authenticator):
+    def login(self, transport):
+        pass
+
+
+def test_points_cover_every_vector_and_build_requests():
+    request = InjectionRequest('http://shop.test/product/42/reviews?sort=new', json_body={'user': {'name': 'bob'}})
+    points = {
+        point.key: point
+        for point in request.points(headers={'User-Agent': 'ua'}, cookie_header='sid=abc; lang=en')
+    }
+    assert set(points) == {
+        'sort', 'path:2', 'header:User-Agent', 'header:Referer', 'header:X-Forwarded-For',
+        'cookie:sid', 'cookie:lang', 'json:user.name',
+    }
+
+    method, url, kwargs = request.build(
+        [(points['path:2'], "1'"), (points['cookie:lang'], "x;y"), (points['json:user.name'], '<b>')],
+        headers={'User-Agent': 'scanner'}, cookie_header='sid=abc; lang=en'
+    )
+    assert method == 'POST'
+    assert url == 'http://shop.test/product/1%27/reviews?sort=new'
+    assert kwargs['headers'] == {'User-Agent': 'scanner', 'Cookie': 'sid=abc; lang=x%3By'}
+    assert kwargs['json'] == {'user': {'name': '<b>'}}
+    # Исходное тело не изменяется
+    assert request.json_body == {'user': {'name': 'bob'}}
+
+
+def test_header_and_cookie_probes_share_requests():
+    executor = InjectionExecutor(FakeTransport(), 'http://shop.test/item?id=1')
+    executor.points()
+    scheduler = ProbeScheduler(per_parameter_limit=2)
+    for key in ('id', 'header:User-Agent', 'header:Referer', 'cookie:sid'):
+        for payload in ("'", '"'):
+            scheduler.add(Probe(key, payload, 'test', 0.5, 1.0, 'high' if key == 'id' else 'low'))
+
+    batches = [[probe.parameter for probe in batch] for batch in executor.batches(scheduler)]
+    assert batches[:2] == [['id'], ['id']]
+    # 8 проб заголовков и cookies (вместе с X-Forwarded-For без проб) - в двух запросах
+    assert sorted(map(sorted, batches[2:])) == [
+        ['cookie:sid', 'header:Referer', 'header:User-Agent']
+    ] * 2
+
+
+def test_login_session_cookies_are_not_injected():
+    """Подмена cookie сессии вызвала бы повторный вход и ложную находку"""
+    auth = CountingAuth()
+    transport = FakeTransport(auth)
+    transport.session.cookies.set('lang', 'en')
+    auth.relogin(transport, None)
+    transport.session.cookies.set('theme', 'dark')
+    assert auth.session_cookies == {'sid', 'lang'}
+
+    executor = InjectionExecutor(transport, 'http://shop.test/item?id=1', vectors=('cookie', 'header'))
+    assert [point.key for point in executor.points() if point.kind == 'cookie'] == ['cookie:theme']
+
+    executor.send([Probe('cookie:theme', "'", 'test', 0.5, 1.0, 'low')], timeout=5)
+    executor.send([Probe('header:Referer', "'", 'test', 0.5, 1.0, 'low')], timeout=5)
+    cookie_probe, header_probe = transport.sent
+    assert cookie_probe['relogin'] is False
+    assert cookie_probe['headers']['Cookie'] == 'sid=abc; lang=en; theme=%27'
+    assert header_probe['relogin'] is True
+
+
+def test_canary_attributes_reflection_to_its_payload():
+    text = "<p>wsc1111 safe</p><p>wsc2222<script>alert(1)</script></p>"
+    assert reflected_near(text, 'wsc2222', ['<script>alert'], 40)
+    assert not reflected_near(text, 'wsc1111', ['<script>alert'], 10)
+
+
+def test_batched_probes_are_charged_per_request():
+    """Бюджет считает HTTP запросы: пакет проб заголовков и cookies - один запрос"""
+    transport = FakeTransport()
+    budget = RequestBudget(max_requests=3)
+    executor = InjectionExecutor(transport, 'http://shop.test/item?id=1', budget=budget)
+    executor.points()
+    scheduler = ProbeScheduler(budget, per_parameter_limit=2)
+    for key in ('id', 'header:User-Agent', 'header:Referer', 'cookie:sid'):
+        for payload in ("'", '"'):
+            scheduler.add(Probe(key, payload, 'test', 0.5, 1.0, 'high' if key == 'id' else 'low'))
+
+    for probes in executor.batches(scheduler):
+        executor.send(probes, timeout=5)
+    assert len(transport.sent) == budget.used_requests == 3
+    assert executor.batched_probes == 3
+    assert scheduler.skipped == 3
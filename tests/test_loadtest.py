@@ -0,0 +1,81 @@
+import random
+import statistics
+
+import requests
+
+from utils.loadtest import (
+    LatencyModel, LoadMonitor, SyntheticTargets, TargetProfile, compare_baselines
+)
+from utils.transport import Transport
+
+
+def test_latency_distributions_share_the_median():
+    rng = random.Random(1)
+    for distribution in ('exponential', 'lognormal', 'pareto'):
+        model = LatencyModel(distribution, median=0.1, shape=1.5)
+        samples = [model.sample(rng) for _ in range(20000)]
+        assert abs(statistics.median(samples) - 0.1) < 0.01
+    heavy = LatencyModel('pareto', median=0.1, shape=1.1, cap=5)
+    assert max(heavy.sample(rng) for _ in range(20000)) == 5
+
+
+def test_monitor_measures_requests_against_synthetic_targets():
+    profile = TargetProfile(LatencyModel('fixed', 0.01), error_rate=0, stall_rate=0, blackhole_rate=0)
+    monitor = LoadMonitor(interval=0.05)
+    transport = Transport()
+    monitor.attach(transport)
+
+    with SyntheticTargets(hosts=2, profile=profile) as servers:
+        targets = servers.targets(4)
+        monitor.start()
+        for target in targets:
+            with monitor.track(target, 'scan'):
+                assert transport.get(target, timeout=5).status_code == 200
+        monitor.stop()
+        transport.close()
+
+    report = monitor.report(len(targets))
+    assert servers.server_stats['responses'] == 4
+    assert report['targets'] == {'total': 4, 'done': 4, 'failed': 0, 'not_scanned': 0}
+    assert report['request_latency']['count'] == 4
+    assert report['request_latency']['p50'] >= 0.01
+    assert report['stuck']['workers'] == 0
+    assert report['timeline'][-1]['requests'] == 4
+
+
+def test_black_holed_host_times_out_and_stuck_worker_is_reported():
+    profile = TargetProfile(blackhole_rate=1)
+    monitor = LoadMonitor(interval=0.05, stuck_after=0.2)
+    transport = Transport()
+    monitor.attach(transport)
+
+    with SyntheticTargets(hosts=1, profile=profile) as servers:
+        target, = servers.targets(1)
+        monitor.start()
+        try:
+            with monitor.track(target, 'scan'):
+                transport.get(target, timeout=0.5)
+        except requests.exceptions.RequestException:
+            pass
+        monitor.stop()
+        transport.close()
+
+    report = monitor.report(1)
+    assert report['targets']['failed'] == 1
+    assert sum(report['request_latency']['errors'].values()) == 1
+    stuck, = report['stuck']['details']
+    assert stuck['target'] == target and stuck['stack']
+
+
+def test_comparison_flags_regressions_beyond_tolerance():
+    old = {'throughput': {'targets_per_second': 10.0}, 'request_latency': {'p99': 0.5},
+           'memory': {'growth_kb': 10000}, 'stuck': {'workers': 0}}
+    new = {'throughput': {'targets_per_second': 9.0}, 'request_latency': {'p99': 1.0},
+           'memory': {'growth_kb': 11000}, 'stuck': {'workers': 1}}
+    rows = {row['metric']: row['regression'] for row in compare_baselines(old, new, tolerance=0.25)}
+    assert rows == {
+        'throughput.targets_per_second': False,
+        'request_latency.p99': True,
+        'memory.growth_kb': False,
+        'stuck.workers': True,
+    }
@@ -0,0 +1,93 @@
+import shutil
+import socket
+import ssl
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils import netcache
+from utils.netcache import DNSCache
+from utils.transport import Transport
+
+
+def test_dns_cache_reuses_addresses_until_ttl(monkeypatch):
+    """Повторные соединения не обращаются к резолверу, пока запись не устарела"""
+    lookups = []
+
+    def fake_getaddrinfo(host, port, family, socktype):
+        lookups.append(host)
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('10.0.0.1', port))]
+
+    now = [100.0]
+    monkeypatch.setattr(netcache.socket, 'getaddrinfo', fake_getaddrinfo)
+    monkeypatch.setattr(netcache.time, 'monotonic', lambda: now[0])
+
+    cache = DNSCache(ttl=60)
+    for _ in range(5):
+        assert cache.resolve('shop.local', 443)[0][4] == ('10.0.0.1', 443)
+    assert lookups == ['shop.local']
+    assert (cache.hits, cache.misses) == (4, 1)
+
+    now[0] += 61
+    cache.resolve('shop.local', 443)
+    assert lookups == ['shop.local', 'shop.local']
+
+    cache.invalidate('shop.local', 443)
+    cache.resolve('shop.local', 443)
+    assert len(lookups) == 3
+
+
+@pytest.fixture
+def tls_url(tmp_path):
+    """Локальный HTTPS сервер с самоподписанным сертификатом для localhost"""
+    if shutil.which('openssl') is None:
+        pytest.skip("нужен openssl")
+    cert, key = str(tmp_path / 'cert.pem'), str(tmp_path / 'key.pem')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1', '-subj', '/CN=localhost',
+         '-addext', 'subjectAltName=DNS:localhost', '-keyout', key, '-out', cert],
+        check=True, capture_output=True
+    )
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'ok')
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"https://localhost:{server.server_address[1]}/", cert
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.filterwarnings("ignore::urllib3.exceptions.InsecureRequestWarning")
+def test_tls_sessions_resume_per_context(tls_url):
+    """Новое соединение возобновляет сессию; проверка сертификата не получает чужую сессию"""
+    url, cert = tls_url
+    transport = Transport()
+    cache = transport.network_cache
+
+    assert transport.get(url, timeout=5).text == 'ok'
+    # Новый пул - новое соединение с сессией из кэша
+    transport.adapter.poolmanager.clear()
+    assert transport.get(url, timeout=5).text == 'ok'
+    assert (cache.tls.resumed, cache.tls.full_handshakes) == (1, 1)
+
+    # Контекст с проверкой сертификата хранит свои сессии
+    transport.adapter.poolmanager.clear()
+    assert transport.get(url, timeout=5, verify=cert).text == 'ok'
+    assert cache.tls.full_handshakes == 2
+    transport.close()
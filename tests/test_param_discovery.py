@@ -0,0 +1,51 @@
+from urllib.parse import parse_qs, urlparse
+
+from utils.param_discovery import ParameterDiscovery
+from utils.scheduler import RequestBudget
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+        self.content = text.encode()
+        self.encoding = 'utf-8'
+        self.status_code = 200
+
+
+class FakeTransport:
+    """Страница реагирует на debug (структура), limit (длина) и отражает search"""
+
+    def get(self, url, **kwargs):
+        params = parse_qs(urlparse(url).query)
+        body = '<html><body><h1>Shop</h1>'
+        if 'debug' in params:
+            body += '<pre><b>trace</b><i>x</i><table><tr><td>1</td></tr></table></pre>'
+        if 'limit' in params:
+            body += '<p>' + 'product ' * 20 + '</p>'
+        if 'search' in params:
+            body += '<p>Results for ' + params['search'][0] + '</p>'
+        return FakeResponse(body + '</body></html>')
+
+
+def test_batched_discovery_finds_reacting_parameters():
+    """Скрытые параметры находятся пакетами и бисекцией, а не запросом на каждое имя"""
+    wordlist = [f'name{i}' for i in range(200)] + ['debug', 'limit', 'search']
+    discovery = ParameterDiscovery(FakeTransport(), wordlist, seed=1)
+    found = discovery.discover('http://shop.local/')
+    assert set(found) == {'debug', 'limit', 'search'}
+    assert discovery.requests_sent < 30
+
+
+def test_existing_query_parameters_are_skipped():
+    discovery = ParameterDiscovery(FakeTransport(), ['search'], seed=1)
+    assert discovery.discover('http://shop.local/?search=x') == {}
+    assert discovery.requests_sent == 0
+
+
+def test_discovery_requests_are_charged_to_the_budget():
+    """Запросы поиска параметров расходуют бюджет цели и останавливаются на его исчерпании"""
+    wordlist = [f'name{i}' for i in range(200)] + ['debug', 'limit', 'search']
+    budget = RequestBudget(max_requests=4)
+    discovery = ParameterDiscovery(FakeTransport(), wordlist, seed=1, budget=budget)
+    discovery.discover('http://shop.local/')
+    assert discovery.requests_sent == budget.used_requests == 4
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+from utils import payload_corpus
+from utils.payload_corpus import DEFAULT_CORPUS_DIR, PayloadCorpus, load_corpus
+
+
+def test_encoded_variants_follow_raw_payloads(tmp_path):
+    """Закодированные варианты генерируются загрузчиком и идут после исходных payload"""
+    path = tmp_path / 'xss.jsonl'
+    path.write_text(
+        '# comment\n'
+        '{"payload": "<b>x</b>", "technique": "basic", "encodings": ["url", "html"]}\n'
+        '{"payload": "\\" onfocus=\\"x", "technique": "context", "context": "attribute"}\n',
+        encoding='utf-8'
+    )
+    corpus = PayloadCorpus.load(str(path), cache_dir=str(tmp_path / 'cache'))
+
+    assert corpus.payloads(context=None) == ['<b>x</b>', '%3Cb%3Ex%3C%2Fb%3E', '&lt;b&gt;x&lt;/b&gt;']
+    assert corpus.payloads(context='attribute') == ['" onfocus="x']
+    assert corpus.select(technique='basic', encoding='html')[0].markers == ('&lt;b&gt;x&lt;/b&gt;',)
+    assert (tmp_path / 'cache' / 'xss.jsonl.cache.json').exists()
+
+
+def test_bundled_sqli_corpus_is_indexed_by_dbms(tmp_path, monkeypatch):
+    """Встроенный корпус SQLi выбирается по типу и СУБД; кэш пишется не в каталог исходников"""
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    monkeypatch.setattr(payload_corpus, '_memory_cache', {})
+    corpus = load_corpus('sqli')
+    cache_file, = (tmp_path / 'automated-web-scanner' / 'payloads').iterdir()
+    assert cache_file.name.startswith('sqli.jsonl.') and cache_file.name.endswith('.cache.json')
+    assert not any(name.endswith('.cache.json') for name in os.listdir(DEFAULT_CORPUS_DIR))
+    assert corpus.values('technique') == ['boolean_based', 'error_based', 'union_based', 'time_based']
+    assert corpus.payloads(technique='time_based', dbms='mysql') == [
+        "' OR SLEEP(5)--",
+        "' OR (SELECT * FROM (SELECT(SLEEP(5)))a)--",
+    ]
+
+
+def test_damaged_cache_is_reparsed_and_bad_lines_are_reported(tmp_path):
+    """Поврежденный кэш не мешает загрузке, а ошибка в корпусе указывает строку"""
+    path = tmp_path / 'xss.jsonl'
+    path.write_text('{"payload": "<b>x</b>"}\n', encoding='utf-8')
+    cache_dir = tmp_path / 'cache'
+    cache_dir.mkdir()
+    (cache_dir / 'xss.jsonl.cache.json').write_text('[1, 2]', encoding='utf-8')
+    assert PayloadCorpus.load(str(path), cache_dir=str(cache_dir)).payloads() == ['<b>x</b>']
+    assert os.listdir(cache_dir) == ['xss.jsonl.cache.json']
+
+    path.write_text('{"payload": "<b>x</b>"}\n\n{"technique": "basic"}\n', encoding='utf-8')
+    with pytest.raises(ValueError, match='Строка 3'):
+        PayloadCorpus.load(str(path), cache_dir=str(cache_dir))
@@ -0,0 +1,80 @@
+import os
+import threading
+
+from utils.payload_stats import PayloadStats, technology_tags
+
+
+def test_score_equals_prior_without_history():
+    """Без статистики сохраняется статический порядок payload"""
+    stats = PayloadStats()
+    assert stats.score('sqli', technology_tags(), "'", prior=0.55) == 0.55
+
+
+def test_hits_reorder_payloads_and_survive_reload(tmp_path):
+    """Payload с попаданиями на данной СУБД поднимается выше и сохраняется на диск"""
+    path = str(tmp_path / 'stats.json')
+    stats = PayloadStats.load(path)
+    tags = technology_tags(server='Apache/2.4.41 (Ubuntu)', db='MySQL')
+    assert tags == ['any', 'server:apache', 'db:mysql']
+
+    for _ in range(5):
+        stats.record('sqli', tags, 'winner', hit=True)
+        stats.record('sqli', tags, 'loser', hit=False)
+    stats.remember('example.com', 'db', 'mysql')
+    stats.save()
+
+    reloaded = PayloadStats.load(path)
+    assert reloaded.host_fact('example.com', 'db') == 'mysql'
+    assert reloaded.score('sqli', tags, 'winner', prior=0.3) > reloaded.score('sqli', tags, 'loser', prior=0.6)
+
+
+def test_concurrent_record_and_save(tmp_path):
+    """Задания демона сохраняют статистику, пока другие записывают попадания"""
+    path = str(tmp_path / 'stats.json')
+    stats = PayloadStats.load(path)
+    stop = threading.Event()
+
+    def record():
+        i = 0
+        while not stop.is_set():
+            stats.record('sqli', ['any', f"db:{i % 50}"], f"payload-{i % 200}", hit=i % 2 == 0)
+            i += 1
+
+    recorders = [threading.Thread(target=record) for _ in range(2)]
+    for thread in recorders:
+        thread.start()
+    errors = []
+
+    def save():
+        for _ in range(30):
+            try:
+                stats.save()
+            except Exception as e:
+                errors.append(e)
+
+    savers = [threading.Thread(target=save) for _ in range(3)]
+    for thread in savers:
+        thread.start()
+    for thread in savers:
+        thread.join()
+    stop.set()
+    for thread in recorders:
+        thread.join()
+
+    assert errors == []
+    assert PayloadStats.load(path).counters['sqli']['any']
+    assert os.listdir(tmp_path) == ['stats.json']
+
+
+def test_technology_hit_rate_is_not_diluted_by_other_technologies():
+    """Промахи на других СУБД, учтенные в 'any', не занижают оценку на MySQL"""
+    stats = PayloadStats()
+    for _ in range(50):
+        stats.record('sqli', technology_tags(db='PostgreSQL'), 'sleep', hit=False)
+    for _ in range(5):
+        stats.record('sqli', technology_tags(db='MySQL'), 'sleep', hit=True)
+
+    assert stats.score('sqli', technology_tags(db='MySQL'), 'sleep', prior=0.3) > 0.6
+    assert stats.score('sqli', technology_tags(db='PostgreSQL'), 'sleep', prior=0.3) < 0.1
+    # Неизвестная СУБД оценивается по общей статистике
+    assert stats.score('sqli', technology_tags(), 'sleep', prior=0.3) < 0.3
@@ -0,0 +1,51 @@
+import json
+
+from utils.html_reporter import HTMLReporter
+from utils.reporter import Reporter
+from utils.sarif_reporter import SARIFReporter
+from utils.sast import sast_finding
+
+
+def make_results():
+    """Находки передаются генератором: отчет должен прочитать их за один проход"""
+    def findings():
+        yield {'type': 'REFLECTED_XSS', 'severity': 'high', 'description': '<script>alert(1)</script>',
+               'parameter': 'q', 'fingerprint': 'abc'}
+        yield {'type': 'SQL_INJECTION', 'severity': 'critical', 'description': 'SQLi', 'parameter': 'id'}
+    return {'target': 'http://example.com/?q=1', 'vulnerabilities': findings(), 'warnings': ['<b>w</b>'], 'info': []}
+
+
+def test_json_report_streams_generator_with_summary(tmp_path):
+    path = Reporter(make_results()).generate_json_report(str(tmp_path / 'r.json'))
+    report = json.load(open(path, encoding='utf-8'))
+    assert len(report['vulnerabilities']) == 2
+    assert report['summary']['by_severity']['critical'] == 1
+
+
+def test_html_report_escapes_values(tmp_path):
+    path = HTMLReporter(make_results()).generate_report(str(tmp_path / 'r.html'))
+    content = open(path, encoding='utf-8').read()
+    assert '<script>alert(1)</script>' not in content
+    assert '&lt;script&gt;alert(1)&lt;/script&gt;' in content
+    assert '&lt;b&gt;w&lt;/b&gt;' in content
+    assert content.index('Scan Summary') < content.index('SQLi')
+
+
+def test_sarif_report_has_rules_and_fingerprints(tmp_path):
+    path = SARIFReporter(make_results()).generate_report(str(tmp_path / 'r.sarif'))
+    run = json.load(open(path, encoding='utf-8'))['runs'][0]
+    assert [rule['id'] for rule in run['tool']['driver']['rules']] == ['REFLECTED_XSS', 'SQL_INJECTION']
+    assert run['results'][0]['level'] == 'error'
+    assert run['results'][0]['partialFingerprints'] == {'scannerFingerprint/v1': 'abc'}
+
+
+def test_sarif_sast_findings_are_anchored_to_lines(tmp_path):
+    (tmp_path / 'app.py').write_text("import os\nos.system(cmd)\n")
+    finding = sast_finding(str(tmp_path), 'app.py', 2, 'start_process_with_a_shell', 'high', 'shell', 'Bandit')
+    results = {'target': str(tmp_path), 'vulnerabilities': [finding, *make_results()['vulnerabilities']]}
+    path = SARIFReporter(results).generate_report(str(tmp_path / 'r.sarif'))
+    sast, web, _ = json.load(open(path, encoding='utf-8'))['runs'][0]['results']
+    assert sast['locations'][0]['physicalLocation'] == {
+        'artifactLocation': {'uri': 'app.py'}, 'region': {'startLine': 2}
+    }
+    assert 'region' not in web['locations'][0]['physicalLocation']
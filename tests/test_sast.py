@@ -0,0 +1,90 @@
+from utils.findings import FindingSet
+from utils.sast import BanditTool, SASTCache, SASTRunner, SASTTool, sast_finding
+
+
+class FakeTool(SASTTool):
+    """Flags every line containing eval(); records which files it analyzed."""
+
+    name = 'Fake'
+
+    def __init__(self, rules='v1'):
+        super().__init__()
+        self.rules = rules
+        self.analyzed = []
+
+    def available(self):
+        return True
+
+    def version(self):
+        return '1.0'
+
+    def ruleset(self, root):
+        return [self.rules]
+
+    def run(self, root, files):
+        self.analyzed.extend(files)
+        findings = []
+        for path in files:
+            with open(root / path) as f:
+                for number, line in enumerate(f, 1):
+                    if 'eval(' in line:
+                        findings.append(sast_finding(root, path, number, 'eval-used', 'high', 'eval', self.name))
+        return findings
+
+
+def test_unchanged_files_come_from_cache(tmp_path):
+    (tmp_path / 'a.py').write_text("x = eval(input())\n")
+    (tmp_path / 'b.py').write_text("y = 1\n")
+    cache_path = str(tmp_path / 'sast.cache.json')
+
+    tool = FakeTool()
+    first = SASTRunner(tmp_path, [tool], SASTCache.load(cache_path), jobs=2).run(['a.py', 'b.py'])
+    assert sorted(tool.analyzed) == ['a.py', 'b.py']
+    assert [f.url for f in first] == ['a.py:1']
+
+    # Сдвиг строки не меняет отпечаток, изменен только b.py
+    (tmp_path / 'a.py').write_text("\nx = eval(input())\n")
+    tool = FakeTool()
+    cache = SASTCache.load(cache_path)
+    second = SASTRunner(tmp_path, [tool], cache).run(['b.py'])
+    assert tool.analyzed == []
+    assert cache.hits == 1 and second == []
+
+    second = SASTRunner(tmp_path, [tool], cache).run(['a.py'])
+    assert tool.analyzed == ['a.py']
+    assert [f.fingerprint for f in second] == [f.fingerprint for f in first]
+
+    # Новые правила делают кэш недействительным
+    tool = FakeTool(rules='v2')
+    SASTRunner(tmp_path, [tool], SASTCache.load(cache_path)).run(['a.py', 'b.py'])
+    assert sorted(tool.analyzed) == ['a.py', 'b.py']
+
+
+def test_bandit_output_is_converted_to_findings(tmp_path):
+    (tmp_path / 'src').mkdir()
+    (tmp_path / 'src' / 'app.py').write_text("import os\nos.system(cmd)\n")
+    output = {'results': [{
+        'filename': './src/app.py', 'line_number': 2, 'test_id': 'B605',
+        'test_name': 'start_process_with_a_shell', 'issue_severity': 'HIGH',
+        'issue_confidence': 'HIGH', 'issue_text': 'Starting a process with a shell',
+        'issue_cwe': {'id': 78},
+    }]}
+
+    finding, = BanditTool().parse(str(tmp_path), output)
+    assert finding.type == 'START_PROCESS_WITH_A_SHELL'
+    assert finding.severity == 'high'
+    assert finding.target == 'src/app.py'
+    assert finding.url == 'src/app.py:2'
+    assert finding.payload_type == 'CWE-78'
+
+
+def test_identical_flagged_lines_are_distinct_findings(tmp_path):
+    (tmp_path / 'a.py').write_text("x = eval(input())\n")
+    single, = SASTRunner(tmp_path, [FakeTool()]).run(['a.py'])
+
+    # Две одинаковые строки в одном файле - две находки, первая сохраняет отпечаток
+    (tmp_path / 'a.py').write_text("x = eval(input())\ny = 1\nx = eval(input())\n")
+    findings = SASTRunner(tmp_path, [FakeTool()]).run(['a.py'])
+    assert len(FindingSet(findings)) == 2
+    assert [f.url for f in findings] == ['a.py:1', 'a.py:3']
+    assert findings[0].fingerprint == single.fingerprint
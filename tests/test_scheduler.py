@@ -0,0 +1,54 @@
+from utils.scheduler import Probe, ProbeScheduler, RequestBudget, parameter_risk
+
+
+def make_probe(parameter, payload, expected_yield=0.5, cost=1.0, risk='medium'):
+    return Probe(parameter, payload, 'test', expected_yield, cost, risk)
+
+
+def test_high_risk_parameters_run_first():
+    """Пробы параметров с риском high выдаются раньше"""
+    scheduler = ProbeScheduler()
+    scheduler.add(make_probe('page', 'a', risk=parameter_risk('page')))
+    scheduler.add(make_probe('user_id', 'b', risk=parameter_risk('user_id')))
+    assert [p.parameter for p in scheduler] == ['user_id', 'page']
+
+
+def test_budget_and_settled_parameters_stop_probes():
+    """Бюджет ограничивает число запросов, а найденный результат снимает остальные"""
+    budget = RequestBudget(max_requests=3)
+    scheduler = ProbeScheduler(budget)
+    for i in range(5):
+        scheduler.add(make_probe('id', f'id{i}', risk='high'))
+        scheduler.add(make_probe('q', f'q{i}'))
+
+    issued = []
+    for probe in scheduler:
+        issued.append(probe.payload)
+        budget.spend()  # Каждая проба - отдельный запрос
+        scheduler.settle('id')
+    assert issued == ['id0', 'q0', 'q1']
+    assert budget.used_requests == 3
+    assert scheduler.skipped == 3
+
+
+def test_expensive_probe_skipped_when_time_is_short():
+    """Time-based проба не запускается, если не укладывается в бюджет времени"""
+    scheduler = ProbeScheduler(RequestBudget(max_seconds=2))
+    scheduler.add(make_probe('id', 'sleep', expected_yield=1.0, cost=6.0))
+    scheduler.add(make_probe('id', 'quote', expected_yield=0.1))
+    assert [p.payload for p in scheduler] == ['quote']
+
+
+def test_probes_over_parameter_limit_are_not_counted_as_skipped():
+    """Пропущенными считаются только пробы, которые были бы отправлены без бюджета"""
+    budget = RequestBudget(max_requests=1)
+    scheduler = ProbeScheduler(budget, per_parameter_limit=2)
+    for i in range(5):
+        scheduler.add(make_probe('id', f'id{i}', risk='high'))
+    scheduler.add(make_probe('q', 'q0'))
+    issued = []
+    for probe in scheduler:
+        issued.append(probe.payload)
+        budget.spend()
+    assert issued == ['id0']
+    assert scheduler.skipped == 2
@@ -0,0 +1,97 @@
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from modules.header_scanner import HeaderScanner
+from utils import transport as transport_module
+from utils.transport import Transport
+
+
+PAGE = b"<html><body>" + b"".join(b"<p class='row'>%d</p>" % i for i in range(20000)) + b"</body></html>"
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    methods = []
+
+    def log_message(self, *args):
+        pass
+
+    def _headers(self):
+        body = gzip.compress(PAGE) if 'gzip' in self.headers.get('Accept-Encoding', '') else PAGE
+        self.send_response(200)
+        self.send_header('Set-Cookie', 'sid=1; HttpOnly')
+        self.send_header('Set-Cookie', 'theme=dark')
+        if body is not PAGE:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        return body
+
+    def do_GET(self):
+        self.methods.append('GET')
+        self.wfile.write(self._headers())
+
+    def do_HEAD(self):
+        self.methods.append('HEAD')
+        self._headers()
+
+
+@pytest.fixture
+def page_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    PageHandler.methods = []
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_checks_fetch_only_what_they_need(page_url):
+    """Заголовки - через HEAD, префикс - оборванным GET, полное тело - сжатым"""
+    transport = Transport()
+
+    results = HeaderScanner(page_url, transport=transport).scan()
+    assert PageHandler.methods == ['HEAD']
+    assert transport.bytes_received == 0
+    # Каждый Set-Cookie проверяется отдельно
+    assert [w.parameter for w in results['warnings'] if w.type == 'INSECURE_COOKIE'] == ['HttpOnly']
+
+    prefix = transport.baseline(page_url, max_bytes=4096)
+    assert prefix.partial and 4096 <= len(prefix.content) < len(PAGE)
+    assert transport.baseline(page_url, max_bytes=1024) is prefix
+
+    full = transport.baseline(page_url)
+    assert not getattr(full, 'partial', False)
+    assert full.content == PAGE
+    assert full.headers['Content-Encoding'] == 'gzip'
+    assert transport.bytes_received < len(PAGE)
+    assert PageHandler.methods == ['HEAD', 'GET', 'GET']
+
+
+def test_baseline_cache_is_bounded(page_url, monkeypatch):
+    """Пакетный запуск не накапливает исходные страницы всех целей"""
+    monkeypatch.setattr(transport_module, 'BASELINE_CACHE_SIZE', 2)
+    transport = Transport()
+    first = transport.baseline(page_url + '?a', max_bytes=1024)
+    transport.baseline(page_url + '?b', max_bytes=1024)
+    assert transport.baseline(page_url + '?a', max_bytes=1024) is first
+
+    # Вытесняется давно не использованная страница
+    transport.baseline(page_url + '?c', max_bytes=1024)
+    assert transport.baseline(page_url + '?a', max_bytes=1024) is first
+    assert PageHandler.methods == ['GET'] * 3
+    transport.baseline(page_url + '?b', max_bytes=1024)
+    assert PageHandler.methods == ['GET'] * 4
+
+
+def test_prefix_holding_the_whole_page_serves_full_body_checks(page_url):
+    """Страница, целиком прочитанная для отпечатка, не скачивается модулями заново"""
+    transport = Transport()
+    prefix = transport.baseline(page_url, max_bytes=len(PAGE))
+    assert not prefix.partial
+    assert transport.baseline(page_url) is prefix
+    assert transport.cached_baseline(page_url) is prefix
+    assert PageHandler.methods == ['GET']